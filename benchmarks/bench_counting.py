@@ -0,0 +1,291 @@
+"""Benchmark the load, extract, count and report stages on synthesised CJK fonts.
+
+Fonts with 1k, 20k and 100k CJK codepoints are built with fontTools' fontBuilder
+(TTF, OTF, WOFF2 and a 2-face TTC sharing one cmap), every stage is timed
+separately and the results are written as JSON, so runs on different commits
+can be compared:
+
+    python benchmarks/bench_counting.py --output before.json
+    python benchmarks/bench_counting.py --output after.json --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTCollection, TTFont
+
+from cjkcount import write_csv
+from cjkcount.FontInfoCollector import FontInfoCollector
+from cjkcount.global_var import GB18030, CountingOptions, DisplayLanguage
+from cjkcount.membership_index import get_membership_index
+
+SIZES = (1_000, 20_000, 100_000)
+FORMATS = ("ttf", "otf", "woff2", "ttc")
+# codepoints are spread over few glyphs, building 100k distinct outlines would dominate the run
+GLYPH_COUNT = 64
+
+# CJK ranges the synthetic fonts draw codepoints from, in order
+CJK_RANGES = (
+    (0x4E00, 0x9FFF),  # CJK Unified Ideographs
+    (0x3400, 0x4DBF),  # Extension A
+    (0x20000, 0x2A6DF),  # Extension B
+    (0x2A700, 0x2B73F),  # Extension C
+    (0x2B740, 0x2B81F),  # Extension D
+    (0x2B820, 0x2CEAF),  # Extension E
+    (0x2CEB0, 0x2EBEF),  # Extension F
+    (0x30000, 0x3134F),  # Extension G
+    (0x31350, 0x323AF),  # Extension H
+    (0xF900, 0xFAFF),  # CJK Compatibility Ideographs
+    (0x2F800, 0x2FA1F),  # CJK Compatibility Ideographs Supplement
+    (0xAC00, 0xD7A3),  # Hangul Syllables
+)
+
+
+def cjk_codepoints(count: int) -> list[int]:
+    codepoints = []
+    for start, end in CJK_RANGES:
+        codepoints.extend(range(start, min(end + 1, start + count - len(codepoints))))
+        if len(codepoints) == count:
+            return codepoints
+    raise ValueError(f"Cannot synthesise a font with {count} CJK codepoints")
+
+
+def build_font(codepoints: list[int], outline: str, family_name: str) -> TTFont:
+    glyph_order = [".notdef", *(f"g{i}" for i in range(GLYPH_COUNT))]
+    builder = FontBuilder(1000, isTTF=outline == "glyf")
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap(
+        {code: glyph_order[1 + i % GLYPH_COUNT] for i, code in enumerate(codepoints)}
+    )
+    if outline == "glyf":
+        pen = TTGlyphPen(None)
+        pen.moveTo((100, 100))
+        pen.lineTo((100, 900))
+        pen.lineTo((900, 900))
+        pen.closePath()
+        glyph = pen.glyph()
+        builder.setupGlyf({name: glyph for name in glyph_order})
+    else:
+        pen = T2CharStringPen(1000, None)
+        pen.moveTo((100, 100))
+        pen.lineTo((100, 900))
+        pen.lineTo((900, 900))
+        pen.closePath()
+        charstring = pen.getCharString()
+        builder.setupCFF(family_name, {}, {name: charstring for name in glyph_order}, {})
+    builder.setupHorizontalMetrics({name: (1000, 100) for name in glyph_order})
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({"familyName": family_name, "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    return builder.font
+
+
+def synthesise_fonts(font_dir: Path, sizes, formats) -> list[dict]:
+    """Build the benchmark fonts into `font_dir`, reusing files from an earlier run."""
+    fonts = []
+    for size in sizes:
+        codepoints = cjk_codepoints(size)
+        for font_format in formats:
+            path = font_dir / f"bench-{size}.{font_format}"
+            font_ids = [0, 1] if font_format == "ttc" else [-1]
+            if not path.exists():
+                family_name = f"Bench {size}"
+                if font_format == "ttc":
+                    collection = TTCollection()
+                    for face in ("Regular", "Bold"):
+                        font = build_font(codepoints, "glyf", family_name)
+                        font["name"].setName(f"{family_name} {face}", 4, 3, 1, 0x409)
+                        collection.fonts.append(font)
+                    collection.save(path, shareTables=True)
+                else:
+                    font = build_font(
+                        codepoints, "cff" if font_format == "otf" else "glyf", family_name
+                    )
+                    if font_format == "woff2":
+                        font.flavor = "woff2"
+                    font.save(path)
+            fonts.append(
+                {"path": path, "format": font_format, "codepoints": size, "font_ids": font_ids}
+            )
+    return fonts
+
+
+def measure(function, repeats: int) -> dict:
+    """Time `function` `repeats` times, then run it once more under tracemalloc for its peak memory."""
+    # warm up caches (table loading, lazy imports) before timing
+    function()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        function()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "repeats": repeats,
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "peak_bytes": peak_bytes,
+    }
+
+
+def benchmark_font(font: dict, repeats: int, report_dir: Path) -> list[dict]:
+    path = font["path"]
+    font_id = font["font_ids"][0]
+    collector = FontInfoCollector(path, font_id)
+    gb18030 = GB18030()
+
+    def count_cjk_chars():
+        # forget the previous counts, count_cjk_chars() returns them otherwise
+        collector.counts_version = None
+        collector.count_cjk_chars()
+
+    def init_real_glyphs():
+        # the glyphs of the counted codepoints are checked as the cmap is read
+        CountingOptions.real_glyphs_only = True
+        try:
+            FontInfoCollector(path, font_id)
+        finally:
+            CountingOptions.real_glyphs_only = False
+
+    report_path = report_dir / f"{path.name}.csv"
+    stages = {
+        "init": lambda: FontInfoCollector(path, font_id),
+        "init_real_glyphs": init_real_glyphs,
+        "extract_chars": collector.extract_chars,
+        "count_cjk_chars": count_cjk_chars,
+        "gb18030_get_overlap": lambda: gb18030.get_overlap(collector.char_list),
+        "gb18030_count_overlap": lambda: gb18030.count_overlap(collector.char_bitmap),
+        "gb18030_get_overlap_chars": lambda: gb18030.get_overlap_chars(collector.char_bitmap),
+        # the first repeat also builds the index
+        "membership_index_count": lambda: get_membership_index().count(collector.codepoints),
+        "write_csv": lambda: write_csv.write(
+            report_path,
+            collector.cjk_char_count,
+            collector.unicode_char_count,
+            DisplayLanguage.EN,
+        ),
+    }
+    if len(font["font_ids"]) > 1:
+        stages["load_all_faces"] = lambda: FontInfoCollector.load_all_faces(path)
+
+    results = []
+    for stage, function in stages.items():
+        result = measure(function, repeats)
+        results.append(
+            {
+                "font": path.name,
+                "format": font["format"],
+                "codepoints": font["codepoints"],
+                "stage": stage,
+                **result,
+                "codepoints_per_s": font["codepoints"] / result["median_s"]
+                if result["median_s"]
+                else None,
+            }
+        )
+    return results
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline: dict):
+    """Print the median time of every stage relative to a previous run."""
+    baseline_times = {
+        (result["font"], result["stage"]): result["median_s"]
+        for result in baseline["results"]
+    }
+    print(f"{'font':<20} {'stage':<22} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for result in results:
+        baseline_time = baseline_times.get((result["font"], result["stage"]))
+        if baseline_time is None:
+            continue
+        ratio = result["median_s"] / baseline_time if baseline_time else float("inf")
+        print(
+            f"{result['font']:<20} {result['stage']:<22} "
+            f"{baseline_time * 1000:>8.2f}ms {result['median_s'] * 1000:>8.2f}ms {ratio:>6.2f}x"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(size) for size in value.split(",")],
+        default=SIZES,
+        help="Comma-separated CJK codepoint counts (default: 1000,20000,100000).",
+    )
+    parser.add_argument(
+        "--formats",
+        type=lambda value: value.split(","),
+        default=FORMATS,
+        help="Comma-separated font formats out of ttf,otf,woff2,ttc (default: all).",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument(
+        "--font-dir",
+        type=Path,
+        default=None,
+        help="Keep the synthesised fonts here and reuse them in later runs.",
+    )
+    parser.add_argument("-o", "--output", type=Path, default=None, help="JSON output file.")
+    parser.add_argument(
+        "--compare", type=Path, default=None, help="Previous JSON output to compare against."
+    )
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        font_dir = args.font_dir or Path(temp_dir)
+        font_dir.mkdir(parents=True, exist_ok=True)
+        results = []
+        for font in synthesise_fonts(font_dir, args.sizes, args.formats):
+            print(f"Benchmarking {font['path'].name}", file=sys.stderr)
+            results.extend(benchmark_font(font, args.repeats, Path(temp_dir)))
+
+    report = {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare:
+        compare(results, json.loads(args.compare.read_text(encoding="utf-8")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
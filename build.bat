@@ -1,5 +1,7 @@
 @ECHO OFF
 ECHO Start building...
+python -m cjkcount.table_pack
+python -m cjkcount.membership_index
 pyinstaller main.spec
 CD dist
 REN "main" "CJK-character-count-vX.XX"
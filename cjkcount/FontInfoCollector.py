@@ -0,0 +1,421 @@
+import copy
+import mmap
+from array import array
+from functools import cached_property
+from pathlib import Path
+from typing import BinaryIO, Callable, Self
+
+from fontTools.ttLib import TTCollection, TTFont, TTLibError
+
+from . import codepoint_bitmap, membership_index
+from .cmap_reader import (
+    FontCmap,
+    GlyphOutlines,
+    UnsupportedFont,
+    Woff2GlyphContours,
+    drop_blank_glyphs,
+    map_font_file,
+    read_all_font_cmaps,
+    read_font_cmap,
+    read_font_ids,
+    read_glyph_outlines,
+)
+from .global_var import (
+    DisplayCJKTablesList,
+    DisplayUnicodeBlocksList,
+    CJKGroup,
+    CountingOptions,
+    RangeTable,
+    get_counted_bitmap,
+    get_counts_version,
+)
+from .profiling import stage
+from .result_cache import CachedResult, ResultCache, hash_data, hash_file
+
+
+def get_ttc_list(file: str | Path | BinaryIO) -> list[str]:
+    # clear font list
+    ttc_names = []
+    # lazy=True: https://github.com/fonttools/fonttools/issues/2019
+    ttc = TTCollection(file, lazy=True)
+    for font in ttc:
+        # single font name in getName(nameID, platformID, platEncID, langID=None), 0x409 make sure all font in English name
+        ttf_name = font["name"].getName(4, 3, 1, 0x409)
+        # add the font name itself instead of the XML representation
+        ttc_names.append(str(ttf_name))
+    # return array of names
+    return ttc_names
+
+
+def read_face_ids(font_data: mmap.mmap) -> list[int]:
+    """Return the font number of every face in the mapped file, [-1] for a single font.
+
+    A damaged collection header also gives [-1], fontTools then reports the error.
+    """
+    try:
+        return read_font_ids(font_data)
+    except UnsupportedFont:
+        return [-1]
+
+
+def get_font_ids(font_path: Path) -> list[int]:
+    """Return the font number of every face in the file, [-1] for a single font."""
+    try:
+        with map_font_file(font_path) as font_data:
+            return read_face_ids(font_data)
+    except ValueError:
+        return [-1]
+
+
+def get_checked_codepoints() -> int | None:
+    """Bitmap of the codepoints whose glyphs are checked as fonts are read, None unless counting real glyphs only.
+
+    Only codepoints that are counted can change a count, so the others are never checked.
+    """
+    if not CountingOptions.real_glyphs_only:
+        return None
+    return get_counted_bitmap()
+
+
+def select_face(font_data: mmap.mmap, ttc_method: Callable[[list[str]], int]) -> int:
+    """Return the font number to count, asking `ttc_method` to pick a face of a collection."""
+    with stage("ttc_sniff"):
+        is_collection = read_face_ids(font_data) != [-1]
+    if not is_collection:
+        return -1
+    try:
+        with stage("ttc_names"):
+            ttc_names = get_ttc_list(font_data)
+    except TTLibError:
+        return -1
+    return ttc_method(ttc_names)
+
+
+class FontInfoCollector:
+    def __init__(
+        self,
+        font_path: Path,
+        font_id: int = -1,
+        font_cmap: FontCmap | None = None,
+        font_data: mmap.mmap | None = None,
+    ):
+        """
+        Args:
+            font_cmap: Already decoded cmap of the face, the file is not read at all.
+            font_data: The font file already mapped by `map_font_file()`, to avoid mapping it again.
+        """
+        self.font_path = font_path
+        self.font_id = font_id
+        if font_cmap is None:
+            with stage("read_cmap"):
+                if font_data is None:
+                    with map_font_file(font_path) as font_data:
+                        font_cmap = self.read_cmap(font_data)
+                else:
+                    font_cmap = self.read_cmap(font_data)
+        self.font_cmap = font_cmap
+        self.font_name = self.font_cmap.font_name
+        # sorted mapped codepoints
+        self.codepoints = array("I")
+        self.char_bitmap = 0
+        # UVS (base codepoint, variation selector) pairs, flattened
+        self.uvs_pairs = array("I")
+        self.extract_chars()
+
+        self.cjk_char_count = {}
+        self.unicode_char_count = {}
+        # get_counts_version() of the current counts, None before counting
+        self.counts_version = None
+        # where the counts are stored once counted, set by load_cached()
+        self.result_cache = None
+        self.content_hash = None
+
+    def read_cmap(self, font_data: mmap.mmap) -> FontCmap:
+        """Read the cmap and name of the mapped font file, decoding only those tables when possible."""
+        checked_codepoints = get_checked_codepoints()
+        try:
+            return read_font_cmap(font_data, self.font_id, checked_codepoints)
+        except UnsupportedFont:
+            pass
+
+        # WOFF/WOFF2 and anything exotic go through fontTools, reading lazily
+        # from the mapping instead of copying the whole file into memory
+        font_data.seek(0)
+        try:
+            with stage("ttfont_open"):
+                font = TTFont(
+                    font_data,
+                    0,
+                    allowVID=0,
+                    ignoreDecompileErrors=True,
+                    fontNumber=self.font_id,
+                    lazy=True,
+                )
+        except TTLibError as e:
+            raise ValueError(f"Failed to load font: {e}") from e
+        if "cmap" not in font:
+            raise ValueError("Failed to load font: no cmap table")
+        # not closed: closing the TTFont would close `font_data`, the caller's mapping,
+        # which the other faces of a collection are still read from
+        with stage("cmap"):
+            cmap = font.getBestCmap() or {}
+            cmap = dict(zip(cmap.keys(), font.getGlyphIDMany(list(cmap.values()))))
+        if checked_codepoints is not None:
+            with stage("real_glyphs"):
+                try:
+                    outlines = self.read_fallback_outlines(font)
+                except UnsupportedFont as e:
+                    raise ValueError(f"Failed to load font: {e}") from e
+                cmap = drop_blank_glyphs(
+                    cmap,
+                    outlines,
+                    checked_codepoints.to_bytes(codepoint_bitmap.BITMAP_BYTES, "little"),
+                )
+        with stage("uvs"):
+            uvs = []
+            uvs_table = font["cmap"].getcmap(0, 5)
+            if uvs_table is not None:
+                for vs_unicode, base_tuples in uvs_table.uvsDict.items():
+                    for base_unicode, glyph_name in base_tuples:
+                        uvs.append((base_unicode, vs_unicode))
+        with stage("name"):
+            # like the fast reader, a font without a name table has no name
+            font_name = font["name"].getBestFullName() if "name" in font else None
+        return FontCmap(font_name, cmap, uvs)
+
+    @staticmethod
+    def read_fallback_outlines(font: TTFont) -> GlyphOutlines | Woff2GlyphContours | None:
+        """Locate the glyph outlines of a font opened by fontTools from its raw tables.
+
+        Raises:
+            UnsupportedFont: an outline table is damaged.
+        """
+        reader = font.reader
+        glyf_entry = getattr(reader, "tables", {}).get("glyf")
+        if getattr(glyf_entry, "transformed", False):
+            # rebuilding a WOFF2 transformed glyf decodes every outline, its contour counts are enough
+            return Woff2GlyphContours(glyf_entry.loadData(reader.transformBuffer))
+        return read_glyph_outlines(lambda tag: memoryview(reader[tag]) if tag in reader else None)
+
+    def extract_chars(self):
+        with stage("extract_chars"):
+            # counting only needs the codepoints and bitmap, the character sets are built on demand
+            # and are stored as flat uint32 arrays, 4 bytes per codepoint rather than a str object each
+            cmap = self.font_cmap.cmap
+            self.codepoints = array("I", sorted(cmap.keys()))
+            self.char_bitmap = codepoint_bitmap.from_codepoints(self.codepoints)
+            self.uvs_pairs = array(
+                "I", [code for pair in self.font_cmap.uvs for code in pair]
+            )
+            self.__dict__.pop("char_list", None)
+            self.__dict__.pop("char_uvs_list", None)
+
+    @cached_property
+    def char_list(self) -> set[str]:
+        return set(map(chr, self.codepoints))
+
+    @cached_property
+    def char_uvs_list(self) -> set[str]:
+        return set(
+            chr(base_unicode) + chr(vs_unicode)
+            for base_unicode, vs_unicode in zip(self.uvs_pairs[::2], self.uvs_pairs[1::2])
+        )
+
+    def __getstate__(self):
+        # the character sets are rebuilt on demand, only the compact arrays are sent to other processes
+        state = self.__dict__.copy()
+        state.pop("char_list", None)
+        state.pop("char_uvs_list", None)
+        return state
+
+    def count_cjk_chars(self) -> tuple[dict[str, int], dict[str, int]]:
+        """Count CJK characters in the font.
+
+        Returns:
+            A tuple containing two dictionaries:
+            - [0] cjk_char_count: A dictionary of CJK encoding ID to character count.
+            - [1] unicode_char_count: A dictionary of Unicode block ID to character count.
+        """
+        counts_version = get_counts_version()
+        if self.counts_version == counts_version:
+            return self.cjk_char_count, self.unicode_char_count
+
+        with stage("count"):
+            tables = DisplayCJKTablesList.get_all_tables()
+            index = None
+            if membership_index.is_cheaper(len(self.codepoints), len(tables)):
+                index = membership_index.get_membership_index(build=False)
+            if index is not None:
+                # few codepoints per table: one pass over the font counts every table and block
+                with stage("membership_index"):
+                    self.cjk_char_count, self.unicode_char_count = index.count(self.codepoints)
+            else:
+                self.cjk_char_count = {}
+                for table_id, table in tables.items():
+                    with stage(f"table:{table_id}"):
+                        if isinstance(table, RangeTable):
+                            # a few binary searches beat a full-width bitmap AND
+                            count = table.count_codepoints(self.codepoints)
+                        else:
+                            count = table.count_overlap(self.char_bitmap)
+                        self.cjk_char_count[table_id] = count
+
+                # all blocks are counted in one pass over the merged block segments
+                with stage("unicode_blocks"):
+                    self.unicode_char_count = DisplayUnicodeBlocksList.count_blocks(
+                        self.codepoints
+                    )
+        self.counts_version = counts_version
+        self.store_counts()
+        return self.cjk_char_count, self.unicode_char_count
+
+    def store_counts(self):
+        """Save the current counts to the result cache, if the font was loaded through one."""
+        if self.result_cache is not None:
+            self.result_cache.put(
+                self.content_hash,
+                self.font_id,
+                self.counts_version,
+                self.font_cmap,
+                self.cjk_char_count,
+                self.unicode_char_count,
+            )
+
+    def for_shared_cmap(self, font_id: int, font_cmap: FontCmap) -> Self:
+        """Return the collector of another face of the same file whose cmap is the same table.
+
+        The extracted characters and counts are shared instead of being rebuilt.
+        """
+        font = copy.copy(self)
+        font.font_id = font_id
+        font.font_cmap = font_cmap
+        font.font_name = font_cmap.font_name
+        return font
+    
+    def get_missing_chars(self) -> dict[str, str]:
+        """The characters of every enabled CJK table this font lacks, in codepoint order."""
+        return {
+            table_id: table.get_missing_chars(self.char_bitmap)
+            for table_id, table in DisplayCJKTablesList.get_all_tables().items()
+        }
+
+    def get_diff_chars(self, in_set: set[str]) -> set[str]:
+        return self.char_list.difference(in_set)
+
+    @classmethod
+    def load_cached(
+        cls,
+        font_path: Path,
+        font_id: int,
+        cache: ResultCache,
+        content_hash: str | None = None,
+        font_data: mmap.mmap | None = None,
+    ):
+        """Load a face through `cache`, an unchanged font is restored with its counts without being parsed.
+
+        On a cache miss the font is read as usual and its counts are stored once counted.
+        `content_hash` can be given to hash a collection only once for all its faces.
+        """
+        if content_hash is None:
+            with stage("hash"):
+                content_hash = hash_file(font_path)
+        counts_version = get_counts_version()
+        with stage("cache_lookup"):
+            cached = cache.get(content_hash, font_id, counts_version)
+        if cached is not None:
+            return cls._from_cached(font_path, font_id, cached, counts_version)
+        font = cls(font_path, font_id, font_data=font_data)
+        font.result_cache = cache
+        font.content_hash = content_hash
+        return font
+
+    @classmethod
+    def _from_cached(
+        cls, font_path: Path, font_id: int, cached: CachedResult, counts_version: str
+    ) -> Self:
+        font = cls(font_path, font_id, cached.font_cmap)
+        font.cjk_char_count = cached.cjk_char_count
+        font.unicode_char_count = cached.unicode_char_count
+        font.counts_version = counts_version
+        return font
+
+    @classmethod
+    def load_all_faces(
+        cls, font_path: Path, cache: ResultCache | None = None, count: bool = True
+    ) -> list[Self]:
+        """Load and count every face of a font file (a single font gives one face), opening it once.
+
+        Faces of a collection that share cmap subtables, as most faces of CJK TTCs do,
+        are decoded, extracted and counted once per distinct subtable.
+        With `count=False` the faces are only loaded, and `cache` is not used.
+
+        Raises:
+            ValueError: a face cannot be loaded.
+        """
+        with map_font_file(font_path) as font_data:
+            return cls._load_all_faces(font_path, font_data, cache if count else None, count)
+
+    @classmethod
+    def _load_all_faces(
+        cls, font_path: Path, font_data: mmap.mmap, cache: ResultCache | None, count: bool
+    ) -> list[Self]:
+        counts_version = get_counts_version()
+        content_hash = None
+        if cache is not None:
+            with stage("hash"):
+                content_hash = hash_data(font_data)
+            with stage("cache_lookup"):
+                cached_faces = {
+                    font_id: cache.get(content_hash, font_id, counts_version)
+                    for font_id in read_face_ids(font_data)
+                }
+            if None not in cached_faces.values():
+                return [
+                    cls._from_cached(font_path, font_id, cached, counts_version)
+                    for font_id, cached in cached_faces.items()
+                ]
+
+        try:
+            with stage("read_cmaps"):
+                font_cmaps = read_all_font_cmaps(font_data, get_checked_codepoints())
+        except UnsupportedFont:
+            # WOFF/WOFF2 and exotic fonts go through fontTools, one face at a time
+            font_cmaps = dict.fromkeys(read_face_ids(font_data))
+
+        fonts = []
+        # (id of cmap dict, id of UVS list) -> first face using them
+        shared_fonts = {}
+        for font_id, font_cmap in font_cmaps.items():
+            shared_key = None
+            if font_cmap is not None:
+                shared_key = (id(font_cmap.cmap), id(font_cmap.uvs))
+            if shared_key in shared_fonts:
+                font = shared_fonts[shared_key].for_shared_cmap(font_id, font_cmap)
+                font.content_hash = content_hash
+                font.store_counts()
+            else:
+                font = cls(font_path, font_id, font_cmap, font_data)
+                font.result_cache = cache
+                font.content_hash = content_hash
+                if count:
+                    font.count_cjk_chars()
+                if shared_key is not None:
+                    shared_fonts[shared_key] = font
+            fonts.append(font)
+        return fonts
+
+    @classmethod
+    def load_font(
+        cls,
+        font_path: Path,
+        ttc_method: Callable[[list[str]], int],
+        cache: ResultCache | None = None,
+    ):
+        # the file is mapped once for the collection sniffing, the face list and the cmap
+        with map_font_file(font_path) as font_data:
+            font_id = select_face(font_data, ttc_method)
+            if cache is not None:
+                with stage("hash"):
+                    content_hash = hash_data(font_data)
+                return cls.load_cached(font_path, font_id, cache, content_hash, font_data)
+            return cls(font_path, font_id, font_data=font_data)
@@ -0,0 +1,96 @@
+"""Count the characters of font files in every CJK table and Unicode block.
+
+The counting core of CJK Character Count, usable without the GUI:
+
+    import cjkcount
+
+    result = cjkcount.count_font("SourceHanSans.ttc")
+    print(result.font_name, result.cjk_char_count["gb2312"])
+
+Importing the package is cheap: fontTools, the tables and the block data are
+only loaded by the first count. The submodules give the full API, e.g.
+`cjkcount.FontInfoCollector`, `cjkcount.global_var` for the table and block
+registries, `cjkcount.batch_scan` and `cjkcount.report_writers`.
+"""
+
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .FontInfoCollector import FontInfoCollector
+    from .result_cache import ResultCache
+
+__all__ = ["Result", "count_font", "count_faces"]
+
+
+class Result:
+    def __init__(
+        self,
+        font_path: Path,
+        font_id: int,
+        font_name: str | None,
+        cjk_char_count: dict[str, int],
+        unicode_char_count: dict[str, int],
+    ):
+        """
+        Args:
+            font_id: Font number of the face in a collection, -1 for a single font.
+            cjk_char_count: Character count per CJK table ID.
+            unicode_char_count: Character count per Unicode block ID.
+        """
+        self.font_path = font_path
+        self.font_id = font_id
+        self.font_name = font_name
+        self.cjk_char_count = cjk_char_count
+        self.unicode_char_count = unicode_char_count
+
+    @classmethod
+    def from_collector(cls, font: "FontInfoCollector") -> "Result":
+        cjk_char_count, unicode_char_count = font.count_cjk_chars()
+        return cls(font.font_path, font.font_id, font.font_name, cjk_char_count, unicode_char_count)
+
+    def to_dict(self) -> dict:
+        return {
+            "file": str(self.font_path),
+            "font_id": self.font_id,
+            "font_name": self.font_name,
+            "cjk_char_count": self.cjk_char_count,
+            "unicode_char_count": self.unicode_char_count,
+        }
+
+
+def count_font(
+    font_path: str | Path, font_id: int | None = None, cache: "ResultCache | None" = None
+) -> Result:
+    """Count one face of a font file, through `cache` when given.
+
+    Args:
+        font_id: Font number of the face in a collection (default: the first face).
+
+    Raises:
+        OSError: the file cannot be read.
+        ValueError: the font cannot be loaded.
+    """
+    from .FontInfoCollector import FontInfoCollector, get_font_ids
+
+    font_path = Path(font_path)
+    if font_id is None:
+        font_id = get_font_ids(font_path)[0]
+    if cache is not None:
+        font = FontInfoCollector.load_cached(font_path, font_id, cache)
+    else:
+        font = FontInfoCollector(font_path, font_id)
+    return Result.from_collector(font)
+
+
+def count_faces(font_path: str | Path, cache: "ResultCache | None" = None) -> list[Result]:
+    """Count every face of a font file (a single font gives one face), opening it once.
+
+    Raises:
+        OSError: the file cannot be read.
+        ValueError: a face cannot be loaded.
+    """
+    from .FontInfoCollector import FontInfoCollector
+
+    fonts = FontInfoCollector.load_all_faces(Path(font_path), cache)
+    return [Result.from_collector(font) for font in fonts]
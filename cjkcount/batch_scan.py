@@ -0,0 +1,191 @@
+import os
+import struct
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from fontTools.ttLib import TTLibError
+
+from .FontInfoCollector import FontInfoCollector, get_font_ids
+from .global_var import CountingOptions, DisplayCJKTablesList, DisplayUnicodeBlocksList
+from .membership_index import get_membership_index
+from .result_cache import ResultCache, hash_file
+
+FONT_SUFFIXES = (".ttf", ".otf", ".ttc", ".otc", ".woff", ".woff2")
+# raised by unreadable or damaged font files, anything else is a bug and is not caught
+FONT_ERRORS = (OSError, ValueError, TTLibError, struct.error)
+
+
+def iter_font_files(paths: Iterable[Path]) -> Iterator[Path]:
+    """Yield every font file under the given files/directories, walking directories recursively."""
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for root, dirs, files in os.walk(path):
+                # walk in a stable order so repeated scans produce the same row order
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(FONT_SUFFIXES):
+                        yield Path(root) / name
+        elif path.is_file():
+            yield path
+
+
+def _font_row(font_path: Path, font: FontInfoCollector, include_missing: bool) -> dict:
+    row = {
+        "file": str(font_path),
+        "font_id": font.font_id,
+        "font_name": font.font_name,
+        "error": "",
+        **font.cjk_char_count,
+        **font.unicode_char_count,
+    }
+    if include_missing:
+        row["missing"] = font.get_missing_chars()
+    return row
+
+
+def _error_row(font_path: Path, font_id: int, error: Exception) -> dict:
+    return {
+        "file": str(font_path),
+        "font_id": font_id,
+        "font_name": "",
+        "error": str(error) or type(error).__name__,
+    }
+
+
+def scan_font_file(
+    font_path: Path, cache: ResultCache | None = None, include_missing: bool = False
+) -> list[dict]:
+    """Count every face of a font file, through `cache` when given.
+
+    The file is opened once and faces sharing a cmap are counted once. When that
+    fails, a single font gives an error row, and the faces of a collection are
+    loaded one by one so a damaged face only fails its own row.
+
+    Returns:
+        One result row per font/face. A row contains `file`, `font_id`,
+        `font_name` and `error`, followed by the CJK table and Unicode block counts,
+        and with `include_missing`, `missing`: the missing characters of every table.
+    """
+    try:
+        fonts = FontInfoCollector.load_all_faces(font_path, cache)
+    except FONT_ERRORS as e:
+        error = e
+    else:
+        return [_font_row(font_path, font, include_missing) for font in fonts]
+
+    try:
+        font_ids = get_font_ids(font_path)
+    except OSError:
+        font_ids = [-1]
+    if len(font_ids) == 1:
+        return [_error_row(font_path, font_ids[0], error)]
+
+    content_hash = None
+    if cache is not None:
+        try:
+            content_hash = hash_file(font_path)
+        except OSError as e:
+            return [_error_row(font_path, font_id, e) for font_id in font_ids]
+    rows = []
+    for font_id in font_ids:
+        try:
+            if cache is not None:
+                font = FontInfoCollector.load_cached(font_path, font_id, cache, content_hash)
+            else:
+                font = FontInfoCollector(font_path, font_id)
+            font.count_cjk_chars()
+        except FONT_ERRORS as e:
+            rows.append(_error_row(font_path, font_id, e))
+        else:
+            rows.append(_font_row(font_path, font, include_missing))
+    return rows
+
+
+def scan(
+    paths: Iterable[Path],
+    jobs: int | None = None,
+    table_ids: Iterable[str] | None = None,
+    cache: ResultCache | None = None,
+    include_missing: bool = False,
+    real_glyphs_only: bool = False,
+) -> Iterator[dict]:
+    """Scan fonts in a process pool, yielding result rows as soon as each file is done.
+
+    Rows come out in completion order. At most a few files per worker are in flight,
+    so the directory walk stays lazy even for very large font libraries.
+    `table_ids` restricts counting to those CJK tables, the other tables are never loaded.
+    With a `cache`, unchanged fonts are only hashed instead of parsed and counted.
+    With `include_missing`, rows carry the missing characters of every table.
+    With `real_glyphs_only`, codepoints mapped to blank glyphs are not counted.
+
+    Raises:
+        ValueError: a table ID does not exist.
+    """
+    if table_ids is not None:
+        table_ids = set(table_ids)
+    # validate the table IDs now rather than on the first row
+    init_counting(table_ids, real_glyphs_only)
+    return _scan(
+        iter_font_files(paths),
+        jobs or os.cpu_count() or 1,
+        table_ids,
+        cache,
+        include_missing,
+        real_glyphs_only,
+    )
+
+
+def init_counting(table_ids: set[str] | None, real_glyphs_only: bool):
+    """Set the enabled tables and counting options of this (or a worker) process.
+
+    Raises:
+        ValueError: a table ID does not exist.
+    """
+    DisplayCJKTablesList.restrict_tables(table_ids)
+    CountingOptions.real_glyphs_only = real_glyphs_only
+
+
+def _scan(
+    font_files: Iterator[Path],
+    jobs: int,
+    table_ids: set[str] | None,
+    cache: ResultCache | None,
+    include_missing: bool,
+    real_glyphs_only: bool,
+) -> Iterator[dict]:
+    if jobs == 1:
+        for font_path in font_files:
+            yield from scan_font_file(font_path, cache, include_missing)
+        return
+
+    # write the shared index once, the workers map it instead of each building their own
+    get_membership_index()
+    max_pending = jobs * 4
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_counting,
+        initargs=(table_ids, real_glyphs_only),
+    ) as executor:
+        pending = set()
+        for font_path in font_files:
+            pending.add(executor.submit(scan_font_file, font_path, cache, include_missing))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        for future in as_completed(pending):
+            yield from future.result()
+
+
+def get_fieldnames() -> list[str]:
+    return [
+        "file",
+        "font_id",
+        "font_name",
+        *DisplayCJKTablesList.get_all_tables().keys(),
+        *DisplayUnicodeBlocksList.get_ordered_blocks().keys(),
+        "error",
+    ]
+
@@ -0,0 +1,441 @@
+import argparse
+import sys
+from pathlib import Path
+
+from . import profiling
+
+
+def scan_command(args) -> int:
+    import json
+
+    from . import batch_scan
+    from . import report_writers
+    from .result_cache import DEFAULT_CACHE_PATH, ResultCache
+
+    report_format = args.format or report_writers.guess_format(args.output)
+    if args.missing and report_format == "csv":
+        print("--missing needs the jsonl or html format", file=sys.stderr)
+        return 2
+
+    cache = None if args.no_cache else ResultCache(args.cache or DEFAULT_CACHE_PATH)
+    jobs = args.jobs
+    if args.profile or args.cprofile:
+        # stages are only recorded in this process
+        jobs = 1
+    with profiling.profile_to_files(args.profile, args.cprofile):
+        try:
+            rows = batch_scan.scan(
+                args.paths,
+                jobs=jobs,
+                table_ids=args.tables,
+                cache=cache,
+                include_missing=args.missing,
+                real_glyphs_only=args.real_glyphs_only,
+            )
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        summary = report_writers.ReportSummary() if args.summary else None
+        output, flush_interval = report_writers.open_report(args.output)
+        try:
+            writer = report_writers.make_writer(report_format, output, flush_interval, args.lang)
+            errors = report_writers.write_rows(rows, writer, summary)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+    if summary is not None:
+        with args.summary.open("w", encoding="utf-8") as f:
+            json.dump(summary.to_dict(), f, indent=2)
+    return 1 if errors else 0
+
+
+def watch_command(args) -> int:
+    import json
+
+    from .font_watch import FontWatcher, format_delta
+    from .global_var import DisplayCJKTablesList
+
+    try:
+        DisplayCJKTablesList.restrict_tables(args.tables)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    watcher = FontWatcher(args.paths)
+    count = watcher.start()
+    print(f"Watching {count} fonts, press Ctrl+C to stop.", file=sys.stderr)
+    try:
+        for deltas in watcher.watch(args.interval):
+            for font_path, error in watcher.errors:
+                print(f"{font_path}: {error}", file=sys.stderr)
+            for delta in deltas:
+                if args.json:
+                    print(json.dumps(delta.to_dict(), ensure_ascii=False), flush=True)
+                else:
+                    print(format_delta(delta), flush=True)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def diff_command(args) -> int:
+    import json
+
+    from .font_diff import diff_faces, format_diff, load_coverages
+    from .global_var import DisplayCJKTablesList
+
+    try:
+        DisplayCJKTablesList.restrict_tables(args.tables)
+        coverages = load_coverages(args.fonts)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    if len(coverages) < 2:
+        print("At least two fonts/faces are needed to compare.", file=sys.stderr)
+        return 2
+    diffs = diff_faces(coverages)
+    if args.json:
+        json.dump(
+            [diff.to_dict(args.chars) for diff in diffs], sys.stdout, ensure_ascii=False, indent=2
+        )
+        print()
+    else:
+        print("\n\n".join(format_diff(diff, args.chars) for diff in diffs))
+    return 0
+
+
+def matrix_command(args) -> int:
+    from .coverage_matrix import CoverageMatrix, iter_coverages
+    from .global_var import DisplayCJKTablesList
+
+    try:
+        DisplayCJKTablesList.restrict_tables(args.tables)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    faces = []
+    errors = 0
+    for font_path, file_faces, error in iter_coverages(args.paths, args.jobs):
+        if error:
+            print(f"{font_path}: {error}", file=sys.stderr)
+            errors += 1
+        faces.extend(file_faces)
+    matrix = CoverageMatrix.compute(faces)
+    if args.npy:
+        with args.npy.open("wb") as output:
+            matrix.write_npy(output)
+    if args.output:
+        with args.output.open("w", encoding="utf-8", newline="") as output:
+            matrix.write_csv(output)
+    elif not args.npy:
+        matrix.write_csv(sys.stdout)
+    return 1 if errors else 0
+
+
+def serve_command(args) -> int:
+    from .count_server import CountService, serve
+    from .result_cache import DEFAULT_CACHE_PATH, ResultCache
+
+    cache = None if args.no_cache else ResultCache(args.cache or DEFAULT_CACHE_PATH)
+    try:
+        service = CountService(args.jobs, args.max_requests, args.tables, cache)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    def on_ready(servers):
+        for server in servers:
+            address = server.server_address
+            if isinstance(address, tuple):
+                address = f"http://{address[0]}:{address[1]}"
+            print(f"Serving on {address}, press Ctrl+C to stop.", file=sys.stderr)
+
+    try:
+        serve(
+            service,
+            None if args.no_http else args.host,
+            args.port,
+            args.socket,
+            args.quiet,
+            on_ready,
+        )
+    except KeyboardInterrupt:
+        pass
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+    return 0
+
+
+def client_command(args) -> int:
+    import csv
+    import json
+
+    from . import count_client
+
+    try:
+        fieldnames, rows = count_client.count(
+            [str(path.absolute()) for path in args.paths],
+            args.host,
+            args.port,
+            str(args.socket) if args.socket else None,
+        )
+    except count_client.ServiceError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if args.json:
+        for row in rows:
+            print(json.dumps(row, ensure_ascii=False))
+    else:
+        writer = csv.DictWriter(sys.stdout, fieldnames)
+        if not args.no_header:
+            writer.writeheader()
+        writer.writerows(rows)
+    return 1 if any(row["error"] for row in rows) else 0
+
+
+def add_service_address_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="HTTP address of the service (default: 127.0.0.1)."
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="HTTP port of the service (default: 8765)."
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=None,
+        help="Unix domain socket of the service.",
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="cjkcount",
+        description="Count CJK characters in font files without the GUI.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Recursively scan font files/directories and write one CSV row per font/face.",
+    )
+    scan_parser.add_argument("paths", nargs="+", type=Path)
+    scan_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs, 1 with --profile/--cprofile).",
+    )
+    scan_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the report to this file instead of standard output, gzip-compressed if it ends in .gz.",
+    )
+    scan_parser.add_argument(
+        "-f",
+        "--format",
+        choices=("csv", "jsonl", "html"),
+        default=None,
+        help="Report format: one CSV row, JSON line or HTML section per font/face (default: from the output file name, else csv).",
+    )
+    scan_parser.add_argument(
+        "--missing",
+        action="store_true",
+        help="Add the missing characters of every table to the report (jsonl and html only).",
+    )
+    scan_parser.add_argument(
+        "--lang",
+        choices=("en", "zhs", "zht"),
+        default="en",
+        help="Language of the table and block names in an html report (default: en).",
+    )
+    scan_parser.add_argument(
+        "--summary",
+        type=Path,
+        default=None,
+        help="Also write the number of fonts and errors and the max/mean count of every column to this JSON file.",
+    )
+    scan_parser.add_argument(
+        "-t",
+        "--tables",
+        type=lambda value: value.split(","),
+        default=None,
+        help="Comma-separated CJK table IDs to count, e.g. gb2312,big5 (default: all tables).",
+    )
+    scan_parser.add_argument(
+        "--real-glyphs-only",
+        action="store_true",
+        help="Do not count codepoints mapped to empty glyphs or copies of .notdef.",
+    )
+    scan_parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help="Result cache file (default: font-counts.sqlite in the user cache directory).",
+    )
+    scan_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse and count every font, neither reading nor writing the cache.",
+    )
+    profiling.add_profile_arguments(scan_parser)
+    scan_parser.set_defaults(func=scan_command)
+
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Watch font files/directories and print the characters every rebuild adds or removes.",
+    )
+    watch_parser.add_argument("paths", nargs="+", type=Path)
+    watch_parser.add_argument(
+        "-i",
+        "--interval",
+        type=float,
+        default=1.0,
+        help="Seconds between polls; a file is read once it is unchanged for one interval (default: 1).",
+    )
+    watch_parser.add_argument(
+        "-t",
+        "--tables",
+        type=lambda value: set(value.split(",")),
+        default=None,
+        help="Comma-separated CJK table IDs to report, e.g. gb2312,big5 (default: all tables).",
+    )
+    watch_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print one JSON object per changed font/face instead of text.",
+    )
+    watch_parser.set_defaults(func=watch_command)
+
+    diff_parser = subparsers.add_parser(
+        "diff",
+        help="Compare the characters covered by fonts/faces, per table and per block.",
+    )
+    diff_parser.add_argument(
+        "fonts",
+        nargs="+",
+        help='Font files; "font.ttc#1" selects one face of a collection, "font.ttc" compares all its faces.',
+    )
+    diff_parser.add_argument(
+        "-t",
+        "--tables",
+        type=lambda value: set(value.split(",")),
+        default=None,
+        help="Comma-separated CJK table IDs to compare, e.g. gb2312,big5 (default: all tables).",
+    )
+    diff_parser.add_argument(
+        "--chars",
+        action="store_true",
+        help="Also list the characters only one font covers.",
+    )
+    diff_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the differences of every pair of fonts as JSON.",
+    )
+    diff_parser.set_defaults(func=diff_command)
+
+    matrix_parser = subparsers.add_parser(
+        "matrix",
+        help="Count every font/face against every table and block as one fonts × columns matrix.",
+    )
+    matrix_parser.add_argument("paths", nargs="+", type=Path)
+    matrix_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes reading fonts (default: number of CPUs).",
+    )
+    matrix_parser.add_argument(
+        "-t",
+        "--tables",
+        type=lambda value: set(value.split(",")),
+        default=None,
+        help="Comma-separated CJK table IDs to count, e.g. gb2312,big5 (default: all tables).",
+    )
+    matrix_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default=None,
+        help="Write the matrix as CSV to this file (default: standard output unless --npy is given).",
+    )
+    matrix_parser.add_argument(
+        "--npy",
+        type=Path,
+        default=None,
+        help="Write the counts as a NumPy .npy uint32 array of shape (faces, columns).",
+    )
+    matrix_parser.set_defaults(func=matrix_command)
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="Run a counting service keeping the tables loaded, for `cjkcount client`.",
+    )
+    add_service_address_arguments(serve_parser)
+    serve_parser.add_argument(
+        "--no-http",
+        action="store_true",
+        help="Only listen on --socket.",
+    )
+    serve_parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: number of CPUs).",
+    )
+    serve_parser.add_argument(
+        "--max-requests",
+        type=int,
+        default=None,
+        help="Requests served at once, further requests get HTTP 503 (default: twice --jobs).",
+    )
+    serve_parser.add_argument(
+        "-t",
+        "--tables",
+        type=lambda value: set(value.split(",")),
+        default=None,
+        help="Comma-separated CJK table IDs to count, e.g. gb2312,big5 (default: all tables).",
+    )
+    serve_parser.add_argument(
+        "--cache",
+        type=Path,
+        default=None,
+        help="Result cache file (default: font-counts.sqlite in the user cache directory).",
+    )
+    serve_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always parse and count every font, neither reading nor writing the cache.",
+    )
+    serve_parser.add_argument("-q", "--quiet", action="store_true", help="Do not log requests.")
+    serve_parser.set_defaults(func=serve_command)
+
+    client_parser = subparsers.add_parser(
+        "client",
+        help="Count fonts through a running `cjkcount serve`, writing the same CSV as scan.",
+    )
+    client_parser.add_argument("paths", nargs="+", type=Path)
+    add_service_address_arguments(client_parser)
+    client_parser.add_argument(
+        "--no-header",
+        action="store_true",
+        help="Leave out the CSV header, e.g. to append the rows of many calls to one file.",
+    )
+    client_parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print one JSON object per font/face instead of CSV.",
+    )
+    client_parser.set_defaults(func=client_command)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,637 @@
+"""Fast font reader that only decodes the `cmap` and `name` tables.
+
+Only the sfnt table directory, the `cmap` table and the `name` table are read
+from the file; layout tables and the glyph order are never touched, nor are
+outlines unless blank glyphs are dropped (see below).
+Anything this reader does not handle (WOFF/WOFF2, unusual cmap formats, damaged
+tables) raises `UnsupportedFont` so callers can fall back to fontTools.
+
+To count only codepoints mapped to glyphs that draw something, the reader can
+drop mappings to blank glyphs (`GlyphOutlines`), telling them apart by the
+size of their `loca` entry or CFF charstring alone: no outline is decoded, and
+only the glyphs of the codepoints that are counted are looked at.
+
+The reader works on a buffer, normally the memory-mapped font file from
+`map_font_file()`, and decodes zero-copy `memoryview` slices of it, so only the
+pages actually holding the directory and the cmap are ever read from disk.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from fontTools.ttLib.tables._n_a_m_e import table__n_a_m_e
+
+from .codepoint_bitmap import BITMAP_BYTES, MAX_CODEPOINT
+from .profiling import stage
+
+# same order as fontTools' getBestCmap() (and HarfBuzz)
+CMAP_PREFERENCES = ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 2), (0, 1), (0, 0))
+UVS_CMAP = (0, 5)
+
+SFNT_VERSIONS = (b"\x00\x01\x00\x00", b"OTTO", b"true")
+# tables locating the glyph outlines
+OUTLINE_TAGS = ("head", "loca", "glyf", "CFF ", "CFF2")
+# CFF DICT operator of the CharStrings offset
+CHARSTRINGS_OPERATOR = 17
+# Type 2 charstring operator ending a glyph
+ENDCHAR_OPERATOR = 14
+# longest blank glyph data: a glyf header without contours (4-byte aligned), a width and endchar
+MAX_BLANK_GLYF = 12
+MAX_BLANK_CHARSTRING = 6
+
+
+class UnsupportedFont(Exception):
+    """The font needs the full fontTools reader."""
+
+
+class FontCmap:
+    def __init__(self, font_name: str | None, cmap: dict[int, int], uvs: list[tuple[int, int]]):
+        """
+        Args:
+            font_name: Best full name, as fontTools' `getBestFullName()`.
+            cmap: Codepoint to glyph ID of the best Unicode cmap subtable, unmapped (.notdef) codes removed.
+            uvs: (base codepoint, variation selector) pairs of the format 14 subtable.
+        """
+        self.font_name = font_name
+        self.cmap = cmap
+        self.uvs = uvs
+
+
+@contextmanager
+def map_font_file(font_path: Path) -> Iterator[mmap.mmap]:
+    """Memory-map a font file read-only for the duration of the `with` block.
+
+    The mapping is also a seekable file object, so fontTools can read from it too.
+
+    Raises:
+        ValueError: the file is empty.
+    """
+    with open(font_path, "rb") as f:
+        try:
+            font_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError as e:
+            # only an empty file cannot be mapped
+            raise ValueError(f"Failed to load font: empty file {font_path}") from e
+    try:
+        yield font_data
+    finally:
+        try:
+            font_data.close()
+        except BufferError:
+            # a traceback still holds a view of the mapping, it is unmapped once that is freed
+            pass
+
+
+def _read(data: memoryview, offset: int, length: int) -> memoryview:
+    if offset + length > len(data):
+        raise UnsupportedFont("Truncated font file")
+    return data[offset : offset + length]
+
+
+def _uint16_array(data: memoryview) -> array:
+    values = array("H")
+    values.frombytes(data[: len(data) // 2 * 2])
+    if sys.byteorder != "big":
+        values.byteswap()
+    return values
+
+
+def _uint32_array(data: memoryview) -> array:
+    values = array("I")
+    values.frombytes(data[: len(data) // 4 * 4])
+    if sys.byteorder != "big":
+        values.byteswap()
+    return values
+
+
+def read_font_ids(data) -> list[int]:
+    """Return the font number of every face in a font file buffer, [-1] for a single font.
+
+    Raises:
+        UnsupportedFont: the collection header is truncated or points past the end of the file.
+    """
+    if len(data) >= 12 and data[:4] == b"ttcf":
+        (num_fonts,) = struct.unpack_from(">L", data, 8)
+        if 12 + 4 * num_fonts > len(data):
+            raise UnsupportedFont(f"Truncated collection header: {num_fonts} fonts")
+        offsets = struct.unpack_from(f">{num_fonts}L", data, 12)
+        # every face needs at least its 12-byte table directory header
+        if any(offset + 12 > len(data) for offset in offsets):
+            raise UnsupportedFont("Collection font offset past the end of the file")
+        return list(range(num_fonts))
+    return [-1]
+
+
+def read_font_offset(data: memoryview, font_id: int) -> int:
+    """Return the offset of the table directory of face `font_id` (-1 for a single font)."""
+    tag = bytes(_read(data, 0, 4))
+    if tag != b"ttcf":
+        if tag not in SFNT_VERSIONS:
+            raise UnsupportedFont(f"Unsupported sfnt version: {tag!r}")
+        return 0
+    (num_fonts,) = struct.unpack(">L", _read(data, 8, 4))
+    if not 0 <= font_id < num_fonts:
+        raise UnsupportedFont(f"Font number {font_id} not in collection")
+    (offset,) = struct.unpack(">L", _read(data, 12 + font_id * 4, 4))
+    return offset
+
+
+def read_table_directory(data: memoryview, font_offset: int) -> dict[str, tuple[int, int]]:
+    """Return table tag to (offset, length) for the face at `font_offset`."""
+    sfnt_version, num_tables = struct.unpack(">4sH", _read(data, font_offset, 6))
+    if sfnt_version not in SFNT_VERSIONS:
+        raise UnsupportedFont(f"Unsupported sfnt version: {sfnt_version!r}")
+    directory = _read(data, font_offset + 12, num_tables * 16)
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack_from(">4sLLL", directory, i * 16)
+        tables[tag.decode("latin-1")] = (offset, length)
+    return tables
+
+
+def find_subtable(cmap_data: memoryview, preferences) -> int | None:
+    """Return the offset in `cmap_data` of the first subtable matching `preferences`."""
+    _, num_subtables = struct.unpack_from(">HH", cmap_data)
+    records = {}
+    for i in range(num_subtables):
+        platform_id, encoding_id, offset = struct.unpack_from(">HHL", cmap_data, 4 + i * 8)
+        (format,) = struct.unpack_from(">H", cmap_data, offset)
+        if format in (8, 10, 12, 13):
+            (length,) = struct.unpack_from(">L", cmap_data, offset + 4)
+        elif format == 14:
+            (length,) = struct.unpack_from(">L", cmap_data, offset + 2)
+        else:
+            (length,) = struct.unpack_from(">H", cmap_data, offset + 2)
+        # fontTools skips zero-length subtables
+        if length:
+            records.setdefault((platform_id, encoding_id), offset)
+    for key in preferences:
+        if key in records:
+            return records[key]
+    return None
+
+
+def decode_subtable(cmap_data: memoryview, offset: int) -> dict[int, int]:
+    """Decode a format 0/4/6/12/13 subtable to codepoint to glyph ID, dropping glyph 0."""
+    (format,) = struct.unpack_from(">H", cmap_data, offset)
+    code_to_gid = {}
+    if format == 0:
+        gids = cmap_data[offset + 6 : offset + 262]
+        code_to_gid = {code: gid for code, gid in enumerate(gids)}
+    elif format == 4:
+        length, _, seg_count_x2 = struct.unpack_from(">HHH", cmap_data, offset + 2)
+        seg_count = seg_count_x2 // 2
+        words = _uint16_array(cmap_data[offset + 14 : offset + length])
+        end_codes = words[:seg_count]
+        start_codes = words[seg_count + 1 : seg_count * 2 + 1]  # +1 skips reservedPad
+        id_deltas = words[seg_count * 2 + 1 : seg_count * 3 + 1]
+        id_range_offsets = words[seg_count * 3 + 1 : seg_count * 4 + 1]
+        glyph_ids = words[seg_count * 4 + 1 :]
+        # the final 0xFFFF segment is skipped, as fontTools does
+        for i in range(seg_count - 1):
+            start, end = start_codes[i], end_codes[i]
+            delta = id_deltas[i]
+            range_offset = id_range_offsets[i]
+            if range_offset == 0:
+                for code in range(start, end + 1):
+                    # a missing glyph does not erase an earlier mapping
+                    if (code + delta) & 0xFFFF:
+                        code_to_gid[code] = (code + delta) & 0xFFFF
+            else:
+                partial = range_offset // 2 - start + i - seg_count
+                for code in range(start, end + 1):
+                    index = code + partial
+                    if not 0 <= index < len(glyph_ids):
+                        raise UnsupportedFont("cmap format 4 glyph index out of range")
+                    gid = glyph_ids[index]
+                    if gid:
+                        code_to_gid[code] = (gid + delta) & 0xFFFF
+    elif format == 6:
+        first_code, entry_count = struct.unpack_from(">HH", cmap_data, offset + 6)
+        gids = _uint16_array(cmap_data[offset + 10 : offset + 10 + entry_count * 2])
+        code_to_gid = dict(zip(range(first_code, first_code + len(gids)), gids))
+    elif format in (12, 13):
+        length, _, num_groups = struct.unpack_from(">LLL", cmap_data, offset + 4)
+        if length != 16 + num_groups * 12:
+            raise UnsupportedFont(f"Inconsistent cmap format {format} group count")
+        groups = _uint32_array(cmap_data[offset + 16 : offset + length])
+        step = 1 if format == 12 else 0
+        last_end = 0
+        for start, end, gid in zip(*[iter(groups)] * 3):
+            end = min(end, 0x10FFFF)
+            # skip inverted or unsorted groups like fontTools/HarfBuzz
+            if start > end or start < last_end:
+                continue
+            last_end = end
+            if step:
+                code_to_gid.update(zip(range(start, end + 1), range(gid, gid + end - start + 1)))
+            else:
+                code_to_gid.update(dict.fromkeys(range(start, end + 1), gid))
+    else:
+        raise UnsupportedFont(f"Unsupported cmap subtable format {format}")
+    return {code: gid for code, gid in code_to_gid.items() if gid}
+
+
+def decode_uvs_subtable(cmap_data: memoryview, offset: int) -> list[tuple[int, int]]:
+    """Decode a format 14 subtable to (base codepoint, variation selector) pairs."""
+    (format,) = struct.unpack_from(">H", cmap_data, offset)
+    if format != 14:
+        return []
+    (num_records,) = struct.unpack_from(">L", cmap_data, offset + 6)
+    pairs = []
+    for i in range(num_records):
+        selector_hi, selector_lo, default_offset, non_default_offset = struct.unpack_from(
+            ">BHLL", cmap_data, offset + 10 + i * 11
+        )
+        selector = selector_hi << 16 | selector_lo
+        if default_offset:
+            position = offset + default_offset
+            (num_ranges,) = struct.unpack_from(">L", cmap_data, position)
+            for j in range(num_ranges):
+                base_hi, base_lo, additional_count = struct.unpack_from(
+                    ">BHB", cmap_data, position + 4 + j * 4
+                )
+                base = base_hi << 16 | base_lo
+                pairs.extend(
+                    (code, selector) for code in range(base, base + additional_count + 1)
+                )
+        if non_default_offset:
+            position = offset + non_default_offset
+            (num_mappings,) = struct.unpack_from(">L", cmap_data, position)
+            for j in range(num_mappings):
+                base_hi, base_lo, _ = struct.unpack_from(">BHH", cmap_data, position + 4 + j * 5)
+                pairs.append((base_hi << 16 | base_lo, selector))
+    return pairs
+
+
+def _is_blank_glyf(glyph: memoryview) -> bool:
+    """Whether TrueType glyph data has no contours (nor components)."""
+    # numberOfContours 0, or too short for any outline
+    return len(glyph) < 10 or glyph[0] == glyph[1] == 0
+
+
+def _is_blank_charstring(charstring: memoryview) -> bool:
+    """Whether a Type 2 charstring at most sets the advance width: one optional number, then endchar."""
+    if not charstring:
+        # CFF2 charstrings have no endchar
+        return True
+    if charstring[-1] != ENDCHAR_OPERATOR:
+        return False
+    width = charstring[:-1]
+    if not width:
+        return True
+    b0 = width[0]
+    if 32 <= b0 <= 246:
+        width_length = 1
+    elif 247 <= b0 <= 254:
+        width_length = 2
+    elif b0 == 28:
+        width_length = 3
+    elif b0 == 255:
+        width_length = 5
+    else:
+        return False
+    return len(width) == width_length
+
+
+class GlyphOutlines:
+    def __init__(
+        self,
+        data: memoryview,
+        offsets: array,
+        base: int,
+        scale: int,
+        is_blank_data: Callable[[memoryview], bool],
+        max_blank_length: int,
+    ):
+        """The outline data of every glyph of a face, to tell blank glyphs without decoding them.
+
+        A glyph is blank when its data is empty or draws nothing, or when it is the same
+        data as the .notdef glyph, which placeholder glyphs usually copy.
+
+        Args:
+            data: The table holding the outline data.
+            offsets: Glyph count + 1 offsets, glyph n is data[base + offsets[n] * scale:base + offsets[n + 1] * scale].
+            is_blank_data: Whether non-empty outline data of one glyph draws nothing.
+            max_blank_length: Longest data `is_blank_data` can find blank, longer glyphs are not looked at.
+        """
+        self.data = data
+        self.offsets = offsets
+        self.base = base
+        self.scale = scale
+        self.is_blank_data = is_blank_data
+        self.max_blank_length = max_blank_length
+        self.notdef = self.get_glyph_data(0)
+
+    def get_glyph_data(self, glyph_id: int) -> memoryview:
+        if glyph_id + 1 >= len(self.offsets):
+            return self.data[:0]
+        start = self.base + self.offsets[glyph_id] * self.scale
+        end = self.base + self.offsets[glyph_id + 1] * self.scale
+        return self.data[start:end]
+
+    def find_blank_glyphs(self, glyph_ids: Iterable[int]) -> set[int]:
+        """Return the blank glyphs among `glyph_ids`.
+
+        Most glyphs are told apart by their length alone, only the data of glyphs short
+        enough to be blank or as long as .notdef is looked at.
+        """
+        offsets = self.offsets
+        glyph_count = len(offsets) - 1
+        scale = self.scale
+        notdef_length = len(self.notdef)
+        blank_glyphs = set()
+        for glyph_id in glyph_ids:
+            if glyph_id >= glyph_count:
+                blank_glyphs.add(glyph_id)
+                continue
+            length = (offsets[glyph_id + 1] - offsets[glyph_id]) * scale
+            if length <= self.max_blank_length or length == notdef_length:
+                glyph = self.get_glyph_data(glyph_id)
+                if not glyph or self.is_blank_data(glyph) or glyph == self.notdef:
+                    blank_glyphs.add(glyph_id)
+        return blank_glyphs
+
+
+class Woff2GlyphContours:
+    def __init__(self, transformed_glyf: bytes):
+        """The contour count of every glyph of a WOFF2 transformed `glyf` table, read without rebuilding `glyf`.
+
+        Glyphs without contours or components are blank. Unlike `GlyphOutlines`,
+        copies of .notdef cannot be told from their contour count.
+
+        Raises:
+            UnsupportedFont: the table is truncated.
+        """
+        data = memoryview(transformed_glyf)
+        # reserved, optionFlags, numGlyphs, indexFormat, then 7 stream sizes
+        (glyph_count,) = struct.unpack_from(">H", _read(data, 4, 2))
+        # nContourStream follows the 36-byte header, one int16 per glyph
+        self.contour_counts = _uint16_array(_read(data, 36, glyph_count * 2))
+
+    def find_blank_glyphs(self, glyph_ids: Iterable[int]) -> set[int]:
+        """Return the blank glyphs among `glyph_ids`."""
+        contour_counts = self.contour_counts
+        glyph_count = len(contour_counts)
+        return {
+            glyph_id
+            for glyph_id in glyph_ids
+            if glyph_id >= glyph_count or contour_counts[glyph_id] == 0
+        }
+
+
+def _read_index(data: memoryview, offset: int, count_size: int) -> tuple[array, int]:
+    """Decode the offsets of a CFF INDEX (`count_size` 2) or CFF2 INDEX (`count_size` 4).
+
+    Returns:
+        The count + 1 offsets, and the position the offsets are relative to:
+        item n is data[base + offsets[n]:base + offsets[n + 1]], and the INDEX ends at base + offsets[-1].
+    """
+    (count,) = struct.unpack(">H" if count_size == 2 else ">L", _read(data, offset, count_size))
+    if count == 0:
+        return array("I", [0]), offset + count_size
+    offset_size = data[offset + count_size]
+    if not 1 <= offset_size <= 4:
+        raise UnsupportedFont(f"Invalid CFF offset size: {offset_size}")
+    offsets_start = offset + count_size + 1
+    raw_offsets = bytes(_read(data, offsets_start, (count + 1) * offset_size))
+    # widen the big-endian offsets to uint32, large CJK fonts use 3-byte offsets
+    widened = bytearray(4 * (count + 1))
+    for i in range(offset_size):
+        widened[4 - offset_size + i :: 4] = raw_offsets[i::offset_size]
+    offsets = _uint32_array(memoryview(widened))
+    # offsets are 1-based from the byte before the first item
+    return offsets, offsets_start + len(raw_offsets) - 1
+
+
+def _find_dict_operands(dict_data: memoryview, operator: int) -> list[int]:
+    """Return the integer operands of `operator` in a CFF/CFF2 DICT.
+
+    Raises:
+        UnsupportedFont: the operator is missing.
+    """
+    operands = []
+    position = 0
+    while position < len(dict_data):
+        b0 = dict_data[position]
+        if b0 <= 21:
+            if b0 == 12:
+                found = 1200 + dict_data[position + 1]
+                position += 2
+            else:
+                found = b0
+                position += 1
+            if found == operator:
+                return operands
+            operands = []
+        elif b0 == 28:
+            operands.append(struct.unpack_from(">h", dict_data, position + 1)[0])
+            position += 3
+        elif b0 == 29:
+            operands.append(struct.unpack_from(">l", dict_data, position + 1)[0])
+            position += 5
+        elif b0 == 30:
+            # real number, packed nibbles up to an 0xF nibble; never an offset
+            position += 1
+            while dict_data[position] >> 4 != 0xF and dict_data[position] & 0xF != 0xF:
+                position += 1
+            position += 1
+            operands.append(0)
+        elif 32 <= b0 <= 246:
+            operands.append(b0 - 139)
+            position += 1
+        elif 247 <= b0 <= 250:
+            operands.append((b0 - 247) * 256 + dict_data[position + 1] + 108)
+            position += 2
+        elif 251 <= b0 <= 254:
+            operands.append(-(b0 - 251) * 256 - dict_data[position + 1] - 108)
+            position += 2
+        else:
+            raise UnsupportedFont(f"Invalid CFF DICT byte: {b0}")
+    raise UnsupportedFont(f"CFF DICT operator {operator} not found")
+
+
+def read_glyph_outlines(read_table: Callable[[str], memoryview | None]) -> GlyphOutlines | None:
+    """Locate the outline data of every glyph in the `loca`/`glyf`, `CFF ` or `CFF2` table.
+
+    Only the `loca` offsets or the CharStrings INDEX offsets are decoded.
+
+    Args:
+        read_table: Return the raw data of a table, None when the font lacks it.
+
+    Returns:
+        None for a font without outlines, such as a bitmap-only font, whose glyphs cannot be checked.
+
+    Raises:
+        UnsupportedFont: an outline table is damaged.
+    """
+    try:
+        loca = read_table("loca")
+        if loca is not None:
+            head = read_table("head")
+            glyf = read_table("glyf")
+            if head is None or glyf is None:
+                raise UnsupportedFont("loca table without head or glyf")
+            (index_to_loc_format,) = struct.unpack_from(">h", head, 50)
+            if index_to_loc_format == 0:
+                # short offsets are stored halved
+                return GlyphOutlines(glyf, _uint16_array(loca), 0, 2, _is_blank_glyf, MAX_BLANK_GLYF)
+            return GlyphOutlines(glyf, _uint32_array(loca), 0, 1, _is_blank_glyf, MAX_BLANK_GLYF)
+
+        cff = read_table("CFF ")
+        if cff is not None:
+            header_size = cff[2]
+            name_offsets, name_base = _read_index(cff, header_size, 2)
+            top_offsets, top_base = _read_index(cff, name_base + name_offsets[-1], 2)
+            if len(top_offsets) < 2:
+                raise UnsupportedFont("CFF table without a Top DICT")
+            top_dict = cff[top_base + top_offsets[0] : top_base + top_offsets[1]]
+            (charstrings_offset,) = _find_dict_operands(top_dict, CHARSTRINGS_OPERATOR)[-1:]
+            offsets, base = _read_index(cff, charstrings_offset, 2)
+            return GlyphOutlines(cff, offsets, base, 1, _is_blank_charstring, MAX_BLANK_CHARSTRING)
+
+        cff2 = read_table("CFF2")
+        if cff2 is not None:
+            header_size = cff2[2]
+            (top_dict_length,) = struct.unpack_from(">H", cff2, 3)
+            top_dict = _read(cff2, header_size, top_dict_length)
+            (charstrings_offset,) = _find_dict_operands(top_dict, CHARSTRINGS_OPERATOR)[-1:]
+            offsets, base = _read_index(cff2, charstrings_offset, 4)
+            return GlyphOutlines(cff2, offsets, base, 1, _is_blank_charstring, MAX_BLANK_CHARSTRING)
+    except (struct.error, IndexError, ValueError) as e:
+        raise UnsupportedFont(f"Damaged outline table: {e}") from e
+    return None
+
+
+def drop_blank_glyphs(
+    cmap: dict[int, int],
+    outlines: GlyphOutlines | Woff2GlyphContours | None,
+    checked_codepoints: bytes,
+) -> dict[int, int]:
+    """Remove the mappings of the codepoints in `checked_codepoints` to blank glyphs.
+
+    Args:
+        checked_codepoints: A codepoint bitmap as little-endian bytes, see `codepoint_bitmap`.
+
+    Returns:
+        `cmap` itself when no mapping is removed, or when `outlines` is None.
+    """
+    if outlines is None:
+        return cmap
+    checked = {
+        codepoint: glyph_id
+        for codepoint, glyph_id in cmap.items()
+        if codepoint <= MAX_CODEPOINT and checked_codepoints[codepoint >> 3] >> (codepoint & 7) & 1
+    }
+    blank_glyphs = outlines.find_blank_glyphs(set(checked.values()))
+    if not blank_glyphs:
+        return cmap
+    return {
+        codepoint: glyph_id
+        for codepoint, glyph_id in cmap.items()
+        if glyph_id not in blank_glyphs or codepoint not in checked
+    }
+
+
+def _read_face(
+    data: memoryview, font_id: int, decoded: dict, checked_codepoints: bytes | None
+) -> FontCmap:
+    """Read one face, reusing the tables and subtables in `decoded` (keyed by absolute file offset)."""
+    try:
+        with stage("table_directory"):
+            tables = read_table_directory(data, read_font_offset(data, font_id))
+        if "cmap" not in tables:
+            raise UnsupportedFont("No cmap table")
+        cmap_offset, cmap_length = tables["cmap"]
+        cmap_key = ("cmap", cmap_offset, cmap_length)
+        if cmap_key not in decoded:
+            decoded[cmap_key] = _read(data, cmap_offset, cmap_length)
+        cmap_data = decoded[cmap_key]
+
+        # a missing subtable is keyed by None, so faces lacking it still share one object
+        subtable_offset = find_subtable(cmap_data, CMAP_PREFERENCES)
+        subtable_key = ("subtable", subtable_offset and cmap_offset + subtable_offset)
+        if subtable_key not in decoded:
+            with stage("cmap"):
+                decoded[subtable_key] = (
+                    {} if subtable_offset is None else decode_subtable(cmap_data, subtable_offset)
+                )
+        cmap = decoded[subtable_key]
+        uvs_offset = find_subtable(cmap_data, (UVS_CMAP,))
+        uvs_key = ("uvs", uvs_offset and cmap_offset + uvs_offset)
+        if uvs_key not in decoded:
+            with stage("uvs"):
+                decoded[uvs_key] = (
+                    [] if uvs_offset is None else decode_uvs_subtable(cmap_data, uvs_offset)
+                )
+        uvs = decoded[uvs_key]
+
+        if checked_codepoints is not None:
+            outlines_key = ("outlines", *(tables.get(tag) for tag in OUTLINE_TAGS))
+            if outlines_key not in decoded:
+                with stage("outlines"):
+                    decoded[outlines_key] = read_glyph_outlines(
+                        lambda tag: _read(data, *tables[tag]) if tag in tables else None
+                    )
+            real_glyphs_key = ("real_glyphs", subtable_key, outlines_key)
+            if real_glyphs_key not in decoded:
+                with stage("real_glyphs"):
+                    decoded[real_glyphs_key] = drop_blank_glyphs(
+                        cmap, decoded[outlines_key], checked_codepoints
+                    )
+            cmap = decoded[real_glyphs_key]
+
+        font_name = None
+        if "name" in tables:
+            with stage("name"):
+                name_table = table__n_a_m_e()
+                name_table.decompile(bytes(_read(data, *tables["name"])), None)
+                font_name = name_table.getBestFullName()
+    except (struct.error, IndexError, ValueError) as e:
+        raise UnsupportedFont(f"Damaged font: {e}") from e
+    return FontCmap(font_name, cmap, uvs)
+
+
+def _bitmap_bytes(bitmap: int | None) -> bytes | None:
+    return None if bitmap is None else bitmap.to_bytes(BITMAP_BYTES, "little")
+
+
+def read_font_cmap(data, font_id: int = -1, checked_codepoints: int | None = None) -> FontCmap:
+    """Read the best Unicode cmap, UVS pairs and full name of one face of an sfnt font buffer.
+
+    Args:
+        checked_codepoints: Bitmap of the codepoints whose mappings to blank glyphs are
+            dropped, None to keep every mapping.
+
+    Raises:
+        UnsupportedFont: the font needs the full fontTools reader.
+    """
+    return _read_face(memoryview(data), font_id, {}, _bitmap_bytes(checked_codepoints))
+
+
+def read_all_font_cmaps(data, checked_codepoints: int | None = None) -> dict[int, FontCmap]:
+    """Read every face of an sfnt font or collection, keyed by font number (-1 for a single font).
+
+    Each distinct cmap subtable is decoded once: faces whose best subtable (or UVS
+    subtable) sits at the same file offset share the same `cmap` dict (or `uvs` list)
+    object, so callers can also count shared cmaps once by identity.
+
+    Args:
+        checked_codepoints: As in `read_font_cmap()`. Faces sharing their subtable and
+            their outlines also share the cmap left after dropping blank glyphs.
+
+    Raises:
+        UnsupportedFont: the font needs the full fontTools reader.
+    """
+    data = memoryview(data)
+    decoded = {}
+    checked_codepoints = _bitmap_bytes(checked_codepoints)
+    return {
+        font_id: _read_face(data, font_id, decoded, checked_codepoints)
+        for font_id in read_font_ids(data)
+    }
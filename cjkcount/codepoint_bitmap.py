@@ -0,0 +1,48 @@
+"""Codepoint sets over U+0000..U+10FFFF stored as Python int bitmaps (bit n = codepoint n).
+
+Overlaps are `a & b` and sizes are `int.bit_count()`, both done in C regardless of set size.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+MAX_CODEPOINT = 0x10FFFF
+BITMAP_BYTES = (MAX_CODEPOINT + 1) // 8
+
+_NONZERO_BYTE = re.compile(rb"[^\x00]")
+
+
+def from_codepoints(codepoints: Iterable[int]) -> int:
+    buffer = bytearray(BITMAP_BYTES)
+    for codepoint in codepoints:
+        buffer[codepoint >> 3] |= 1 << (codepoint & 7)
+    return int.from_bytes(buffer, "little")
+
+
+def from_chars(chars: Iterable[str]) -> int:
+    return from_codepoints(map(ord, chars))
+
+
+def from_ranges(ranges: Iterable[tuple[int, int]]) -> int:
+    """Build a bitmap from inclusive (start, end) codepoint ranges."""
+    bitmap = 0
+    for start, end in ranges:
+        bitmap |= ((1 << (end - start + 1)) - 1) << start
+    return bitmap
+
+
+def iter_codepoints(bitmap: int) -> Iterator[int]:
+    """Yield the codepoints set in `bitmap` in ascending order."""
+    data = bitmap.to_bytes(BITMAP_BYTES, "little")
+    # let the regex engine skip the empty bytes, sparse bitmaps are the common case
+    for match in _NONZERO_BYTE.finditer(data):
+        index = match.start()
+        byte = data[index]
+        for bit in range(8):
+            if byte >> bit & 1:
+                yield index << 3 | bit
+
+
+def to_string(bitmap: int) -> str:
+    """The characters set in `bitmap` in codepoint order, built only when they are shown or copied."""
+    return "".join(map(chr, iter_codepoints(bitmap)))
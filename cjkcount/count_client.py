@@ -0,0 +1,68 @@
+"""Thin client of the counting service started by `cjkcount serve`.
+
+Only the standard library is imported, so a call costs little more than the
+Python startup and one request: the tables stay loaded in the server.
+"""
+
+import http.client
+import json
+import socket
+
+
+class ServiceError(Exception):
+    """The service could not be reached or refused the request."""
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def count(
+    paths: list[str],
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: str | None = None,
+    timeout: float = 600,
+) -> tuple[list[str], list[dict]]:
+    """Ask the service to count the fonts under `paths`, over `socket_path` when given, else `host`:`port`.
+
+    Paths are sent as given, relative paths should be made absolute unless the server
+    runs in the same directory.
+
+    Returns:
+        The CSV field names and the result rows, as `cjkcount scan` writes them.
+
+    Raises:
+        ServiceError: the service is not running, busy, or failed.
+    """
+    if socket_path is not None:
+        connection = _UnixHTTPConnection(socket_path, timeout)
+    else:
+        connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request(
+            "POST",
+            "/count",
+            body=json.dumps({"paths": paths}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        response = connection.getresponse()
+        body = response.read()
+    except OSError as e:
+        raise ServiceError(f"Cannot reach the counting service: {e}") from e
+    finally:
+        connection.close()
+    try:
+        result = json.loads(body)
+    except ValueError as e:
+        raise ServiceError(f"Invalid response from the counting service: {e}") from e
+    if response.status != 200:
+        raise ServiceError(result.get("error") or f"HTTP {response.status}")
+    return result["fieldnames"], result["rows"]
@@ -0,0 +1,243 @@
+"""Resident counting service keeping the tables and block registry loaded.
+
+The server answers on a local HTTP port and/or a Unix domain socket:
+
+- `GET /health`: `{"status": "ok"}`
+- `POST /count` with `{"paths": ["font.otf", "fonts/"]}`: counts every font
+  under the paths (read by the server, so they must be local to it) and answers
+  `{"fieldnames": [...], "rows": [...]}`, the rows being those of `cjkcount scan`.
+
+Counting runs in a fixed pool of worker processes whose tables are loaded when
+the pool starts. At most `max_requests` requests are served at once; any more
+are refused at once with 503 rather than queued without bound.
+"""
+
+import errno
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Iterable
+
+from .batch_scan import get_fieldnames, iter_font_files, scan_font_file
+from .global_var import DisplayCJKTablesList, DisplayUnicodeBlocksList
+from .membership_index import get_membership_index
+from .result_cache import ResultCache
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# largest accepted request body
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+def warm_up(table_ids: set[str] | None = None):
+    """Load the enabled tables, their bitmaps, the block registry and the membership index now rather than on the first count."""
+    DisplayCJKTablesList.restrict_tables(table_ids)
+    for table in DisplayCJKTablesList.get_all_tables().values():
+        # cached on the table once built
+        table.bitmap
+    DisplayUnicodeBlocksList.get_ordered_blocks()
+    # small fonts are counted through it once built
+    get_membership_index()
+
+
+def _init_worker(table_ids: set[str] | None = None):
+    # Ctrl+C reaches the whole process group, the server shuts the pool down itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    warm_up(table_ids)
+
+
+class CountService:
+    def __init__(
+        self,
+        jobs: int | None = None,
+        max_requests: int | None = None,
+        table_ids: set[str] | None = None,
+        cache: ResultCache | None = None,
+    ):
+        """
+        Args:
+            jobs: Number of worker processes (default: number of CPUs).
+            max_requests: Requests served at once (default: twice `jobs`).
+
+        Raises:
+            ValueError: a table ID does not exist.
+        """
+        warm_up(table_ids)
+        self.jobs = jobs or os.cpu_count() or 1
+        self.cache = cache
+        self._slots = threading.BoundedSemaphore(max_requests or self.jobs * 2)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.jobs, initializer=_init_worker, initargs=(table_ids,)
+        )
+        self.fieldnames = get_fieldnames()
+
+    def try_acquire(self) -> bool:
+        """Take a request slot, False when all are in use."""
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+    def count(self, paths: Iterable[str]) -> list[dict]:
+        futures = [
+            self._executor.submit(scan_font_file, font_path, self.cache)
+            for font_path in iter_font_files(Path(path) for path in paths)
+        ]
+        return [row for future in futures for row in future.result()]
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+
+class CountRequestHandler(BaseHTTPRequestHandler):
+    server_version = "cjkcount"
+    # set on the handler class made by make_handler()
+    service: CountService
+
+    def address_string(self) -> str:
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send_json(self, status: HTTPStatus, body: dict):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_error(self, status: HTTPStatus, message: str):
+        self._send_json(status, {"error": message})
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+
+    def do_POST(self):
+        if self.path != "/count":
+            self._send_error(HTTPStatus.NOT_FOUND, f"Unknown path: {self.path}")
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+        except ValueError:
+            length = -1
+        if not 0 <= length <= MAX_REQUEST_BYTES:
+            self._send_error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+            return
+        try:
+            request = json.loads(self.rfile.read(length))
+            paths = request["paths"]
+            if not isinstance(paths, list) or not all(isinstance(path, str) for path in paths):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            self._send_error(HTTPStatus.BAD_REQUEST, 'Expected {"paths": ["font file or directory", ...]}')
+            return
+
+        if not self.service.try_acquire():
+            self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, "Too many requests in progress")
+            return
+        try:
+            rows = self.service.count(paths)
+        except Exception as e:
+            self._send_error(HTTPStatus.INTERNAL_SERVER_ERROR, str(e) or type(e).__name__)
+        else:
+            self._send_json(HTTPStatus.OK, {"fieldnames": self.service.fieldnames, "rows": rows})
+        finally:
+            self.service.release()
+
+
+def make_handler(service: CountService, quiet: bool = False) -> type[CountRequestHandler]:
+    attributes = {"service": service}
+    if quiet:
+        attributes["log_message"] = lambda self, format, *args: None
+    return type("BoundCountRequestHandler", (CountRequestHandler,), attributes)
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class ThreadingUnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+        def server_bind(self):
+            remove_stale_socket(self.server_address)
+            super().server_bind()
+
+
+def remove_stale_socket(socket_path: str):
+    """Remove the socket file left at `socket_path` by a server that did not shut down cleanly.
+
+    Raises:
+        OSError: `socket_path` is not a socket, or a server still answers on it.
+    """
+    try:
+        mode = os.lstat(socket_path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise OSError(errno.EEXIST, "Address in use, not a socket", socket_path)
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(socket_path)
+    except ConnectionRefusedError:
+        # nobody listens on it any more
+        os.unlink(socket_path)
+        return
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "Address in use", socket_path)
+
+
+def serve(
+    service: CountService,
+    host: str | None = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: Path | None = None,
+    quiet: bool = False,
+    on_ready: Callable[[list[socketserver.BaseServer]], None] | None = None,
+):
+    """Serve `service` over HTTP on `host`:`port` (unless `host` is None) and on `socket_path`, until interrupted.
+
+    Args:
+        on_ready: Called with the started servers once they accept connections.
+
+    Raises:
+        ValueError: neither a host nor a socket path is given, or Unix sockets are not supported.
+        OSError: the port or socket path cannot be bound.
+    """
+    handler = make_handler(service, quiet)
+    servers = []
+    background_servers = []
+    try:
+        if host is not None:
+            servers.append(ThreadingHTTPServer((host, port), handler))
+        if socket_path is not None:
+            if not hasattr(socket, "AF_UNIX"):
+                raise ValueError("Unix domain sockets are not supported on this platform")
+            servers.append(ThreadingUnixHTTPServer(str(socket_path), handler))
+        if not servers:
+            raise ValueError("Nothing to serve on, give a host or a socket path")
+        # the first server runs in this thread so Ctrl+C stops it
+        for server in servers[1:]:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            background_servers.append(server)
+        if on_ready is not None:
+            on_ready(servers)
+        servers[0].serve_forever()
+    finally:
+        for server in background_servers:
+            server.shutdown()
+        for server in servers:
+            server.server_close()
+            if not isinstance(server, ThreadingHTTPServer):
+                Path(server.server_address).unlink(missing_ok=True)
+        service.close()
@@ -0,0 +1,115 @@
+"""Count N fonts against every CJK table and Unicode block as one dense matrix.
+
+Each column (a table or a block) is a codepoint bitmap built once; each cell is
+then `(font_bitmap & column_bitmap).bit_count()`, a word-wise AND and popcount
+done in C by Python's big integers, so a library of thousands of fonts costs
+N × M bitmap operations instead of N × M set intersections.
+
+The matrix can be written as CSV or as a NumPy `.npy` file (uint32, one row per
+face), which is written directly so NumPy is not needed to produce it.
+"""
+
+import csv
+import os
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, TextIO
+
+from . import codepoint_bitmap
+from .batch_scan import FONT_ERRORS, iter_font_files
+from .font_diff import FaceCoverage, load_file_coverages
+from .global_var import DisplayCJKTablesList, DisplayUnicodeBlocksList
+
+_NPY_MAGIC = b"\x93NUMPY\x01\x00"
+
+
+def get_column_bitmaps() -> dict[str, int]:
+    """Bitmaps of every enabled CJK table followed by every Unicode block, in display order."""
+    columns = {
+        table_id: table.bitmap for table_id, table in DisplayCJKTablesList.get_all_tables().items()
+    }
+    for block_id, block in DisplayUnicodeBlocksList.get_ordered_blocks().items():
+        columns[block_id] = codepoint_bitmap.from_ranges(block.assigned_ranges)
+    return columns
+
+
+def _load_file(font_path: Path) -> tuple[Path, list[FaceCoverage], str]:
+    try:
+        return font_path, load_file_coverages(font_path), ""
+    except FONT_ERRORS as e:
+        return font_path, [], str(e) or type(e).__name__
+
+
+def iter_coverages(
+    paths: Iterable[Path], jobs: int | None = None
+) -> Iterator[tuple[Path, list[FaceCoverage], str]]:
+    """Load the faces of every font file under `paths`, in a process pool when `jobs` > 1.
+
+    Yields:
+        (file, faces, error) in file order; a file that fails has no faces and an error message.
+    """
+    font_files = iter_font_files(paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        yield from map(_load_file, font_files)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(_load_file, font_files, chunksize=4)
+
+
+class CoverageMatrix:
+    def __init__(self, faces: list[FaceCoverage], column_ids: list[str], rows: list[array]):
+        """
+        Args:
+            faces: The face of every row.
+            column_ids: CJK table IDs followed by Unicode block IDs.
+            rows: Per face, the count of every column as an `array("I")`.
+        """
+        self.faces = faces
+        self.column_ids = column_ids
+        self.rows = rows
+
+    @classmethod
+    def compute(cls, faces: Iterable[FaceCoverage]) -> "CoverageMatrix":
+        columns = get_column_bitmaps()
+        column_bitmaps = list(columns.values())
+        faces = list(faces)
+        rows = [
+            array("I", [(face.bitmap & column).bit_count() for column in column_bitmaps])
+            for face in faces
+        ]
+        return cls(faces, list(columns.keys()), rows)
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.rows), len(self.column_ids)
+
+    def column(self, column_id: str) -> list[int]:
+        index = self.column_ids.index(column_id)
+        return [row[index] for row in self.rows]
+
+    def write_csv(self, output: TextIO):
+        """Write one row per face, with the same leading columns as the batch scan CSV."""
+        writer = csv.writer(output)
+        writer.writerow(["file", "font_id", "font_name", *self.column_ids])
+        for face, row in zip(self.faces, self.rows):
+            writer.writerow([str(face.font_path), face.font_id, face.font_name, *row])
+
+    def write_npy(self, output: BinaryIO):
+        """Write the counts as a little-endian uint32 NumPy array of shape (faces, columns)."""
+        header = repr(
+            {"descr": "<u4", "fortran_order": False, "shape": self.shape}
+        ).encode("latin1")
+        # the header, with its trailing newline, pads the data to a 64-byte boundary
+        padding = -(len(_NPY_MAGIC) + 2 + len(header) + 1) % 64
+        header += b" " * padding + b"\n"
+        output.write(_NPY_MAGIC)
+        output.write(len(header).to_bytes(2, "little"))
+        output.write(header)
+        for row in self.rows:
+            if sys.byteorder != "little":
+                row = array("I", row)
+                row.byteswap()
+            output.write(row.tobytes())
@@ -0,0 +1,169 @@
+"""Compare the character coverage of fonts, per CJK table and per Unicode block.
+
+Every face is reduced to its codepoint bitmap; the characters one face covers
+and the other does not are then two bitwise operations, and each table is
+counted on those differences with a popcount instead of set intersections.
+"""
+
+from pathlib import Path
+from typing import Iterable
+
+from . import codepoint_bitmap
+from .FontInfoCollector import FontInfoCollector, get_font_ids
+from .global_var import DisplayCJKTablesList, DisplayUnicodeBlocksList
+
+
+def count_tables_in_bitmap(bitmap: int) -> dict[str, int]:
+    """Count the codepoints of `bitmap` in every enabled CJK table."""
+    return {
+        table_id: table.count_overlap(bitmap) if bitmap else 0
+        for table_id, table in DisplayCJKTablesList.get_all_tables().items()
+    }
+
+
+def count_blocks_in_bitmap(bitmap: int) -> dict[str, int]:
+    """Count the codepoints of `bitmap` in every Unicode block."""
+    return DisplayUnicodeBlocksList.count_blocks(list(codepoint_bitmap.iter_codepoints(bitmap)))
+
+
+class FaceCoverage:
+    def __init__(self, font_path: Path, font_id: int, font_name: str, bitmap: int):
+        self.font_path = font_path
+        self.font_id = font_id
+        self.font_name = font_name
+        self.bitmap = bitmap
+
+    @property
+    def label(self) -> str:
+        """The file name, with the face number for a face of a collection."""
+        if self.font_id == -1:
+            return self.font_path.name
+        return f"{self.font_path.name}#{self.font_id}"
+
+    def to_dict(self) -> dict:
+        return {"file": str(self.font_path), "font_id": self.font_id, "font_name": self.font_name}
+
+
+def parse_face_spec(spec: str) -> tuple[Path, int | None]:
+    """Split "font.ttc#1" into the path and face number, None when no face is given."""
+    path, separator, font_id = spec.rpartition("#")
+    if separator and font_id.isdigit() and path:
+        return Path(path), int(font_id)
+    return Path(spec), None
+
+
+def load_file_coverages(font_path: Path) -> list[FaceCoverage]:
+    """Load every face of a font file.
+
+    Raises:
+        ValueError: a face cannot be loaded.
+    """
+    return [
+        FaceCoverage(font_path, font.font_id, font.font_name, font.char_bitmap)
+        for font in FontInfoCollector.load_all_faces(font_path, count=False)
+    ]
+
+
+def load_coverages(specs: Iterable[str]) -> list[FaceCoverage]:
+    """Load the faces named by `specs`, "font.otf", "font.ttc#1", or "font.ttc" for all its faces.
+
+    Raises:
+        OSError: a font file cannot be read.
+        ValueError: a font cannot be loaded, or a face number is given for a font that is not a
+            collection or is not in the collection.
+    """
+    coverages = []
+    for spec in specs:
+        font_path, font_id = parse_face_spec(spec)
+        if font_id is None:
+            coverages.extend(load_file_coverages(font_path))
+        else:
+            font_ids = get_font_ids(font_path)
+            if font_ids == [-1]:
+                raise ValueError(
+                    f"{spec}: {font_path.name} is not a font collection, it has no face {font_id}"
+                )
+            if font_id not in font_ids:
+                raise ValueError(f"{spec}: the collection has faces 0 to {font_ids[-1]}")
+            font = FontInfoCollector(font_path, font_id)
+            coverages.append(FaceCoverage(font_path, font_id, font.font_name, font.char_bitmap))
+    return coverages
+
+
+class CoverageDiff:
+    def __init__(self, face_a: FaceCoverage, face_b: FaceCoverage):
+        self.face_a = face_a
+        self.face_b = face_b
+        # bitmaps of the codepoints only one of the faces covers
+        self.only_a = face_a.bitmap & ~face_b.bitmap
+        self.only_b = face_b.bitmap & ~face_a.bitmap
+
+    def only_a_chars(self) -> str:
+        return codepoint_bitmap.to_string(self.only_a)
+
+    def only_b_chars(self) -> str:
+        return codepoint_bitmap.to_string(self.only_b)
+
+    def get_table_diffs(self) -> dict[str, tuple[int, int]]:
+        """Codepoints of every CJK table only in face A and only in face B."""
+        only_a = count_tables_in_bitmap(self.only_a)
+        only_b = count_tables_in_bitmap(self.only_b)
+        return {table_id: (only_a[table_id], only_b[table_id]) for table_id in only_a}
+
+    def get_block_diffs(self) -> dict[str, tuple[int, int]]:
+        """Codepoints of every Unicode block only in face A and only in face B."""
+        only_a = count_blocks_in_bitmap(self.only_a)
+        only_b = count_blocks_in_bitmap(self.only_b)
+        return {block_id: (only_a[block_id], only_b[block_id]) for block_id in only_a}
+
+    def to_dict(self, include_chars: bool = False) -> dict:
+        result = {
+            "a": self.face_a.to_dict(),
+            "b": self.face_b.to_dict(),
+            "only_a": self.only_a.bit_count(),
+            "only_b": self.only_b.bit_count(),
+            "tables": {
+                table_id: {"only_a": only_a, "only_b": only_b}
+                for table_id, (only_a, only_b) in self.get_table_diffs().items()
+            },
+            "blocks": {
+                block_id: {"only_a": only_a, "only_b": only_b}
+                for block_id, (only_a, only_b) in self.get_block_diffs().items()
+            },
+        }
+        if include_chars:
+            result["only_a_chars"] = self.only_a_chars()
+            result["only_b_chars"] = self.only_b_chars()
+        return result
+
+
+def diff_faces(coverages: list[FaceCoverage]) -> list[CoverageDiff]:
+    """Diff every pair of faces, in the given order."""
+    return [
+        CoverageDiff(face_a, face_b)
+        for i, face_a in enumerate(coverages)
+        for face_b in coverages[i + 1 :]
+    ]
+
+
+def format_diff(diff: CoverageDiff, include_chars: bool = False) -> str:
+    """Describe a diff as a text table of the tables and blocks that differ."""
+    label_a = diff.face_a.label
+    label_b = diff.face_b.label
+    lines = [
+        f"{label_a} vs {label_b}: {diff.only_a.bit_count()} only in {label_a},"
+        f" {diff.only_b.bit_count()} only in {label_b}"
+    ]
+    rows = [
+        *diff.get_table_diffs().items(),
+        *diff.get_block_diffs().items(),
+    ]
+    rows = [(key, only_a, only_b) for key, (only_a, only_b) in rows if only_a or only_b]
+    if rows:
+        width = max(len(key) for key, _, _ in rows)
+        lines.append(f"  {'':<{width}} {'only A':>8} {'only B':>8}")
+        lines.extend(f"  {key:<{width}} {only_a:>8} {only_b:>8}" for key, only_a, only_b in rows)
+    if include_chars:
+        lines.append(f"  only in {label_a}: {diff.only_a_chars()}")
+        lines.append(f"  only in {label_b}: {diff.only_b_chars()}")
+    return "\n".join(lines)
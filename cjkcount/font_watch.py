@@ -0,0 +1,232 @@
+"""Watch font build outputs and report how each rebuild changed the character coverage.
+
+Every font under the watched paths is remembered as one codepoint bitmap per
+face. When a file's size or modification time changes and then stays the same
+for one more poll (the build finished writing it), the file is hashed; only a
+file whose content really changed has its cmap read again. The new bitmap is
+diffed against the remembered one, and the CJK tables and Unicode blocks are
+counted on the added and removed codepoints only, never on the whole font.
+"""
+
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from . import codepoint_bitmap
+from .batch_scan import FONT_ERRORS, iter_font_files
+from .font_diff import count_blocks_in_bitmap, count_tables_in_bitmap
+from .FontInfoCollector import FontInfoCollector
+from .result_cache import hash_file
+
+
+class FaceDelta:
+    def __init__(self, font_path: Path, font_id: int, font_name: str, added: int, removed: int):
+        """
+        Args:
+            added: Bitmap of the codepoints the face gained.
+            removed: Bitmap of the codepoints the face lost.
+        """
+        self.font_path = font_path
+        self.font_id = font_id
+        self.font_name = font_name
+        self.added = added
+        self.removed = removed
+
+    def added_codepoints(self) -> list[int]:
+        return list(codepoint_bitmap.iter_codepoints(self.added))
+
+    def removed_codepoints(self) -> list[int]:
+        return list(codepoint_bitmap.iter_codepoints(self.removed))
+
+    def get_table_deltas(self) -> dict[str, tuple[int, int]]:
+        """Codepoints added to and removed from every CJK table that changed."""
+        added = count_tables_in_bitmap(self.added)
+        removed = count_tables_in_bitmap(self.removed)
+        return {
+            table_id: (added[table_id], removed[table_id])
+            for table_id in added
+            if added[table_id] or removed[table_id]
+        }
+
+    def get_block_deltas(self) -> dict[str, tuple[int, int]]:
+        """Codepoints added to and removed from every Unicode block that changed."""
+        added = count_blocks_in_bitmap(self.added)
+        removed = count_blocks_in_bitmap(self.removed)
+        return {
+            block_id: (added[block_id], removed[block_id])
+            for block_id in added
+            if added[block_id] or removed[block_id]
+        }
+
+    def to_dict(self) -> dict:
+        return {
+            "file": str(self.font_path),
+            "font_id": self.font_id,
+            "font_name": self.font_name,
+            "added": "".join(map(chr, self.added_codepoints())),
+            "removed": "".join(map(chr, self.removed_codepoints())),
+            "tables": {
+                table_id: {"added": added, "removed": removed}
+                for table_id, (added, removed) in self.get_table_deltas().items()
+            },
+            "blocks": {
+                block_id: {"added": added, "removed": removed}
+                for block_id, (added, removed) in self.get_block_deltas().items()
+            },
+        }
+
+
+class _WatchedFile:
+    def __init__(self, stat_key: tuple[int, int], content_hash: str, faces: dict[int, tuple[str, int]]):
+        self.stat_key = stat_key
+        self.content_hash = content_hash
+        # font_id -> (font name, codepoint bitmap)
+        self.faces = faces
+
+
+def _stat_key(font_path: Path) -> tuple[int, int] | None:
+    try:
+        stat = font_path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_faces(font_path: Path) -> dict[int, tuple[str, int]]:
+    # only the cmaps are needed, the counts are taken on the differences
+    return {
+        font.font_id: (font.font_name, font.char_bitmap)
+        for font in FontInfoCollector.load_all_faces(font_path, count=False)
+    }
+
+
+class FontWatcher:
+    def __init__(self, paths: Iterable[Path]):
+        self.paths = [Path(path) for path in paths]
+        self._files: dict[Path, _WatchedFile] = {}
+        # files seen changing in the last poll, with the stat they had then
+        self._changing: dict[Path, tuple[int, int]] = {}
+        # errors of the last poll, as (file, message)
+        self.errors: list[tuple[Path, str]] = []
+
+    def start(self) -> int:
+        """Remember the current state of every font without reporting it.
+
+        Returns:
+            The number of fonts being watched.
+        """
+        self.errors = []
+        for font_path in iter_font_files(self.paths):
+            stat_key = _stat_key(font_path)
+            if stat_key is not None:
+                self._update(font_path, stat_key, None, report=False)
+        return len(self._files)
+
+    def poll(self) -> list[FaceDelta]:
+        """Look for fonts that finished changing since the last poll.
+
+        Returns:
+            The faces whose codepoints changed. A deleted font loses all its codepoints.
+        """
+        self.errors = []
+        deltas = []
+        seen = set()
+        for font_path in iter_font_files(self.paths):
+            seen.add(font_path)
+            stat_key = _stat_key(font_path)
+            if stat_key is None:
+                continue
+            watched = self._files.get(font_path)
+            if watched is not None and watched.stat_key == stat_key:
+                self._changing.pop(font_path, None)
+                continue
+            # wait until the stat holds still for a whole poll interval
+            if self._changing.get(font_path) != stat_key:
+                self._changing[font_path] = stat_key
+                continue
+            del self._changing[font_path]
+            deltas.extend(self._update(font_path, stat_key, watched, report=True))
+
+        for font_path in self._files.keys() - seen:
+            watched = self._files.pop(font_path)
+            self._changing.pop(font_path, None)
+            deltas.extend(
+                FaceDelta(font_path, font_id, font_name, 0, bitmap)
+                for font_id, (font_name, bitmap) in watched.faces.items()
+            )
+        return deltas
+
+    def _update(
+        self,
+        font_path: Path,
+        stat_key: tuple[int, int],
+        watched: _WatchedFile | None,
+        report: bool,
+    ) -> list[FaceDelta]:
+        try:
+            content_hash = hash_file(font_path)
+        except OSError as e:
+            self.errors.append((font_path, str(e)))
+            return []
+        if watched is not None and watched.content_hash == content_hash:
+            # touched or rewritten with the same bytes
+            watched.stat_key = stat_key
+            return []
+        try:
+            faces = _read_faces(font_path)
+        except FONT_ERRORS as e:
+            self.errors.append((font_path, str(e) or type(e).__name__))
+            if watched is None:
+                watched = self._files[font_path] = _WatchedFile(stat_key, content_hash, {})
+            # keep diffing against the last good build, retry on the next change
+            watched.stat_key = stat_key
+            return []
+
+        self._files[font_path] = _WatchedFile(stat_key, content_hash, faces)
+        old_faces = watched.faces if watched is not None else {}
+        if not report:
+            return []
+        deltas = []
+        for font_id in sorted(faces.keys() | old_faces.keys()):
+            font_name, new_bitmap = faces.get(font_id, (None, 0))
+            old_name, old_bitmap = old_faces.get(font_id, (None, 0))
+            added = new_bitmap & ~old_bitmap
+            removed = old_bitmap & ~new_bitmap
+            if added or removed:
+                deltas.append(FaceDelta(font_path, font_id, font_name or old_name, added, removed))
+        return deltas
+
+    def watch(self, interval: float) -> Iterator[list[FaceDelta]]:
+        """Poll every `interval` seconds forever, yielding the deltas of every poll that found changes."""
+        while True:
+            time.sleep(interval)
+            deltas = self.poll()
+            if deltas or self.errors:
+                yield deltas
+
+
+def format_delta(delta: FaceDelta) -> str:
+    """Describe a face delta as text, e.g. "+312 in big5, −4 in gb2312" followed by the characters."""
+    name = delta.font_path.name if delta.font_id == -1 else f"{delta.font_path.name}#{delta.font_id}"
+    if delta.font_name:
+        name += f" ({delta.font_name})"
+
+    def describe(counts: dict[str, tuple[int, int]]) -> str:
+        parts = []
+        for key, (added, removed) in counts.items():
+            change = " ".join(
+                text for text in (f"+{added}" if added else "", f"−{removed}" if removed else "") if text
+            )
+            parts.append(f"{change} in {key}")
+        return ", ".join(parts) or "none"
+
+    lines = [
+        f"{name}: +{delta.added.bit_count()} −{delta.removed.bit_count()} codepoints",
+        f"  tables: {describe(delta.get_table_deltas())}",
+        f"  blocks: {describe(delta.get_block_deltas())}",
+    ]
+    if delta.added:
+        lines.append("  added: " + "".join(map(chr, delta.added_codepoints())))
+    if delta.removed:
+        lines.append("  removed: " + "".join(map(chr, delta.removed_codepoints())))
+    return "\n".join(lines)
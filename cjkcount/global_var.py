@@ -0,0 +1,658 @@
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import cached_property
+from typing import Callable, Iterable, Self, Sequence
+from pathlib import Path
+from enum import StrEnum
+from . import codepoint_bitmap
+from . import table_pack
+import unicode_blocks
+from unicode_blocks.blocks import (
+    IDEO_BLOCKS,
+    CJK_UNIFIED_IDEOGRAPHS,
+    CJK_UNIFIED_IDEOGRAPHS_EXTENSION_A,
+)
+from unicode_blocks.unicodeBlock import UnicodeBlock
+
+# if packaged by pyinstaller
+# ref: https://stackoverflow.com/questions/404744/determining-application-path-in-a-python-exe-generated-by-pyinstaller
+if getattr(sys, "frozen", False):
+    # change from loading same folder to full folder, --onedir
+    main_directory = Path(sys.executable).parent
+    package_directory = main_directory / "cjkcount"
+    # `pyinstaller --onefile` change to use the following code
+    # if '_MEIPASS2' in os.environ:
+    #    main_directory = os.environ['_MEIPASS2']
+    # ref: https://stackoverflow.com/questions/9553262/pyinstaller-ioerror-errno-2-no-such-file-or-directory
+else:
+    # dev mode
+    try:  # py xx.py
+        app_full_path = Path(__file__).resolve()
+        # this file is in the cjkcount package, the app (main.py, settings, fonts) is one level up
+        package_directory = app_full_path.parent
+        main_directory = package_directory.parent
+    except NameError:  # py then run code
+        main_directory = Path.cwd()
+        package_directory = main_directory / "cjkcount"
+# the tables are package data, shipped next to this file
+tables_directory = package_directory / "cjk-tables"
+
+
+class DisplayLanguage(StrEnum):
+    EN = "en"
+    ZHS = "zhs"
+    ZHT = "zht"
+
+    @classmethod
+    def list(cls):
+        return list(map(lambda c: c.value, cls))
+
+    def display_name(self):
+        if self == self.EN:
+            return "English"
+        elif self == self.ZHS:
+            return "简体中文"
+        elif self == self.ZHT:
+            return "正體（繁体）中文"
+        else:
+            return "Unknown"
+
+
+class CJKGroup(StrEnum):
+    JIAN = "jian"
+    JIANFAN = "jianfan"
+    FAN = "fan"
+
+
+class CJKTable:
+    def __init__(
+        self,
+        id: str,
+        localised_names: str,
+        cjk_group: CJKGroup,
+        characters: set[str] | None = None,
+        codepoints: array | None = None,
+        load_codepoints: Callable[[], array] | None = None,
+        count: int | None = None,
+        load_bitmap: Callable[[], int] | None = None,
+    ):
+        """One of `characters`, sorted `codepoints`, or `load_codepoints` must be given.
+
+        The others are derived on demand, so a table given `load_codepoints` and
+        `count` is only loaded when it is first counted. `load_bitmap` returns a
+        prebuilt `bitmap` instead of building it from the codepoints.
+        """
+        self.id = id
+        self.localised_names = localised_names
+        self.cjk_group = cjk_group
+        if characters is not None:
+            self.characters = characters
+        if codepoints is not None:
+            self.codepoints = codepoints
+        self._load_codepoints = load_codepoints
+        self._count = count
+        self._load_bitmap = load_bitmap
+
+    @cached_property
+    def characters(self) -> set[str]:
+        return set(map(chr, self.codepoints))
+
+    @cached_property
+    def codepoints(self) -> array:
+        if self._load_codepoints is not None:
+            return self._load_codepoints()
+        return array("I", sorted(map(ord, self.characters)))
+
+    @property
+    def count(self) -> int:
+        if self._count is not None:
+            return self._count
+        return len(self.codepoints)
+
+    @cached_property
+    def bitmap(self) -> int:
+        if self._load_bitmap is not None:
+            return self._load_bitmap()
+        return codepoint_bitmap.from_codepoints(self.codepoints)
+
+    def localised_name(self, lang: DisplayLanguage) -> str:
+        return self.localised_names.get(
+            lang,
+            self.localised_names.get(
+                DisplayLanguage.EN,
+            ),
+        )
+
+    def get_overlap(self, other: set[str]) -> set[str]:
+        return self.characters.intersection(other)
+
+    def count_overlap(self, other_bitmap: int) -> int:
+        """Count characters in both this table and `other_bitmap` (see `codepoint_bitmap`)."""
+        return (self.bitmap & other_bitmap).bit_count()
+
+    def get_diff(self, other: set[str]) -> set[str]:
+        return self.characters.difference(other)
+
+    def get_overlap_chars(self, other_bitmap: int) -> str:
+        """Characters in both this table and `other_bitmap`, in codepoint order."""
+        return codepoint_bitmap.to_string(self.bitmap & other_bitmap)
+
+    def get_missing_chars(self, other_bitmap: int) -> str:
+        """Characters of this table not in `other_bitmap`, in codepoint order."""
+        return codepoint_bitmap.to_string(self.bitmap & ~other_bitmap)
+
+    def to_record(self) -> dict:
+        """Convert to the plain table record stored in `table_pack`."""
+        return {
+            "id": self.id,
+            "name": dict(self.localised_names),
+            "cjk_group": str(self.cjk_group),
+            "codepoints": self.codepoints,
+        }
+
+    @staticmethod
+    def from_record(record: dict) -> Self:
+        if record.get("ranges") is not None:
+            return RangeTable(
+                record["id"], record["name"], CJKGroup(record["cjk_group"]), record["ranges"]
+            )
+        return CJKTable(
+            record["id"],
+            record["name"],
+            CJKGroup(record["cjk_group"]),
+            load_codepoints=record["load_codepoints"],
+            count=record["count"],
+            load_bitmap=record.get("load_bitmap"),
+        )
+
+    @staticmethod
+    def load(filename: Path) -> Self:
+        # only needed when a table file changed since the last table pack build
+        import frontmatter
+
+        id = filename.stem.removesuffix("-han")
+        with open(filename, "r", encoding="utf-8-sig") as f:
+            metadata, content = frontmatter.parse(f.read())
+            try:
+                localised_names: dict = metadata["name"]
+                cjk_group: str = metadata["cjk_group"]
+            except KeyError:
+                localised_names = {lang: filename.stem for lang in DisplayLanguage}
+                cjk_group = "unknown"
+            if "ranges" in metadata:
+                try:
+                    ranges = [parse_codepoint_range(value) for value in metadata["ranges"]]
+                except ValueError as e:
+                    raise ValueError(f"Invalid ranges in {filename}: {e}") from e
+                table = RangeTable(id, localised_names, CJKGroup(cjk_group), ranges)
+                count = metadata.get("count")
+                assert count is None or count == table.count, (
+                    f"Character count mismatch in {filename}: metadata count {count} vs actual count {table.count}"
+                )
+                return table
+            characters = set(map(str.strip, content.strip().splitlines()))
+            try:
+                count: int = metadata["count"]
+            except KeyError:
+                count = len(characters)
+            except TypeError:
+                count = len(characters)
+            assert count == len(
+                characters
+            ), f"Character count mismatch in {filename}: metadata count {count} vs actual count {len(characters)}"
+
+            return CJKTable(id, localised_names, CJKGroup(cjk_group), characters)
+
+
+def parse_codepoint_range(value) -> tuple[int, int]:
+    """Parse an inclusive range from a table file: "U+4E00..U+9FA5", "4E00-9FA5" or "U+3007".
+
+    Numbers are refused: YAML reads `- 3007` as decimal 3007, not U+3007.
+
+    Raises:
+        ValueError: the range is not a string, is malformed or empty.
+    """
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid codepoint range: {value!r}, write it as a string like U+3007 or U+4E00..U+9FA5")
+    bounds = value.replace("..", "-").split("-")
+    if len(bounds) > 2:
+        raise ValueError(f"Invalid codepoint range: {value}")
+    start, end = (
+        int(bound.strip().upper().removeprefix("U+"), 16) for bound in (bounds[0], bounds[-1])
+    )
+    if not 0 <= start <= end <= codepoint_bitmap.MAX_CODEPOINT:
+        raise ValueError(f"Invalid codepoint range: {value!r}")
+    return start, end
+
+
+class RangeTable(CJKTable):
+    """A table defined by codepoint intervals, never expanded into characters to be counted."""
+
+    def __init__(
+        self,
+        id: str,
+        localised_names: dict,
+        cjk_group: CJKGroup,
+        ranges: Iterable[tuple[int, int]],
+    ):
+        """
+        Args:
+            ranges: Inclusive (start, end) codepoint ranges, in any order and possibly overlapping.
+        """
+        merged = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.ranges: list[tuple[int, int]] = [(start, end) for start, end in merged]
+        self._starts = [start for start, _ in self.ranges]
+        super().__init__(
+            id,
+            localised_names,
+            cjk_group,
+            load_codepoints=self._expand_ranges,
+            count=sum(end - start + 1 for start, end in self.ranges),
+        )
+
+    def _expand_ranges(self) -> array:
+        codepoints = array("I")
+        for start, end in self.ranges:
+            codepoints.extend(range(start, end + 1))
+        return codepoints
+
+    def __contains__(self, codepoint: int) -> bool:
+        index = bisect_right(self._starts, codepoint) - 1
+        return index >= 0 and codepoint <= self.ranges[index][1]
+
+    @cached_property
+    def bitmap(self) -> int:
+        return codepoint_bitmap.from_ranges(self.ranges)
+
+    def count_codepoints(self, codepoints: Sequence[int]) -> int:
+        """Count the sorted `codepoints` in this table, two binary searches per range."""
+        count = 0
+        position = 0
+        for start, end in self.ranges:
+            position = bisect_left(codepoints, start, position)
+            range_end = bisect_right(codepoints, end, position)
+            count += range_end - position
+            position = range_end
+        return count
+
+    def get_overlap(self, other: set[str]) -> set[str]:
+        return {char for char in other if ord(char) in self}
+
+    def to_record(self) -> dict:
+        return {
+            "id": self.id,
+            "name": dict(self.localised_names),
+            "cjk_group": str(self.cjk_group),
+            "ranges": self.ranges,
+        }
+
+
+def char_range(start: int, end: int) -> range:
+    """Generate a range that includes the end value."""
+    return range(start, end + 1)
+
+    # normal range: range(0,5) --> [0,1,2,3,4], len(range(0,5))=5
+    # character detect range: char_range(0,5) --> [0,1,2,3,4,5], len(char_range(0,5))=6
+
+
+cjk_compatibility_ideographs_list = [
+    0xFA0E,
+    0xFA0F,
+    0xFA11,
+    0xFA13,
+    0xFA14,
+    0xFA1F,
+    0xFA21,
+    0xFA23,
+    0xFA24,
+    0xFA27,
+    0xFA28,
+    0xFA29,
+]  # 﨎﨏﨑﨓﨔﨟﨡﨣﨤﨧﨨﨩
+gbk_compatibility_list = cjk_compatibility_ideographs_list + [
+    0xF92C,
+    0xF979,
+    0xF995,
+    0xF9E7,
+    0xF9F1,
+    0xFA0C,
+    0xFA0D,
+    0xFA18,
+    0xFA20,
+]  # 郎凉秊裏隣兀嗀礼蘒
+
+# special unicode blocks
+CJK_ZERO_BLOCK = UnicodeBlock(
+    "〇",
+    ord("〇"),
+    ord("〇"),
+    assigned_ranges=[(ord("〇"), ord("〇"))],
+)
+
+CJK_NON_COMPATIBILITY_IDEOGRAPHS = UnicodeBlock(
+    "  Non-Compatibility (Unified) Ideographs",
+    cjk_compatibility_ideographs_list[0],
+    cjk_compatibility_ideographs_list[-1],
+    assigned_ranges=[
+        (char_code, char_code) for char_code in cjk_compatibility_ideographs_list
+    ],
+)
+
+
+TOTAL_BLOCK_NAME = "Total"
+
+# bump whenever the built-in GBK/GB18030 tables or the block definitions in this file change
+BUILTIN_TABLES_VERSION = 1
+
+# special GB encodings
+GBK = RangeTable(
+    "gbk",
+    {
+        DisplayLanguage.EN: "GBK",
+        DisplayLanguage.ZHS: "GBK",
+        DisplayLanguage.ZHT: "GBK",
+    },
+    CJKGroup.JIANFAN,
+    [
+        (ord("〇"), ord("〇")),
+        (0x4E00, 0x9FA5),
+        *((char_code, char_code) for char_code in gbk_compatibility_list),
+    ],
+)
+
+
+class GB18030(RangeTable):
+    def __init__(self):
+        super().__init__(
+            "gb18030",
+            {
+                DisplayLanguage.EN: "GB18030",
+                DisplayLanguage.ZHS: "GB18030",
+                DisplayLanguage.ZHT: "GB18030",
+            },
+            CJKGroup.JIANFAN,
+            [
+                *CJK_ZERO_BLOCK.assigned_ranges,
+                *CJK_UNIFIED_IDEOGRAPHS.assigned_ranges,
+                *CJK_UNIFIED_IDEOGRAPHS_EXTENSION_A.assigned_ranges,
+                *CJK_NON_COMPATIBILITY_IDEOGRAPHS.assigned_ranges,
+            ],
+        )
+
+
+class DisplayCJKTablesList:
+    # filled on first use by _ensure_loaded()
+    table_list: dict[str, dict[str, CJKTable]] = {}
+    # digest of the table files, set together with table_list
+    tables_digest: str = ""
+
+    # None means all tables are counted and displayed
+    enabled_table_ids: set[str] | None = None
+
+    predefined_order = {
+        CJKGroup.JIAN: [
+            "gb2312",
+            "3500changyong",
+            "7000tongyong",
+            "yiwu-jiaoyu",
+            "tongyong-guifan",
+        ],
+        CJKGroup.JIANFAN: [
+            "hanyi-jianfan",
+            "fangzheng-jianfan",
+            "iicore",
+            "gbk",
+            "gb18030",
+        ],
+        CJKGroup.FAN: [
+            "4808changyong",
+            "6343cichangyong",
+            "big5",
+            "big5changyong",
+            "jf7000-core",
+            "hkchangyong",
+            "hkscs",
+            "suppchara",
+            "gb12345",
+            "gujiyinshua"
+        ],
+    }
+
+    @classmethod
+    def _ensure_loaded(cls):
+        """Load table metadata, the characters of each table are only read when it is first counted."""
+        if cls.table_list:
+            return
+        table_list = {
+            CJKGroup.JIAN: {},
+            CJKGroup.JIANFAN: {"gbk": GBK, "gb18030": GB18030()},
+            CJKGroup.FAN: {},
+        }
+        tables_digest, table_records = table_pack.load_tables(
+            tables_directory,
+            lambda table_file: CJKTable.load(table_file).to_record(),
+        )
+        for table_record in table_records:
+            table = CJKTable.from_record(table_record)
+            table_list[table.cjk_group][table.id] = table
+        cls.tables_digest = tables_digest
+        cls.table_list = table_list
+
+    @classmethod
+    def restrict_tables(cls, table_ids: Iterable[str] | None):
+        """Only count and display the tables in `table_ids`, or all tables when None.
+
+        Raises:
+            ValueError: a table ID does not exist.
+        """
+        if table_ids is not None:
+            cls._ensure_loaded()
+            table_ids = set(table_ids)
+            known_ids = {
+                table_id for tables in cls.table_list.values() for table_id in tables
+            }
+            unknown_ids = table_ids - known_ids
+            if unknown_ids:
+                raise ValueError(f"Unknown CJK table: {', '.join(sorted(unknown_ids))}")
+        cls.enabled_table_ids = table_ids
+
+    @classmethod
+    def get_ordered_tables_in_group(
+        cls, group: CJKGroup, enabled_only: bool = True
+    ) -> dict[str, CJKTable]:
+        cls._ensure_loaded()
+        # order by predefined order
+        ordered_tables = {}
+        for table_id in cls.predefined_order[group]:
+            if table_id in cls.table_list[group]:
+                ordered_tables[table_id] = cls.table_list[group][table_id]
+        # add any other tables not in predefined order to allow extensions from user file
+        for table_id, table in cls.table_list[group].items():
+            if table_id not in ordered_tables:
+                ordered_tables[table_id] = table
+        if enabled_only and cls.enabled_table_ids is not None:
+            ordered_tables = {
+                table_id: table
+                for table_id, table in ordered_tables.items()
+                if table_id in cls.enabled_table_ids
+            }
+        return ordered_tables
+
+    @classmethod
+    def get_all_tables(cls, enabled_only: bool = True) -> dict[str, CJKTable]:
+        all_tables = {}
+        for group in CJKGroup:
+            all_tables.update(cls.get_ordered_tables_in_group(group, enabled_only))
+        return all_tables
+
+
+class DisplayUnicodeBlocksList:
+    # filled on first use by _ensure_loaded()
+    block_list: dict[str, UnicodeBlock] = {}
+    TOTAL_BLOCK: UnicodeBlock | None = None
+    # sorted, non-overlapping [start, end) codepoint segments and the IDs of the blocks covering each
+    block_segments: list[tuple[int, int, tuple[str, ...]]] = []
+
+    predefined_order = [
+        "KANGXI_RADICALS",
+        "CJK_RADICALS_SUPPLEMENT",
+        "ZERO",
+        "CJK_UNIFIED_IDEOGRAPHS",
+        "CJK_UNIFIED_IDEOGRAPHS_EXTENSION_A",
+    ]
+
+    @classmethod
+    def _ensure_loaded(cls):
+        if cls.block_list:
+            return
+        block_list = {
+            "ZERO": CJK_ZERO_BLOCK,
+            "__NON_COMPATIBILITY_(UNIFIED)_IDEOGRAPHS": CJK_NON_COMPATIBILITY_IDEOGRAPHS,
+        }
+        total_assigned_ranges = [
+            *CJK_ZERO_BLOCK.assigned_ranges.ranges,
+            *CJK_NON_COMPATIBILITY_IDEOGRAPHS.assigned_ranges.ranges,
+        ]
+        for block in IDEO_BLOCKS:
+            block_list[block.variable_name] = block
+            if (
+                block.variable_name == "CJK_UNIFIED_IDEOGRAPHS"
+                or block.variable_name.startswith("CJK_UNIFIED_IDEOGRAPHS_EXTENSION_")
+            ):
+                total_assigned_ranges.extend(block.assigned_ranges.ranges)
+
+        cls.TOTAL_BLOCK = UnicodeBlock(
+            TOTAL_BLOCK_NAME,
+            0xF0000,
+            0x10FFFF,
+            assigned_ranges=total_assigned_ranges,
+        )  # dummy block for total count
+        # publish block_list last, it marks the registry as loaded
+        cls.block_segments = cls._build_block_segments(
+            cls._order_blocks(block_list, cls.TOTAL_BLOCK)
+        )
+        cls.block_list = block_list
+
+    @staticmethod
+    def _build_block_segments(
+        blocks: dict[str, UnicodeBlock],
+    ) -> list[tuple[int, int, tuple[str, ...]]]:
+        """Merge the assigned ranges of all (possibly overlapping) blocks into sorted segments."""
+        boundaries = sorted(
+            {
+                boundary
+                for block in blocks.values()
+                for start, end in block.assigned_ranges
+                for boundary in (start, end + 1)
+            }
+        )
+        segment_blocks = [[] for _ in boundaries]
+        for block_id, block in blocks.items():
+            for start, end in block.assigned_ranges:
+                for i in range(
+                    bisect_left(boundaries, start), bisect_left(boundaries, end + 1)
+                ):
+                    segment_blocks[i].append(block_id)
+        return [
+            (boundaries[i], boundaries[i + 1], tuple(segment_blocks[i]))
+            for i in range(len(boundaries) - 1)
+            if segment_blocks[i]
+        ]
+
+    @classmethod
+    def count_blocks(cls, codepoints: Sequence[int]) -> dict[str, int]:
+        """Count the assigned codepoints of every block in sorted `codepoints` at once.
+
+        Each merged segment costs two binary searches, so this is
+        O(segments * log n) instead of a scan of the font per block.
+        """
+        blocks = cls.get_ordered_blocks()
+        block_count = dict.fromkeys(blocks, 0)
+        position = 0
+        for start, end, block_ids in cls.block_segments:
+            position = bisect_left(codepoints, start, position)
+            segment_end = bisect_left(codepoints, end, position)
+            if segment_end > position:
+                for block_id in block_ids:
+                    block_count[block_id] += segment_end - position
+            position = segment_end
+        return block_count
+
+    @classmethod
+    def get_ordered_blocks(cls) -> dict[str, UnicodeBlock]:
+        cls._ensure_loaded()
+        return cls._order_blocks(cls.block_list, cls.TOTAL_BLOCK)
+
+    @classmethod
+    def _order_blocks(
+        cls, block_list: dict[str, UnicodeBlock], total_block: UnicodeBlock
+    ) -> dict[str, UnicodeBlock]:
+        # order by predefined order
+        ordered_blocks = {}
+        for block_id in cls.predefined_order:
+            if block_id in block_list:
+                ordered_blocks[block_id] = block_list[block_id]
+        # add any other blocks not in predefined order to allow automatic updates
+        for block_id, block in sorted(block_list.items(), key=lambda item: item[1]):
+            if block_id not in ordered_blocks:
+                ordered_blocks[block_id] = block
+
+        # final total block
+        ordered_blocks["total"] = total_block
+        return ordered_blocks
+
+
+class CountingOptions:
+    # only count codepoints mapped to a glyph that draws something, see cmap_reader.GlyphOutlines;
+    # empty glyphs are dropped from the cmap as it is read, so set this before loading fonts
+    real_glyphs_only: bool = False
+
+
+def get_counts_version(all_tables: bool = False) -> str:
+    """Return a string that changes whenever counting the same font could give different counts.
+
+    It covers the table files, the built-in tables, the Unicode block data, the
+    enabled tables and `CountingOptions`, so it can key cached counts.
+
+    Args:
+        all_tables: The version of the tables and blocks alone, whichever tables are
+            enabled and whatever the counting options.
+    """
+    DisplayCJKTablesList._ensure_loaded()
+    enabled_table_ids = None if all_tables else DisplayCJKTablesList.enabled_table_ids
+    counts_version = ":".join(
+        (
+            DisplayCJKTablesList.tables_digest,
+            str(BUILTIN_TABLES_VERSION),
+            unicode_blocks.__version__,
+            "*" if enabled_table_ids is None else ",".join(sorted(enabled_table_ids)),
+        )
+    )
+    if CountingOptions.real_glyphs_only and not all_tables:
+        counts_version += ":real-glyphs"
+    return counts_version
+
+
+# (counts version, bitmap of the counted codepoints)
+_counted_bitmap: tuple[str, int] | None = None
+
+
+def get_counted_bitmap() -> int:
+    """The codepoints of every enabled CJK table and Unicode block, the only ones whose counts can change."""
+    global _counted_bitmap
+    counts_version = get_counts_version()
+    if _counted_bitmap is None or _counted_bitmap[0] != counts_version:
+        DisplayUnicodeBlocksList._ensure_loaded()
+        bitmap = codepoint_bitmap.from_ranges(
+            (start, end - 1) for start, end, _ in DisplayUnicodeBlocksList.block_segments
+        )
+        for table in DisplayCJKTablesList.get_all_tables().values():
+            bitmap |= table.bitmap
+        _counted_bitmap = (counts_version, bitmap)
+    return _counted_bitmap[1]
@@ -1,8 +1,8 @@
-from global_var import (
+from .global_var import (
     DisplayLanguage,
     CJK_NON_COMPATIBILITY_IDEOGRAPHS,
     CJK_ZERO_BLOCK,
-    DisplayUnicodeBlocksList,
+    TOTAL_BLOCK_NAME,
     CJKGroup,
 )
 from unicode_blocks.blocks import (
@@ -74,6 +74,24 @@ LABELS = {
         "OpenType collection selection": "OpenType Collection Selection",
         "Pick font for counting:": "Pick font for counting:",
         "OK": "OK",
+        "Cancel": "Cancel",
+        "progress": {
+            "cache": "Checking cached results…",
+            "read_cmap": "Reading font…",
+            "extract_chars": "Extracting characters…",
+            "table": "Counting {}…",
+            "all_tables": "Counting all tables and blocks…",
+            "unicode_blocks": "Counting Unicode blocks…",
+            "cancelled": "Loading cancelled.",
+        },
+        "report": {
+            "title": "CJK Character Count Report",
+            "name": "Name",
+            "count": "Count",
+            "full_size": "Total",
+            "missing": "Missing",
+            "missing_count": "{} missing characters",
+        },
         "unicode_blocks": {},  # Default Unicode block names are English names
     },
     DisplayLanguage.ZHS: {
@@ -126,8 +144,26 @@ LABELS = {
         "OpenType collection selection": "OpenType合集字体选择",
         "Pick font for counting:": "选择计数的字体：",
         "OK": "确定",
+        "Cancel": "取消",
+        "progress": {
+            "cache": "正在检查缓存结果…",
+            "read_cmap": "正在读取字体…",
+            "extract_chars": "正在提取字符…",
+            "table": "正在统计{}…",
+            "all_tables": "正在统计所有字表及区段…",
+            "unicode_blocks": "正在统计统一码区段…",
+            "cancelled": "已取消读取。",
+        },
+        "report": {
+            "title": "字体计数报告",
+            "name": "名称",
+            "count": "计数",
+            "full_size": "总数",
+            "missing": "缺失",
+            "missing_count": "缺失 {} 个字符",
+        },
         "unicode_blocks": {
-            DisplayUnicodeBlocksList.TOTAL_BLOCK.name: "总汉字数",
+            TOTAL_BLOCK_NAME: "总汉字数",
             CJK_ZERO_BLOCK.name: "〇",
             KANGXI_RADICALS.name: "康熙部首",
             CJK_RADICALS_SUPPLEMENT.name: "汉字部首补充",
@@ -197,8 +233,26 @@ LABELS = {
         "OpenType collection selection": "OpenType合集字型選擇",
         "Pick font for counting:": "選擇計數的字型：",
         "OK": "確定",
+        "Cancel": "取消",
+        "progress": {
+            "cache": "正在檢查快取結果…",
+            "read_cmap": "正在讀取字型…",
+            "extract_chars": "正在提取字符…",
+            "table": "正在統計{}…",
+            "all_tables": "正在統計所有字表及區段…",
+            "unicode_blocks": "正在統計統一碼區段…",
+            "cancelled": "已取消讀取。",
+        },
+        "report": {
+            "title": "字型計數報告",
+            "name": "名稱",
+            "count": "計數",
+            "full_size": "總數",
+            "missing": "缺失",
+            "missing_count": "缺失 {} 個字符",
+        },
         "unicode_blocks": {
-            DisplayUnicodeBlocksList.TOTAL_BLOCK.name: "總漢字數",
+            TOTAL_BLOCK_NAME: "總漢字數",
             CJK_ZERO_BLOCK.name: "〇",
             KANGXI_RADICALS.name: "康熙部首",
             CJK_RADICALS_SUPPLEMENT.name: "漢字部首補充",
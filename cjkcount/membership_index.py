@@ -0,0 +1,319 @@
+"""Inverted index from every codepoint to the CJK tables and Unicode blocks containing it.
+
+Each codepoint maps to a membership class, the set of tables and blocks it is in
+(a few hundred distinct sets for all built-in tables and blocks). Counting a font
+is then one pass over its codepoints tallying the classes, after which each
+class count is added to its members, so every table and block is counted at
+once and the pass does not grow with the number of tables.
+
+A table's bitmap AND and popcount (`CJKTable.count_overlap()`) runs in C and
+costs about as much as looking up `CODEPOINTS_PER_TABLE` codepoints here, so
+the index only pays off for fonts with few codepoints per enabled table;
+`is_cheaper()` makes that choice.
+
+The index of all tables is written once to `INDEX_FILENAME` next to the table
+pack and memory-mapped read-only by every process that counts: worker processes
+attach to it instead of building it, and share its pages instead of holding a
+copy each. Restricting the enabled tables only filters the members of each class.
+
+Layout (little-endian):
+    8 bytes  magic b"CJKMINDX"
+    uint32   format version
+    uint32   header length
+    header   UTF-8 JSON: key, table and block IDs, class members, padded to 4 bytes
+    index    membership class of every codepoint, uint16 (or uint32 past 65536 classes)
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Iterable, Iterator, Sequence
+
+from .global_var import (
+    CJKTable,
+    DisplayCJKTablesList,
+    DisplayUnicodeBlocksList,
+    RangeTable,
+    get_counts_version,
+    tables_directory,
+)
+
+INDEX_MAGIC = b"CJKMINDX"
+INDEX_FORMAT_VERSION = 1
+INDEX_FILENAME = "membership-index.pack"
+INDEX_SIZE = 0x110000
+# codepoints looked up in the index for the cost of one table bitmap AND, as measured
+CODEPOINTS_PER_TABLE = 50
+
+_preamble = struct.Struct("<8sII")
+
+
+def _iter_runs(codepoints: Iterable[int]) -> Iterator[tuple[int, int]]:
+    """Yield the (start, end) ranges, end exclusive, of consecutive sorted `codepoints`."""
+    iterator = iter(codepoints)
+    for start in iterator:
+        end = start + 1
+        for codepoint in iterator:
+            if codepoint != end:
+                yield start, end
+                start = codepoint
+            end = codepoint + 1
+        yield start, end
+
+
+def _table_runs(table: CJKTable) -> Iterator[tuple[int, int]]:
+    if isinstance(table, RangeTable):
+        return ((start, end + 1) for start, end in table.ranges)
+    return _iter_runs(table.codepoints)
+
+
+class MembershipIndex:
+    def __init__(
+        self,
+        table_ids: list[str],
+        block_ids: list[str],
+        class_members: list[tuple[int, ...]],
+        index: array | memoryview,
+    ):
+        """
+        Args:
+            table_ids: The indexed CJK tables, members 0 to len(table_ids) - 1.
+            block_ids: The indexed Unicode blocks, the members after the tables.
+            class_members: Per membership class, the members it contains. Class 0 is empty.
+            index: Membership class of every codepoint from U+0000 to U+10FFFF,
+                an array or a view of a mapped index file.
+        """
+        self.table_ids = table_ids
+        self.block_ids = block_ids
+        self.class_members = class_members
+        self.index = index
+
+    @classmethod
+    def build(
+        cls,
+        tables: dict[str, CJKTable],
+        block_ids: Iterable[str],
+        block_segments: Iterable[tuple[int, int, tuple[str, ...]]],
+    ) -> "MembershipIndex":
+        """Index `tables` and the blocks of `block_segments` (see `DisplayUnicodeBlocksList`)."""
+        table_ids = list(tables)
+        block_ids = list(block_ids)
+        member_bits = {
+            member_id: 1 << i for i, member_id in enumerate(table_ids + block_ids)
+        }
+        # sweep the start (+bits) and end (-bits) of every run of every member
+        events = []
+        for table_id, table in tables.items():
+            bit = member_bits[table_id]
+            for start, end in _table_runs(table):
+                events.append((start, bit))
+                events.append((end, -bit))
+        for start, end, segment_block_ids in block_segments:
+            bits = sum(member_bits[block_id] for block_id in segment_block_ids)
+            events.append((start, bits))
+            events.append((end, -bits))
+        events.sort()
+
+        # membership bits -> class ID
+        classes = {0: 0}
+        segments = []
+        mask = 0
+        position = 0
+        for event_position, bits in events:
+            if event_position != position:
+                if mask:
+                    class_id = classes.setdefault(mask, len(classes))
+                    segments.append((position, event_position, class_id))
+                position = event_position
+            mask += bits
+
+        typecode = "H" if len(classes) <= 0x10000 else "I"
+        index = array(typecode, bytes(INDEX_SIZE * array(typecode).itemsize))
+        for start, end, class_id in segments:
+            index[start:end] = array(typecode, [class_id]) * (end - start)
+        member_count = len(member_bits)
+        class_members = [
+            tuple(i for i in range(member_count) if mask >> i & 1) for mask in classes
+        ]
+        return cls(table_ids, block_ids, class_members, index)
+
+    @classmethod
+    def attach(cls, index_path: Path, key: str) -> "MembershipIndex":
+        """Map an index written by `write()` read-only, without copying the codepoint index.
+
+        Raises:
+            OSError: the file cannot be read.
+            ValueError: the file is not an index of the current format, or not of `key`.
+        """
+        with open(index_path, "rb") as f:
+            # mmap raises ValueError for an empty file
+            index_mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(index_mmap) < _preamble.size:
+                raise ValueError(f"Truncated membership index: {index_path}")
+            magic, version, header_length = _preamble.unpack_from(index_mmap)
+            if magic != INDEX_MAGIC or version != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Unsupported membership index: {index_path}")
+            header_end = _preamble.size + header_length
+            header = json.loads(index_mmap[_preamble.size : header_end])
+            if header["key"] != key:
+                raise ValueError(f"Outdated membership index: {index_path}")
+            typecode = header["typecode"]
+            index_end = header_end + INDEX_SIZE * array(typecode).itemsize
+            if len(index_mmap) < index_end:
+                raise ValueError(f"Truncated membership index: {index_path}")
+        except ValueError:
+            index_mmap.close()
+            raise
+        # the view keeps the mapping open for the lifetime of the index
+        index = memoryview(index_mmap)[header_end:index_end]
+        if sys.byteorder == "little":
+            index = index.cast(typecode)
+        else:
+            index = array(typecode, index.tobytes())
+            index.byteswap()
+        return cls(
+            header["table_ids"],
+            header["block_ids"],
+            [tuple(members) for members in header["class_members"]],
+            index,
+        )
+
+    def write(self, index_path: Path, key: str):
+        """Write a built index to `index_path`, to be attached by `attach()` with the same `key`.
+
+        Raises:
+            OSError: the file cannot be written.
+        """
+        header = json.dumps(
+            {
+                "key": key,
+                "typecode": self.index.typecode,
+                "table_ids": self.table_ids,
+                "block_ids": self.block_ids,
+                "class_members": self.class_members,
+            }
+        ).encode("utf-8")
+        # pad so the index stays aligned
+        header += b" " * (-(_preamble.size + len(header)) % 4)
+        index = self.index
+        if sys.byteorder != "little":
+            index = array(index.typecode, index)
+            index.byteswap()
+
+        # several processes may build the index at once, each writes its own file
+        temp_path = index_path.with_name(f"{index_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(_preamble.pack(INDEX_MAGIC, INDEX_FORMAT_VERSION, len(header)))
+                f.write(header)
+                f.write(index)
+            os.replace(temp_path, index_path)
+        except OSError:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    def restrict(self, table_ids: list[str]) -> "MembershipIndex":
+        """The same index counting only `table_ids`, a subset of its tables, sharing the codepoint index."""
+        table_positions = {table_id: i for i, table_id in enumerate(self.table_ids)}
+        # old member -> new member, None for the dropped tables
+        new_members: list[int | None] = [None] * len(self.table_ids)
+        for i, table_id in enumerate(table_ids):
+            new_members[table_positions[table_id]] = i
+        new_members.extend(range(len(table_ids), len(table_ids) + len(self.block_ids)))
+        class_members = [
+            tuple(new_members[member] for member in members if new_members[member] is not None)
+            for members in self.class_members
+        ]
+        return MembershipIndex(table_ids, self.block_ids, class_members, self.index)
+
+    def count(self, codepoints: Sequence[int]) -> tuple[dict[str, int], dict[str, int]]:
+        """Count `codepoints` in every indexed table and block in one pass.
+
+        Returns:
+            The count per CJK table ID and the count per Unicode block ID.
+        """
+        member_counts = [0] * (len(self.table_ids) + len(self.block_ids))
+        for class_id, count in Counter(map(self.index.__getitem__, codepoints)).items():
+            for member in self.class_members[class_id]:
+                member_counts[member] += count
+        table_count = len(self.table_ids)
+        return (
+            dict(zip(self.table_ids, member_counts[:table_count])),
+            dict(zip(self.block_ids, member_counts[table_count:])),
+        )
+
+
+def is_cheaper(codepoint_count: int, table_count: int) -> bool:
+    """Whether counting a font of `codepoint_count` codepoints through the index beats per-table bitmaps."""
+    return codepoint_count < CODEPOINTS_PER_TABLE * table_count
+
+
+def build_full_index() -> MembershipIndex:
+    """Build the index of every CJK table, enabled or not, and all Unicode blocks."""
+    return MembershipIndex.build(
+        DisplayCJKTablesList.get_all_tables(enabled_only=False),
+        DisplayUnicodeBlocksList.get_ordered_blocks(),
+        DisplayUnicodeBlocksList.block_segments,
+    )
+
+
+# (counts version of all tables, index of all tables), attached or built on first use
+_full_index: tuple[str, MembershipIndex] | None = None
+# (counts version, index of the enabled tables)
+_index: tuple[str, MembershipIndex] | None = None
+
+
+def _get_full_index(build: bool) -> MembershipIndex | None:
+    global _full_index
+    key = get_counts_version(all_tables=True)
+    if _full_index is not None and _full_index[0] == key:
+        return _full_index[1]
+    index_path = tables_directory / INDEX_FILENAME
+    try:
+        index = MembershipIndex.attach(index_path, key)
+    except (OSError, ValueError):
+        if not build:
+            return None
+        index = build_full_index()
+        try:
+            index.write(index_path, key)
+            # use the mapped file, so its pages are shared with the other processes
+            index = MembershipIndex.attach(index_path, key)
+        except (OSError, ValueError):
+            # a read-only install directory only costs building the index in every process
+            pass
+    _full_index = (key, index)
+    return index
+
+
+def get_membership_index(build: bool = True) -> MembershipIndex | None:
+    """The index of the enabled CJK tables and all Unicode blocks, attached from its file when up to date.
+
+    Args:
+        build: Build and write the index when its file is missing or outdated, else
+            return None. Building takes about as long as counting a few thousand
+            tables, so one-off counts should not pay for it.
+    """
+    global _index
+    counts_version = get_counts_version()
+    if _index is None or _index[0] != counts_version:
+        full_index = _get_full_index(build)
+        if full_index is None:
+            return None
+        table_ids = list(DisplayCJKTablesList.get_all_tables())
+        if table_ids != full_index.table_ids:
+            full_index = full_index.restrict(table_ids)
+        _index = (counts_version, full_index)
+    return _index[1]
+
+
+if __name__ == "__main__":
+    index_path = tables_directory / INDEX_FILENAME
+    build_full_index().write(index_path, get_counts_version(all_tables=True))
+    print(f"Wrote the membership index to {index_path}")
@@ -0,0 +1,227 @@
+"""Stage-level timing of the counting pipeline.
+
+Code marks its stages with `with stage("cmap"):`. Nothing is measured unless a
+`Profiler` is active, in which case every finished stage becomes a
+`StageRecord` with its wall time, CPU time and net allocated blocks, and is
+passed to the profiler's hooks as soon as it ends:
+
+    with profiling.profile(hooks=[print]) as profiler:
+        FontInfoCollector(path).count_cjk_chars()
+    profiler.write_json(Path("profile.json"))
+
+Stages nest; a record's `path` joins the names of the enclosing stages with "/".
+
+Independently of profiling, `stage_listener()` lets the current thread follow
+the stages as they start, e.g. to report progress or to cancel the work by
+raising from the listener.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+
+class StageRecord:
+    def __init__(
+        self,
+        path: str,
+        wall_s: float,
+        cpu_s: float,
+        allocated_blocks: int,
+        error: str | None,
+    ):
+        """
+        Args:
+            path: Names of the enclosing stages and this stage, joined by "/".
+            wall_s: Wall-clock time.
+            cpu_s: CPU time of the thread running the stage.
+            allocated_blocks: Net change of allocated memory blocks (`sys.getallocatedblocks()`).
+            error: "Type: message" of the exception that ended the stage, if any.
+        """
+        self.path = path
+        self.wall_s = wall_s
+        self.cpu_s = cpu_s
+        self.allocated_blocks = allocated_blocks
+        self.error = error
+
+    @property
+    def name(self) -> str:
+        return self.path.rpartition("/")[2]
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "allocated_blocks": self.allocated_blocks,
+            "error": self.error,
+        }
+
+
+class Profiler:
+    def __init__(self, hooks: Iterable[Callable[[StageRecord], None]] = ()):
+        self.records: list[StageRecord] = []
+        self.hooks = list(hooks)
+        self._lock = threading.Lock()
+
+    def add_hook(self, hook: Callable[[StageRecord], None]):
+        """Call `hook` with every stage record from now on."""
+        self.hooks.append(hook)
+
+    def record(self, stage_record: StageRecord):
+        with self._lock:
+            self.records.append(stage_record)
+        for hook in self.hooks:
+            hook(stage_record)
+
+    def get_totals(self) -> dict[str, dict]:
+        """Sum the records of every stage path, e.g. the table counts of all fonts of a scan."""
+        totals = {}
+        for stage_record in self.records:
+            total = totals.setdefault(
+                stage_record.path,
+                {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "allocated_blocks": 0, "errors": 0},
+            )
+            total["calls"] += 1
+            total["wall_s"] += stage_record.wall_s
+            total["cpu_s"] += stage_record.cpu_s
+            total["allocated_blocks"] += stage_record.allocated_blocks
+            total["errors"] += stage_record.error is not None
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "stages": [stage_record.to_dict() for stage_record in self.records],
+            "totals": self.get_totals(),
+        }
+
+    def write_json(self, output_path: Path):
+        with output_path.open("w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# the profiler stages report to, None when profiling is off
+_active_profiler: Profiler | None = None
+# per-thread stack of enclosing stage names and stage listener
+_local = threading.local()
+
+
+class _Stage:
+    __slots__ = ("name", "profiler", "path", "wall_start", "cpu_start", "blocks_start")
+
+    def __init__(self, name: str, profiler: Profiler):
+        self.name = name
+        self.profiler = profiler
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.path = "/".join(stack)
+        self.blocks_start = sys.getallocatedblocks()
+        self.cpu_start = time.thread_time()
+        self.wall_start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        wall_s = time.perf_counter() - self.wall_start
+        cpu_s = time.thread_time() - self.cpu_start
+        allocated_blocks = sys.getallocatedblocks() - self.blocks_start
+        _local.stack.pop()
+        error = None
+        if exc_type is not None:
+            error = f"{exc_type.__name__}: {exc_value}"
+        self.profiler.record(StageRecord(self.path, wall_s, cpu_s, allocated_blocks, error))
+        return False
+
+
+def stage(name: str):
+    """Context manager measuring the enclosed code as stage `name`, free when profiling is off."""
+    listener = getattr(_local, "listener", None)
+    if listener is not None:
+        listener(name)
+    profiler = _active_profiler
+    if profiler is None:
+        return nullcontext()
+    return _Stage(name, profiler)
+
+
+@contextmanager
+def stage_listener(listener: Callable[[str], None]):
+    """Call `listener` with the name of every stage started by this thread in the `with` block.
+
+    An exception raised by `listener` propagates out of the stage, aborting the work.
+    """
+    previous_listener = getattr(_local, "listener", None)
+    _local.listener = listener
+    try:
+        yield
+    finally:
+        _local.listener = previous_listener
+
+
+@contextmanager
+def profile(
+    profiler: Profiler | None = None,
+    hooks: Iterable[Callable[[StageRecord], None]] = (),
+) -> Iterator[Profiler]:
+    """Activate `profiler` (or a new one) for the `with` block."""
+    global _active_profiler
+    if profiler is None:
+        profiler = Profiler(hooks)
+    else:
+        for hook in hooks:
+            profiler.add_hook(hook)
+    previous_profiler = _active_profiler
+    _active_profiler = profiler
+    try:
+        yield profiler
+    finally:
+        _active_profiler = previous_profiler
+
+
+@contextmanager
+def profile_to_files(json_path: Path | None = None, cprofile_path: Path | None = None):
+    """Profile the `with` block, writing stage records to `json_path` and a cProfile dump to `cprofile_path`.
+
+    Either path can be None to skip that output.
+    """
+    code_profiler = None
+    if cprofile_path is not None:
+        import cProfile
+
+        code_profiler = cProfile.Profile()
+    with profile() if json_path is not None else nullcontext() as profiler:
+        if code_profiler is not None:
+            code_profiler.enable()
+        try:
+            yield
+        finally:
+            if code_profiler is not None:
+                code_profiler.disable()
+                code_profiler.dump_stats(cprofile_path)
+            if profiler is not None:
+                profiler.write_json(json_path)
+
+
+def add_profile_arguments(parser: argparse.ArgumentParser):
+    """Add the --profile and --cprofile options, to be passed to `profile_to_files()`."""
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Write the wall/CPU time and allocations of every stage to this JSON file.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        default=None,
+        metavar="FILE",
+        help="Write a cProfile dump, readable with pstats/snakeviz, to this file.",
+    )
@@ -0,0 +1,187 @@
+"""Streaming multi-font reports: one row per font/face, written as results arrive.
+
+`CsvReportWriter` writes a wide CSV with a column per CJK table and Unicode
+block, `JsonlReportWriter` one JSON object per line and
+`write_html.HtmlReportWriter` one section per font, the last two with the
+missing characters of every table when the rows carry them. Rows are written and
+flushed one at a time, so a report of a whole library never sits in memory,
+and `open_report()` compresses with gzip when the file name ends in ".gz".
+`ReportSummary` aggregates the rows on the way through.
+"""
+
+import csv
+import gzip
+import io
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, TextIO
+
+from .batch_scan import get_fieldnames
+from .global_var import DisplayLanguage
+from .profiling import stage
+
+FORMATS = ("csv", "jsonl", "html")
+# gzip streams are flushed at most this often, every flush ends a deflate block
+GZIP_FLUSH_INTERVAL_S = 1.0
+
+
+def guess_format(output_path: Path | None) -> str:
+    """"jsonl" for *.jsonl, "html" for *.html (also gzipped), "csv" otherwise."""
+    if output_path is not None:
+        suffixes = [suffix.lower() for suffix in output_path.suffixes]
+        if suffixes[-1:] == [".gz"]:
+            suffixes = suffixes[:-1]
+        if suffixes[-1:] in ([".jsonl"], [".ndjson"]):
+            return "jsonl"
+        if suffixes[-1:] in ([".html"], [".htm"]):
+            return "html"
+    return "csv"
+
+
+def open_report(output_path: Path | None) -> tuple[TextIO, float]:
+    """Open `output_path` for writing a report, gzip-compressed for *.gz, standard output for None.
+
+    Returns:
+        The text stream and the interval it should be flushed at.
+    """
+    if output_path is None:
+        return sys.stdout, 0.0
+    if output_path.suffix.lower() == ".gz":
+        # newline="" lets csv module control newlines
+        return (
+            io.TextIOWrapper(gzip.open(output_path, "wb"), encoding="utf-8", newline=""),
+            GZIP_FLUSH_INTERVAL_S,
+        )
+    return output_path.open("w", encoding="utf-8", newline=""), 0.0
+
+
+class ReportWriter:
+    def __init__(self, output: TextIO, flush_interval: float = 0.0):
+        """
+        Args:
+            flush_interval: Seconds between flushes, 0 to flush after every row.
+        """
+        self.output = output
+        self.flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+
+    def write_row(self, row: dict):
+        with stage("report_write"):
+            self._write_row(row)
+            now = time.monotonic()
+            if now - self._last_flush >= self.flush_interval:
+                self.output.flush()
+                self._last_flush = now
+
+    def _write_row(self, row: dict):
+        raise NotImplementedError
+
+    def close(self):
+        self.output.flush()
+
+
+class CsvReportWriter(ReportWriter):
+    def __init__(self, output: TextIO, flush_interval: float = 0.0):
+        super().__init__(output, flush_interval)
+        # the missing characters are only written to JSONL
+        self._writer = csv.DictWriter(output, get_fieldnames(), extrasaction="ignore")
+        self._writer.writeheader()
+
+    def _write_row(self, row: dict):
+        self._writer.writerow(row)
+
+
+class JsonlReportWriter(ReportWriter):
+    def _write_row(self, row: dict):
+        self.output.write(json.dumps(row, ensure_ascii=False))
+        self.output.write("\n")
+
+
+def make_writer(
+    report_format: str,
+    output: TextIO,
+    flush_interval: float = 0.0,
+    lang: DisplayLanguage = DisplayLanguage.EN,
+) -> ReportWriter:
+    """
+    Args:
+        lang: Language of the table and block names, only used by the html format.
+
+    Raises:
+        ValueError: `report_format` is not one of `FORMATS`.
+    """
+    if report_format == "csv":
+        return CsvReportWriter(output, flush_interval)
+    if report_format == "jsonl":
+        return JsonlReportWriter(output, flush_interval)
+    if report_format == "html":
+        from . import write_html
+
+        return write_html.HtmlReportWriter(output, flush_interval, DisplayLanguage(lang))
+    raise ValueError(f"Unknown report format: {report_format}")
+
+
+class ReportSummary:
+    """Totals of a scan, in memory proportional to the number of columns, not of fonts."""
+
+    def __init__(self):
+        self.files = 0
+        self.faces = 0
+        self.errors = 0
+        # column -> [sum, max] over the faces counted successfully
+        self.columns: dict[str, list[int]] = {}
+        self._count_columns = get_fieldnames()[3:-1]
+        self._last_file = None
+
+    def add(self, row: dict):
+        # the rows of a file always follow each other
+        if row["file"] != self._last_file:
+            self.files += 1
+            self._last_file = row["file"]
+        self.faces += 1
+        if row["error"]:
+            self.errors += 1
+            return
+        for column in self._count_columns:
+            count = row.get(column)
+            if count is None:
+                continue
+            total = self.columns.setdefault(column, [0, 0])
+            total[0] += count
+            total[1] = max(total[1], count)
+
+    def to_dict(self) -> dict:
+        counted = self.faces - self.errors
+        return {
+            "files": self.files,
+            "faces": self.faces,
+            "errors": self.errors,
+            "columns": {
+                column: {
+                    "max": maximum,
+                    "mean": total / counted if counted else 0,
+                }
+                for column, (total, maximum) in self.columns.items()
+            },
+        }
+
+
+def write_rows(
+    rows: Iterable[dict], writer: ReportWriter, summary: ReportSummary | None = None
+) -> int:
+    """Stream result rows to `writer`, adding them to `summary` when given.
+
+    Returns:
+        The number of rows that failed to load.
+    """
+    errors = 0
+    for row in rows:
+        writer.write_row(row)
+        if summary is not None:
+            summary.add(row)
+        if row["error"]:
+            errors += 1
+    writer.close()
+    return errors
@@ -0,0 +1,306 @@
+"""Persistent cache of font counts, keyed by font file content.
+
+A row is keyed by the SHA-256 of the font file, the face number inside the file
+and `global_var.get_counts_version()`, so a renamed or copied font still hits
+and any change to the tables or block data misses. Each row keeps the font
+name, the cmap (codepoints and glyph IDs), the UVS pairs and both count
+dictionaries, which is everything needed to show a font again without parsing
+it. The database is bounded in size by evicting the least recently used rows.
+
+The total size of the rows is kept up to date by triggers in a one-row
+`cache_size` table, so an insert only reads that total. When it goes over the
+limit, the oldest rows are evicted in one batch down to `EVICT_TO` of the limit.
+
+A cache hit only reads: the last use of the rows read is written in batches,
+with the next insert, every `TOUCH_BATCH` hits, or when the cache is closed. A
+cache sent to worker processes is unpickled into one instance per process, so
+all the tasks of a worker share one connection.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from array import array
+from pathlib import Path
+
+from .cmap_reader import FontCmap
+from .global_var import main_directory
+
+
+
+def get_user_cache_directory() -> Path:
+    """The per-user cache directory of the package, where platformdirs would put it."""
+    if sys.platform == "win32":
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        base = Path(local_app_data) if local_app_data else Path.home() / "AppData" / "Local"
+        return base / "cjkcount" / "Cache"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "cjkcount"
+    xdg_cache_home = os.environ.get("XDG_CACHE_HOME")
+    # the XDG spec ignores relative paths
+    if xdg_cache_home and Path(xdg_cache_home).is_absolute():
+        return Path(xdg_cache_home) / "cjkcount"
+    return Path.home() / ".cache" / "cjkcount"
+
+
+# the frozen GUI build keeps its cache next to the program, an installed package
+# (often in a read-only site-packages) uses the user's cache directory
+if getattr(sys, "frozen", False):
+    DEFAULT_CACHE_PATH = main_directory / "cache" / "font-counts.sqlite"
+else:
+    DEFAULT_CACHE_PATH = get_user_cache_directory() / "font-counts.sqlite"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# eviction frees space down to this fraction of the limit, so it runs once per many inserts
+EVICT_TO = 0.9
+# cache hits whose last use is written in one transaction
+TOUCH_BATCH = 256
+# bumped with any change to _SCHEMA, which is only run on a database of another version
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    content_hash TEXT NOT NULL,
+    font_id INTEGER NOT NULL,
+    counts_version TEXT NOT NULL,
+    font_name TEXT,
+    codepoints BLOB NOT NULL,
+    glyph_ids BLOB NOT NULL,
+    uvs BLOB NOT NULL,
+    cjk_char_count TEXT NOT NULL,
+    unicode_char_count TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (content_hash, font_id, counts_version)
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+BEGIN IMMEDIATE;
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    total INTEGER NOT NULL
+);
+-- a cache written before the table existed is summed once
+INSERT OR IGNORE INTO cache_size SELECT 0, COALESCE(SUM(size), 0) FROM results;
+CREATE TRIGGER IF NOT EXISTS results_size_insert AFTER INSERT ON results BEGIN
+    UPDATE cache_size SET total = total + new.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_delete AFTER DELETE ON results BEGIN
+    UPDATE cache_size SET total = total - old.size;
+END;
+CREATE TRIGGER IF NOT EXISTS results_size_update AFTER UPDATE OF size ON results BEGIN
+    UPDATE cache_size SET total = total + new.size - old.size;
+END;
+PRAGMA user_version = 1;
+COMMIT;
+"""
+
+
+def hash_file(font_path: Path) -> str:
+    import hashlib
+
+    with open(font_path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def hash_data(font_data) -> str:
+    """Hash an already mapped or loaded font file, same as `hash_file()`."""
+    import hashlib
+
+    return hashlib.sha256(font_data).hexdigest()
+
+
+def _pack_uint32(values) -> bytes:
+    data = array("I", values)
+    if sys.byteorder != "little":
+        data.byteswap()
+    return zlib.compress(data.tobytes())
+
+
+def _unpack_uint32(blob: bytes) -> array:
+    data = array("I")
+    data.frombytes(zlib.decompress(blob))
+    if sys.byteorder != "little":
+        data.byteswap()
+    return data
+
+
+class CachedResult:
+    def __init__(
+        self,
+        font_cmap: FontCmap,
+        cjk_char_count: dict[str, int],
+        unicode_char_count: dict[str, int],
+    ):
+        self.font_cmap = font_cmap
+        self.cjk_char_count = cjk_char_count
+        self.unicode_char_count = unicode_char_count
+
+
+# the caches unpickled in this process, by (cache_path, max_bytes)
+_process_caches: dict[tuple[Path, int], "ResultCache"] = {}
+
+
+def _process_cache(cache_path: Path, max_bytes: int) -> "ResultCache":
+    """The cache of this process for `cache_path`, shared by every task unpickling it."""
+    key = (cache_path, max_bytes)
+    cache = _process_caches.get(key)
+    if cache is None:
+        cache = _process_caches[key] = ResultCache(cache_path, max_bytes)
+    return cache
+
+
+class ResultCache:
+    """SQLite-backed result cache, safe to share between threads and processes.
+
+    Any database error (read-only directory, locked or corrupt file) is treated as
+    a cache miss, so the cache can never make counting fail.
+    """
+
+    def __init__(self, cache_path: Path = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        # opened on first use, so the cache can be pickled into worker processes
+        self._connection = None
+        self._connection_pid = None
+        # (last_used, content_hash, font_id, counts_version) of the hits not written yet
+        self._touched = []
+        self._lock = threading.Lock()
+
+    def __reduce__(self):
+        return _process_cache, (self.cache_path, self.max_bytes)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None and self._connection_pid != os.getpid():
+            # inherited through fork, it still belongs to the parent
+            self._connection = None
+            self._touched = []
+        if self._connection is None:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(
+                self.cache_path, timeout=30, check_same_thread=False
+            )
+            try:
+                (schema_version,) = connection.execute("PRAGMA user_version").fetchone()
+                if schema_version != SCHEMA_VERSION:
+                    connection.execute("PRAGMA journal_mode=WAL")
+                    connection.executescript(_SCHEMA)
+            except sqlite3.Error:
+                connection.close()
+                raise
+            self._connection = connection
+            self._connection_pid = os.getpid()
+            # worker processes never call close(), the hits left are written on exit
+            from multiprocessing import util
+
+            util.Finalize(self, self.close, exitpriority=0)
+        return self._connection
+
+    def _write_touched(self, connection: sqlite3.Connection):
+        """Write the last use of the rows read since the last write, in the current transaction."""
+        touched, self._touched = self._touched, []
+        connection.executemany(
+            "UPDATE results SET last_used = ?"
+            " WHERE content_hash = ? AND font_id = ? AND counts_version = ?",
+            touched,
+        )
+
+    def get(self, content_hash: str, font_id: int, counts_version: str) -> CachedResult | None:
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT font_name, codepoints, glyph_ids, uvs, cjk_char_count, unicode_char_count"
+                    " FROM results WHERE content_hash = ? AND font_id = ? AND counts_version = ?",
+                    (content_hash, font_id, counts_version),
+                ).fetchone()
+                if row is None:
+                    return None
+                self._touched.append((time.time(), content_hash, font_id, counts_version))
+                if len(self._touched) >= TOUCH_BATCH:
+                    with connection:
+                        self._write_touched(connection)
+        except (OSError, sqlite3.Error):
+            return None
+        font_name, codepoints, glyph_ids, uvs, cjk_char_count, unicode_char_count = row
+        uvs = _unpack_uint32(uvs)
+        return CachedResult(
+            FontCmap(
+                font_name,
+                dict(zip(_unpack_uint32(codepoints), _unpack_uint32(glyph_ids))),
+                list(zip(uvs[::2], uvs[1::2])),
+            ),
+            json.loads(cjk_char_count),
+            json.loads(unicode_char_count),
+        )
+
+    def put(
+        self,
+        content_hash: str,
+        font_id: int,
+        counts_version: str,
+        font_cmap: FontCmap,
+        cjk_char_count: dict[str, int],
+        unicode_char_count: dict[str, int],
+    ):
+        codepoints = sorted(font_cmap.cmap)
+        row = (
+            font_cmap.font_name,
+            _pack_uint32(codepoints),
+            _pack_uint32(font_cmap.cmap[code] for code in codepoints),
+            _pack_uint32(value for pair in font_cmap.uvs for value in pair),
+            json.dumps(cjk_char_count),
+            json.dumps(unicode_char_count),
+        )
+        size = sum(len(value) for value in row if value is not None)
+        try:
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    self._write_touched(connection)
+                    # an upsert rather than INSERT OR REPLACE, whose implicit delete skips the triggers
+                    connection.execute(
+                        "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                        " ON CONFLICT (content_hash, font_id, counts_version) DO UPDATE SET"
+                        " font_name = excluded.font_name, codepoints = excluded.codepoints,"
+                        " glyph_ids = excluded.glyph_ids, uvs = excluded.uvs,"
+                        " cjk_char_count = excluded.cjk_char_count,"
+                        " unicode_char_count = excluded.unicode_char_count,"
+                        " size = excluded.size, last_used = excluded.last_used",
+                        (content_hash, font_id, counts_version, *row, size, time.time()),
+                    )
+                    (total_size,) = connection.execute(
+                        "SELECT total FROM cache_size"
+                    ).fetchone()
+                    if total_size > self.max_bytes:
+                        self._evict(connection, total_size - int(self.max_bytes * EVICT_TO))
+        except (OSError, sqlite3.Error):
+            pass
+
+    def _evict(self, connection: sqlite3.Connection, excess_bytes: int):
+        """Delete the least recently used rows, at least `excess_bytes` of them."""
+        # walks the last_used index from the oldest row, reading only the rows evicted
+        rows = connection.execute("SELECT rowid, size FROM results ORDER BY last_used, rowid")
+        evicted = []
+        for rowid, size in rows:
+            evicted.append((rowid,))
+            excess_bytes -= size
+            if excess_bytes <= 0:
+                break
+        rows.close()
+        connection.executemany("DELETE FROM results WHERE rowid = ?", evicted)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None and self._connection_pid == os.getpid():
+                try:
+                    if self._touched:
+                        with self._connection:
+                            self._write_touched(self._connection)
+                except sqlite3.Error:
+                    pass
+                self._connection.close()
+            self._connection = None
+            self._touched = []
@@ -0,0 +1,285 @@
+"""Precompiled binary pack of the `cjk-tables/*-han.txt` files.
+
+Layout (little-endian):
+    8 bytes  magic b"CJKTPACK"
+    uint32   format version
+    uint32   header length
+    header   UTF-8 JSON: source file stats/hashes and table metadata, padded to 4 bytes
+    data     sorted uint32 codepoints of every table, back to back
+    bitmaps  the codepoint bitmap of every table (see `codepoint_bitmap`), back to back
+
+Tables declared by codepoint ranges (frontmatter `ranges:`) keep their ranges in
+the header and take no space in the data.
+
+The pack is rebuilt automatically when a source file is added, removed, or its
+content changes; a changed mtime alone only triggers a hash check. An up-to-date
+pack is memory-mapped and each table's codepoints or bitmap are only copied out
+when the table is first used, so worker processes never rebuild the bitmaps.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import partial
+from pathlib import Path
+from typing import Callable
+
+from . import codepoint_bitmap
+
+PACK_MAGIC = b"CJKTPACK"
+PACK_FORMAT_VERSION = 3
+PACK_FILENAME = "cjk-tables.pack"
+SOURCE_GLOB = "*-han.txt"
+
+_preamble = struct.Struct("<8sII")
+
+
+def _file_hash(path: Path) -> str:
+    import hashlib
+
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def _source_stat(path: Path) -> dict:
+    stat = path.stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+class TablePack:
+    """A read-only, memory-mapped pack file."""
+
+    def __init__(self, pack_path: Path):
+        """
+        Raises:
+            OSError: the pack cannot be read.
+            ValueError: the file is not a pack of the current format version.
+        """
+        with open(pack_path, "rb") as f:
+            # mmap raises ValueError for an empty file
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if len(self._mmap) < _preamble.size:
+                raise ValueError(f"Truncated table pack: {pack_path}")
+            magic, version, header_length = _preamble.unpack_from(self._mmap)
+            if magic != PACK_MAGIC or version != PACK_FORMAT_VERSION:
+                raise ValueError(f"Unsupported table pack: {pack_path}")
+            header_end = _preamble.size + header_length
+            self.header: dict = json.loads(self._mmap[_preamble.size : header_end])
+        except ValueError:
+            self._mmap.close()
+            raise
+        self._data_offset = header_end
+        self._bitmaps_offset = header_end + self.header["data_length"] * 4
+        self.tables: dict[str, dict] = {
+            table["source"]: table for table in self.header["tables"]
+        }
+
+    def read_codepoints(self, offset: int, count: int) -> array:
+        start = self._data_offset + offset * 4
+        codepoints = array("I")
+        codepoints.frombytes(self._mmap[start : start + count * 4])
+        if sys.byteorder != "little":
+            codepoints.byteswap()
+        return codepoints
+
+    def read_bitmap(self, offset: int, length: int) -> int:
+        """Read a bitmap at byte `offset` of the bitmaps section."""
+        start = self._bitmaps_offset + offset
+        return int.from_bytes(self._mmap[start : start + length], "little")
+
+    def close(self):
+        self._mmap.close()
+
+
+def sources_digest(sources: dict[str, dict]) -> str:
+    """Return a digest identifying the content of all source files."""
+    import hashlib
+
+    digest = hashlib.sha256()
+    for filename, source in sorted(sources.items()):
+        digest.update(f"{filename}:{source['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_pack(pack_path: Path, sources: dict[str, dict], tables: list[dict]):
+    """Write `tables` (dicts with `source`, `id`, `name`, `cjk_group`, and `codepoints` or `ranges`) to a pack file.
+
+    Raises:
+        OSError: the pack cannot be written.
+    """
+    data = array("I")
+    bitmaps = bytearray()
+    table_headers = []
+    for table in tables:
+        table_header = {
+            "source": table["source"],
+            "id": table["id"],
+            "name": table["name"],
+            "cjk_group": table["cjk_group"],
+        }
+        if table.get("ranges") is not None:
+            table_header["ranges"] = [list(bounds) for bounds in table["ranges"]]
+        else:
+            table_header["offset"] = len(data)
+            table_header["count"] = len(table["codepoints"])
+            data.extend(table["codepoints"])
+            bitmap = codepoint_bitmap.from_codepoints(table["codepoints"])
+            bitmap_bytes = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+            table_header["bitmap_offset"] = len(bitmaps)
+            table_header["bitmap_length"] = len(bitmap_bytes)
+            bitmaps += bitmap_bytes
+        table_headers.append(table_header)
+    if sys.byteorder != "little":
+        data.byteswap()
+
+    header = json.dumps(
+        {
+            "digest": sources_digest(sources),
+            "sources": sources,
+            "tables": table_headers,
+            "data_length": len(data),
+        },
+        ensure_ascii=False,
+    ).encode("utf-8")
+    # pad so the codepoint data stays 4-byte aligned
+    header += b" " * (-(_preamble.size + len(header)) % 4)
+
+    # one temporary file per process, several may rebuild the pack at once
+    temp_path = pack_path.with_name(f"{pack_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temp_path, "wb") as f:
+            f.write(_preamble.pack(PACK_MAGIC, PACK_FORMAT_VERSION, len(header)))
+            f.write(header)
+            f.write(data.tobytes())
+            f.write(bitmaps)
+        os.replace(temp_path, pack_path)
+    except OSError:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def _table_record(
+    table: dict,
+    load_codepoints: Callable[[], array] | None,
+    load_bitmap: Callable[[], int] | None = None,
+) -> dict:
+    record = {
+        "source": table["source"],
+        "id": table["id"],
+        "name": table["name"],
+        "cjk_group": table["cjk_group"],
+    }
+    if table.get("ranges") is not None:
+        record["ranges"] = [tuple(bounds) for bounds in table["ranges"]]
+    else:
+        record["count"] = table["count"]
+        record["load_codepoints"] = load_codepoints
+        record["load_bitmap"] = load_bitmap
+    return record
+
+
+def _packed_table_record(pack: TablePack, table: dict) -> dict:
+    if table.get("ranges") is not None:
+        return _table_record(table, None)
+    return _table_record(
+        table,
+        partial(pack.read_codepoints, table["offset"], table["count"]),
+        partial(pack.read_bitmap, table["bitmap_offset"], table["bitmap_length"]),
+    )
+
+
+def load_tables(
+    source_dir: Path, parse_table: Callable[[Path], dict], force_rebuild: bool = False
+) -> tuple[str, list[dict]]:
+    """Load the metadata of all tables in `source_dir`, through its pack file whenever it is up to date.
+
+    Only file stats are checked when the pack is up to date, so no table file is read.
+    Otherwise tables whose source file changed are re-parsed with `parse_table`,
+    everything else is copied from the existing pack, and the pack is rewritten.
+    A read-only install directory only costs the re-parse, never an error.
+
+    Returns:
+        The digest of the source files, which changes whenever a table changes,
+        and table records with `source`, `id`, `name`, `cjk_group`, and either
+        `ranges` (inclusive codepoint ranges) or `count`, a `load_codepoints`
+        function returning the sorted codepoints as `array("I")` and a
+        `load_bitmap` function returning their bitmap, or None to build it.
+    """
+    pack_path = source_dir / PACK_FILENAME
+    pack = None
+    packed_sources = {}
+    if not force_rebuild:
+        try:
+            pack = TablePack(pack_path)
+            packed_sources = pack.header["sources"]
+        except (OSError, ValueError):
+            pass
+
+    dirty = False
+    sources = {}
+    for source_path in sorted(source_dir.glob(SOURCE_GLOB)):
+        filename = source_path.name
+        source = _source_stat(source_path)
+        packed_source = packed_sources.get(filename)
+        if (
+            packed_source is not None
+            and packed_source["size"] == source["size"]
+            and packed_source["mtime_ns"] == source["mtime_ns"]
+        ):
+            source["sha256"] = packed_source["sha256"]
+        else:
+            # only touched or new files reach here, hashing lets a touched file skip parsing
+            source["sha256"] = _file_hash(source_path)
+            dirty = True
+        sources[filename] = source
+    if sources.keys() != packed_sources.keys():
+        dirty = True
+
+    if not dirty:
+        # the pack stays mapped for the lifetime of the process
+        return pack.header["digest"], [
+            _packed_table_record(pack, pack.tables[filename]) for filename in sources
+        ]
+
+    tables = []
+    for filename, source in sources.items():
+        packed_source = packed_sources.get(filename)
+        if packed_source is not None and packed_source["sha256"] == source["sha256"]:
+            table = pack.tables[filename]
+            if table.get("ranges") is None:
+                codepoints = pack.read_codepoints(table["offset"], table["count"])
+                table = {**table, "codepoints": codepoints}
+        else:
+            table = {**parse_table(source_dir / filename), "source": filename}
+        tables.append(table)
+    if pack is not None:
+        # release the old mapping, it cannot be replaced while mapped on Windows
+        pack.close()
+    try:
+        write_pack(pack_path, sources, tables)
+    except OSError:
+        pass
+    return sources_digest(sources), [
+        _table_record(table, None)
+        if table.get("ranges") is not None
+        else _table_record(
+            {**table, "count": len(table["codepoints"])},
+            partial(array, "I", table["codepoints"]),
+        )
+        for table in tables
+    ]
+
+
+if __name__ == "__main__":
+    from .global_var import CJKTable, tables_directory
+
+    _, tables = load_tables(
+        tables_directory,
+        lambda filename: CJKTable.load(filename).to_record(),
+        force_rebuild=True,
+    )
+    print(f"Packed {len(tables)} tables into {tables_directory / PACK_FILENAME}")
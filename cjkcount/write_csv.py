@@ -1,11 +1,11 @@
-from global_var import (
+from .global_var import (
     DisplayCJKTablesList,
     CJKGroup,
     CJKTable,
     DisplayLanguage,
     DisplayUnicodeBlocksList,
 )
-from localise import get_localised_label
+from .localise import get_localised_label
 
 import csv
 from pathlib import Path
@@ -0,0 +1,229 @@
+from .global_var import (
+    DisplayCJKTablesList,
+    CJKGroup,
+    DisplayLanguage,
+    DisplayUnicodeBlocksList,
+    get_counts_version,
+)
+from .localise import get_localised_label
+from .report_writers import ReportWriter
+
+import html
+from functools import lru_cache
+from pathlib import Path
+from typing import TextIO
+
+_STYLE = """
+body { font-family: system-ui, sans-serif; margin: 2em; color: #222; }
+article { margin-bottom: 3em; }
+h1, h2 { font-weight: 600; }
+.file { color: #666; font-size: 0.9em; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+th, td { padding: 0.25em 0.75em; border-bottom: 1px solid #ddd; text-align: left; vertical-align: top; }
+td.num { text-align: right; font-variant-numeric: tabular-nums; }
+details .chars { max-width: 60em; word-break: break-all; line-height: 1.6; }
+"""
+
+
+class _Section:
+    def __init__(self, head: str, rows: list[tuple[str, str, str]]):
+        """
+        Args:
+            head: Heading and table header, up to the opening <tbody>.
+            rows: Per table/block: its ID, the row up to its count, and the cells after the count.
+        """
+        self.head = head
+        self.rows = rows
+
+
+class _Template:
+    """Every localised fragment of a report, escaped once and reused for every font."""
+
+    def __init__(self, lang: DisplayLanguage):
+        self.lang = lang
+        labels = get_localised_label(lang, "report")
+        self.missing_count = labels["missing_count"]
+        self.document_start = (
+            f'<!DOCTYPE html>\n<html lang="{_html_lang(lang)}">\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{html.escape(labels['title'])}</title>\n<style>{_STYLE}</style>\n"
+            f"</head>\n<body>\n<h1>{html.escape(labels['title'])}</h1>\n"
+        )
+        self.document_end = "</body>\n</html>\n"
+        header_cells = "".join(
+            f"<th>{html.escape(labels[key])}</th>" for key in ("name", "count", "full_size")
+        )
+        self.missing_header = f"<th>{html.escape(labels['missing'])}</th>"
+
+        cjk_output_order = [CJKGroup.FAN, CJKGroup.JIANFAN, CJKGroup.JIAN]
+        if lang == DisplayLanguage.ZHS:
+            cjk_output_order = [CJKGroup.JIAN, CJKGroup.JIANFAN, CJKGroup.FAN]
+        section_titles = get_localised_label(lang, "section_titles")
+        self.table_sections = []
+        for table_group in cjk_output_order:
+            tables = DisplayCJKTablesList.get_ordered_tables_in_group(table_group)
+            self.table_sections.append(
+                _Section(
+                    _section_head(section_titles[table_group], header_cells),
+                    [
+                        _row(table_id, table.localised_name(lang), table.count)
+                        for table_id, table in tables.items()
+                    ],
+                )
+            )
+
+        block_names = get_localised_label(lang, "unicode_blocks")
+        self.block_section = _Section(
+            _section_head(section_titles["uni"], header_cells),
+            [
+                _row(
+                    block_id,
+                    block_names.get(block.name, block.name),
+                    len(block.assigned_ranges),
+                )
+                for block_id, block in DisplayUnicodeBlocksList.get_ordered_blocks().items()
+            ],
+        )
+
+
+def _html_lang(lang: DisplayLanguage) -> str:
+    if lang == DisplayLanguage.ZHS:
+        return "zh-Hans"
+    if lang == DisplayLanguage.ZHT:
+        return "zh-Hant"
+    return "en"
+
+
+def _section_head(title: str, header_cells: str) -> str:
+    # the missing column header is added by the renderer when needed
+    return f"<h3>{html.escape(title)}</h3>\n<table>\n<thead><tr>{header_cells}"
+
+
+def _row(row_id: str, name: str, full_size: int) -> tuple[str, str, str]:
+    return (
+        row_id,
+        f'<tr><th scope="row">{html.escape(name)}</th><td class="num">',
+        f'</td><td class="num">{full_size}</td>',
+    )
+
+
+@lru_cache(maxsize=8)
+def _get_template(lang: DisplayLanguage, counts_version: str) -> _Template:
+    # keyed on the counts version too, so restricting or changing the tables builds a new template
+    return _Template(lang)
+
+
+def get_template(lang: DisplayLanguage) -> _Template:
+    return _get_template(lang, get_counts_version())
+
+
+def _render_section(
+    parts: list[str],
+    template: _Template,
+    section: _Section,
+    counts: dict[str, int],
+    missing_chars: dict[str, str] | None,
+):
+    parts.append(section.head)
+    if missing_chars is not None:
+        parts.append(template.missing_header)
+    parts.append("</tr></thead>\n<tbody>\n")
+    for row_id, row_start, row_end in section.rows:
+        parts.append(row_start)
+        parts.append(str(counts.get(row_id, 0)))
+        parts.append(row_end)
+        if missing_chars is not None:
+            missing = missing_chars.get(row_id, "")
+            parts.append("<td>")
+            if missing:
+                parts.append("<details><summary>")
+                parts.append(template.missing_count.format(len(missing)))
+                parts.append('</summary><div class="chars">')
+                parts.append(html.escape(missing))
+                parts.append("</div></details>")
+            parts.append("</td>")
+        parts.append("</tr>\n")
+    parts.append("</tbody>\n</table>\n")
+
+
+def render_font(
+    template: _Template,
+    font_name: str,
+    file_name: str,
+    cjk_char_count: dict[str, int],
+    unicode_char_count: dict[str, int],
+    missing_chars: dict[str, str] | None = None,
+) -> str:
+    """Render one font's section of a report.
+
+    Args:
+        missing_chars: Missing characters per CJK table ID, shown in collapsible lists when given.
+    """
+    parts = ["<article>\n"]
+    if font_name:
+        parts.append(f"<h2>{html.escape(font_name)}</h2>\n")
+    if file_name:
+        parts.append(f'<p class="file">{html.escape(file_name)}</p>\n')
+    for section in template.table_sections:
+        _render_section(parts, template, section, cjk_char_count, missing_chars)
+    # blocks have no missing lists
+    _render_section(parts, template, template.block_section, unicode_char_count, None)
+    parts.append("</article>\n")
+    return "".join(parts)
+
+
+class HtmlReportWriter(ReportWriter):
+    """Stream an HTML report of many fonts, one <article> per scan row."""
+
+    def __init__(
+        self,
+        output: TextIO,
+        flush_interval: float = 0.0,
+        lang: DisplayLanguage = DisplayLanguage.EN,
+    ):
+        super().__init__(output, flush_interval)
+        self.template = get_template(lang)
+        output.write(self.template.document_start)
+
+    def _write_row(self, row: dict):
+        if row["error"]:
+            self.output.write(
+                f'<article>\n<p class="file">{html.escape(row["file"])}</p>\n'
+                f"<p>{html.escape(row['error'])}</p>\n</article>\n"
+            )
+            return
+        file_name = row["file"]
+        if row["font_id"] != -1:
+            file_name += f" #{row['font_id']}"
+        self.output.write(
+            render_font(
+                self.template, row["font_name"], file_name, row, row, row.get("missing")
+            )
+        )
+
+    def close(self):
+        self.output.write(self.template.document_end)
+        super().close()
+
+
+def write(
+    output_fullpath: Path,
+    cjk_char_count,
+    unicode_char_count,
+    lang: DisplayLanguage,
+    missing_chars: dict[str, str] | None = None,
+    font_name: str = "",
+):
+    """Write a one-font HTML report, same as `write_csv.write()`.
+
+    Args:
+        missing_chars: Missing characters per CJK table ID, shown in collapsible lists when given.
+    """
+    template = get_template(lang)
+    with output_fullpath.open("w", encoding="utf-8") as output_file:
+        output_file.write(template.document_start)
+        output_file.write(
+            render_font(
+                template, font_name, "", cjk_char_count, unicode_char_count, missing_chars
+            )
+        )
+        output_file.write(template.document_end)
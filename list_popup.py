@@ -1,7 +1,7 @@
 from tkinter import *
 
-from localise import get_localised_label
-from global_var import DisplayLanguage
+from cjkcount.localise import get_localised_label
+from cjkcount.global_var import DisplayLanguage
 
 class ReusableListPopup:
     def __init__(self, master, lang: DisplayLanguage = DisplayLanguage.EN):
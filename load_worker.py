@@ -0,0 +1,78 @@
+"""Load and count a font in a background thread for the GUI.
+
+Tk must only be touched from the main thread, so a `LoadJob` never calls back
+into the GUI: it posts `(job, kind, payload)` messages to a queue which the GUI
+polls with `root.after()`. `kind` is one of:
+
+- "stage": payload is the name of the pipeline stage that just started: "read_cmap",
+  "extract_chars", then either one "table:<id>" per table and "unicode_blocks",
+  or "membership_index" when every table and block is counted in one pass
+- "done": payload is the counted `FontInfoCollector`
+- "error": payload is the exception that stopped loading
+- "cancelled": payload is None
+
+Cancelling is cooperative: the job stops when the next stage starts.
+"""
+
+import queue
+import threading
+from pathlib import Path
+
+from cjkcount.FontInfoCollector import FontInfoCollector
+from cjkcount.profiling import stage_listener
+from cjkcount.result_cache import ResultCache
+
+
+class LoadCancelled(Exception):
+    """The load job was cancelled."""
+
+
+class LoadJob:
+    def __init__(
+        self,
+        font_path: Path,
+        font_id: int,
+        messages: queue.Queue,
+        cache: ResultCache | None = None,
+    ):
+        self.font_path = font_path
+        self.font_id = font_id
+        self.messages = messages
+        self.cache = cache
+        self._cancelled = threading.Event()
+        # daemon, so closing the window never waits for a stale job
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def _on_stage(self, name: str):
+        if self._cancelled.is_set():
+            raise LoadCancelled
+        self.messages.put((self, "stage", name))
+
+    def _run(self):
+        try:
+            with stage_listener(self._on_stage):
+                if self.cache is not None:
+                    font = FontInfoCollector.load_cached(
+                        self.font_path, self.font_id, self.cache
+                    )
+                else:
+                    font = FontInfoCollector(self.font_path, self.font_id)
+                font.count_cjk_chars()
+        except LoadCancelled:
+            self.messages.put((self, "cancelled", None))
+        except Exception as e:
+            self.messages.put((self, "error", e))
+        else:
+            if self._cancelled.is_set():
+                self.messages.put((self, "cancelled", None))
+            else:
+                self.messages.put((self, "done", font))
@@ -1,22 +1,33 @@
 from tkinter import *
 from tkinter import filedialog as fd
 from tkinter import messagebox
+from tkinter import ttk
 
 import argparse
+import queue
 from pathlib import Path
+from typing import Callable
 from enum import StrEnum
 from pydantic import BaseModel
 import pyperclip
 
-import global_var
-from global_var import DisplayLanguage
+from cjkcount import global_var
+from cjkcount.global_var import DisplayLanguage
 import list_popup
-from localise import get_localised_label
-from FontInfoCollector import FontInfoCollector
+from cjkcount.localise import get_localised_label
+from cjkcount.cmap_reader import map_font_file
+from cjkcount.FontInfoCollector import select_face
+from load_worker import LoadJob
+from cjkcount.result_cache import ResultCache
+from cjkcount import profiling
+from cjkcount.profiling import stage
 
 
 __version__ = "0.50"
 
+# how often the main loop checks the background load job for news
+LOAD_POLL_INTERVAL_MS = 50
+
 
 class ColourTheme(StrEnum):
     LIGHT = "light"
@@ -168,6 +179,16 @@ class CJKApp:
         self.font_name = StringVar(self.root)
         # persisted last result
         self.last_font = None
+        # counts of previously opened fonts, reopening an unchanged font skips parsing
+        self.result_cache = ResultCache()
+        # font loading runs in a background LoadJob that reports through load_messages
+        self.load_job = None
+        self.load_messages = queue.Queue()
+        self.on_font_loaded = None
+        # stage name -> progress bar value of the current load job
+        self.load_milestones = {}
+        self.load_status = StringVar(self.root)
+        self.load_progress = IntVar(self.root)
 
         self._register_ui_fonts_by_language()
         self.build_ui()
@@ -177,11 +198,13 @@ class CJKApp:
             (".otf", ".ttf", ".woff", ".woff2", ".otc", ".ttc")
         ):
             try:
-                self.open_file(args.filename)
-                if args.report:
-                    self.save_csv()
+                self.open_file(
+                    args.filename, on_loaded=self.save_csv if args.report else None
+                )
             except Exception:
-                pass
+                from traceback import print_exc
+
+                print_exc()
 
     def _register_ui_fonts_by_language(self):
         """Attempt to register UI fonts for `lang` and set instance font tuples."""
@@ -264,6 +287,26 @@ class CJKApp:
         )
         btn.grid(column=2, row=0, sticky=E)
 
+        # Load progress, only shown while a font is loading
+        Label(
+            container, textvariable=self.load_status, justify="left", font=self.text_font
+        ).grid(column=0, row=1, sticky=W, columnspan=2)
+        self.load_progress_bar = ttk.Progressbar(
+            container,
+            variable=self.load_progress,
+            maximum=len(self.load_milestones) + 1,
+            mode="determinate",
+        )
+        self.load_progress_bar.grid(column=2, row=1, sticky=EW, columnspan=2)
+        self.load_cancel_button = Button(
+            container,
+            text=self._("Cancel"),
+            font=self.text_font,
+            command=self.cancel_loading,
+        )
+        self.load_cancel_button.grid(column=4, row=1, sticky=W, padx=5)
+        self._show_load_progress(self.load_job is not None)
+
         # Font Info display
         font_name_lbl = Label(
             container, textvariable=self.font_name, justify="left", font=self.text_font
@@ -524,7 +567,13 @@ class CJKApp:
         for label_var in self.unicode_label_var.values():
             label_var.set(0)
 
-    def open_file(self, filename_arg: str = None):
+    def open_file(
+        self, filename_arg: str = None, on_loaded: Callable[[], None] | None = None
+    ):
+        """Pick a font (and a face of a collection), then load and count it in the background.
+
+        `on_loaded` is called on the main thread once the counts are displayed.
+        """
         if filename_arg:
             filename = Path(filename_arg).resolve()
         else:
@@ -550,13 +599,14 @@ class CJKApp:
             return
 
         try:
-            self.last_font = FontInfoCollector.load_font(
-                filename,
-                ttc_method=lambda font_list: list_popup.ReusableListPopup(
-                    self.root, self.language_var.get()
-                ).get_index(font_list),
-            )
-            self._update_font_info_display()
+            with map_font_file(filename) as font_data:
+                # the collection face popup has to run on the main thread
+                font_id = select_face(
+                    font_data,
+                    ttc_method=lambda font_list: list_popup.ReusableListPopup(
+                        self.root, self.language_var.get()
+                    ).get_index(font_list),
+                )
         except ValueError:
             messagebox.showwarning(
                 title=self._("not_a_valid_font_file"),
@@ -564,25 +614,130 @@ class CJKApp:
             )
             return
 
-        # reset counters
-        self._reset_counts()
+        self._start_load_job(filename, font_id, on_loaded)
+
+    def _start_load_job(
+        self, font_path: Path, font_id: int, on_loaded: Callable[[], None] | None
+    ):
+        # a newly opened font makes the job still loading stale
+        polling = self.load_job is not None
+        if polling:
+            self.load_job.cancel()
+        self.load_job = LoadJob(
+            font_path, font_id, self.load_messages, cache=self.result_cache
+        )
+        self.on_font_loaded = on_loaded
+
+        table_ids = global_var.DisplayCJKTablesList.get_all_tables().keys()
+        self.load_milestones = {
+            "read_cmap": 1,
+            "extract_chars": 2,
+            # small fonts count every table and block in this one stage instead
+            "membership_index": 3,
+            **{f"table:{table_id}": 3 + i for i, table_id in enumerate(table_ids)},
+            "unicode_blocks": 3 + len(table_ids),
+        }
+        self.load_progress_bar.configure(maximum=len(self.load_milestones) + 1)
+        self.load_progress.set(0)
+        self.load_status.set(self._("progress.read_cmap"))
+        self._show_load_progress(True)
+
+        self.load_job.start()
+        if not polling:
+            self.root.after(LOAD_POLL_INTERVAL_MS, self._poll_load_job)
+
+    def cancel_loading(self):
+        if self.load_job is not None:
+            self.load_job.cancel()
+
+    def _show_load_progress(self, visible: bool):
+        if visible:
+            self.load_progress_bar.grid()
+            self.load_cancel_button.grid()
+        else:
+            self.load_progress_bar.grid_remove()
+            self.load_cancel_button.grid_remove()
 
-        # import and count
-        cjk_char_count, unicode_char_count = self.last_font.count_cjk_chars()
-
-        for cjk_enc in global_var.DisplayCJKTablesList.get_all_tables().keys():
-            if cjk_enc in self.cjk_label_var:
-                self.cjk_label_var[cjk_enc].set(cjk_char_count.get(cjk_enc, 0))
-        for (
-            unicode_enc
-        ) in global_var.DisplayUnicodeBlocksList.get_ordered_blocks().keys():
-            self.unicode_label_var[unicode_enc].set(
-                unicode_char_count.get(unicode_enc, 0)
+    def _poll_load_job(self):
+        """Handle the messages of the current load job, ignoring those of cancelled stale jobs."""
+        while True:
+            try:
+                job, kind, payload = self.load_messages.get_nowait()
+            except queue.Empty:
+                break
+            if job is not self.load_job:
+                continue
+            if kind == "stage":
+                self._on_load_stage(payload)
+                continue
+
+            self.load_job = None
+            self._show_load_progress(False)
+            if kind == "done":
+                self.load_status.set("")
+                self._on_font_counted(payload)
+                if self.on_font_loaded is not None:
+                    self.on_font_loaded()
+            elif kind == "cancelled":
+                self.load_status.set(self._("progress.cancelled"))
+            else:
+                self.load_status.set("")
+                if not isinstance(payload, (ValueError, OSError)):
+                    from traceback import print_exception
+
+                    print_exception(payload)
+                messagebox.showwarning(
+                    title=self._("not_a_valid_font_file"),
+                    message=self._("not_a_valid_font_file_message"),
+                )
+            break
+
+        if self.load_job is not None:
+            self.root.after(LOAD_POLL_INTERVAL_MS, self._poll_load_job)
+
+    def _on_load_stage(self, stage_name: str):
+        if stage_name in self.load_milestones:
+            self.load_progress.set(self.load_milestones[stage_name])
+        if stage_name in ("hash", "cache_lookup"):
+            self.load_status.set(self._("progress.cache"))
+        elif stage_name == "read_cmap":
+            self.load_status.set(self._("progress.read_cmap"))
+        elif stage_name == "extract_chars":
+            self.load_status.set(self._("progress.extract_chars"))
+        elif stage_name.startswith("table:"):
+            table = global_var.DisplayCJKTablesList.get_all_tables().get(
+                stage_name.removeprefix("table:")
             )
+            if table is not None:
+                self.load_status.set(
+                    self._("progress.table").format(
+                        table.localised_name(self.language_var.get())
+                    )
+                )
+        elif stage_name == "unicode_blocks":
+            self.load_status.set(self._("progress.unicode_blocks"))
+        elif stage_name == "membership_index":
+            self.load_status.set(self._("progress.all_tables"))
 
-        # 猫啃网专用HTML模板
-        # import write_html
-        # write_html.write(filename.name, cjk_char_count, unicode_char_count)
+    def _on_font_counted(self, font):
+        self.last_font = font
+        self._update_font_info_display()
+
+        # reset counters
+        self._reset_counts()
+        cjk_char_count = font.cjk_char_count
+        unicode_char_count = font.unicode_char_count
+
+        with stage("update_labels"):
+            for cjk_enc in global_var.DisplayCJKTablesList.get_all_tables().keys():
+                if cjk_enc in self.cjk_label_var:
+                    self.cjk_label_var[cjk_enc].set(cjk_char_count.get(cjk_enc, 0))
+            for (
+                unicode_enc
+            ) in global_var.DisplayUnicodeBlocksList.get_ordered_blocks().keys():
+                self.unicode_label_var[unicode_enc].set(
+                    unicode_char_count.get(unicode_enc, 0)
+                )
 
     def save_csv(self):
         if self.last_font is None or self.font_name.get() == self._("no_file_selected"):
@@ -605,17 +760,30 @@ class CJKApp:
         if not save_file_path:
             return
 
-        write_module = None
         # convert to resolved Path
         save_file_path = Path(save_file_path).resolve()
         if save_file_path.suffix.lower() == ".html":
-            import write_html
-
-            write_module = write_html.write
+            from cjkcount import write_html
+
+            with stage("report_write"):
+                write_html.write(
+                    save_file_path,
+                    self.last_font.cjk_char_count,
+                    self.last_font.unicode_char_count,
+                    self.language_var.get(),
+                    missing_chars=self.last_font.get_missing_chars(),
+                    font_name=self.last_font.font_name,
+                )
         elif save_file_path.suffix.lower() == ".csv":
-            import write_csv
-
-            write_module = write_csv.write
+            from cjkcount import write_csv
+
+            with stage("report_write"):
+                write_csv.write(
+                    save_file_path,
+                    self.last_font.cjk_char_count,
+                    self.last_font.unicode_char_count,
+                    self.language_var.get(),
+                )
         else:
             messagebox.showwarning(
                 title=self._("invalid_file_extension"),
@@ -623,13 +791,6 @@ class CJKApp:
             )
             return
 
-        write_module(
-            save_file_path,
-            self.last_font.cjk_char_count,
-            self.last_font.unicode_char_count,
-            self.language_var.get(),
-        )
-
         messagebox.showinfo(
             title=self._("report_saved"),
             message=self._("report_saved_message").format(save_file_path),
@@ -643,24 +804,24 @@ class CJKApp:
         if not table:
             return
 
-        # get diff
+        # get diff, the characters are only built here, counting never needs them
         copying_style = ""
-        result_set = set()
+        result_chars = ""
         if self.settings_mgr.copy_type_on_click == CopyTypeOnClick.MISSING_CHARACTERS:
             # copy missing characters
-            result_set = table.get_diff(self.last_font.char_list)
+            result_chars = table.get_missing_chars(self.last_font.char_bitmap)
             copying_style = "missing"
         else:
             # copy characters in font and encoding
-            result_set = table.get_overlap(self.last_font.char_list)
+            result_chars = table.get_overlap_chars(self.last_font.char_bitmap)
             copying_style = "overlap"
-        pyperclip.copy("".join(sorted(result_set)))
+        pyperclip.copy(result_chars)
 
         # popup message
         messagebox.showinfo(
             title=self._("copied_to_clipboard"),
             message=self._("copied_to_clipboard_message_" + copying_style).format(
-                count=len(result_set),
+                count=len(result_chars),
             ),
         )
 
@@ -684,9 +845,12 @@ parser.add_argument(
     default=False,
     help="Output a .txt file with CSV structure under cjk_report folder.",
 )
+profiling.add_profile_arguments(parser)
 args = parser.parse_args()
 
 
 if __name__ == "__main__":
-    app = CJKApp(args)
-    app.run()
+    # stage timings are written when the window is closed
+    with profiling.profile_to_files(args.profile, args.cprofile):
+        app = CJKApp(args)
+        app.run()
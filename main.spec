@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[("cjk-tables/*.txt","cjk-tables"), ("readme.txt","."), ("LICENSE","."), ("appicon.ico","."), ("GenYoGothicTW-R.ttf","."), ("cjk-char-header.ttf",".")],
+    datas=[("cjkcount/cjk-tables/*.txt","cjkcount/cjk-tables"), ("cjkcount/cjk-tables/cjk-tables.pack","cjkcount/cjk-tables"), ("cjkcount/cjk-tables/membership-index.pack","cjkcount/cjk-tables"), ("readme.txt","."), ("LICENSE","."), ("appicon.ico","."), ("GenYoGothicTW-R.ttf","."), ("cjk-char-header.ttf",".")],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import pytest
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTCollection, TTFont
+
+from cjkcount.global_var import CountingOptions, DisplayCJKTablesList
+
+
+def build_font(codepoints: list[int], full_name: str) -> TTFont:
+    """A TrueType font mapping every codepoint to one square glyph."""
+    glyph_order = [".notdef", "square"]
+    builder = FontBuilder(1000, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap({code: "square" for code in codepoints})
+    pen = TTGlyphPen(None)
+    pen.moveTo((100, 100))
+    pen.lineTo((100, 900))
+    pen.lineTo((900, 900))
+    pen.closePath()
+    glyph = pen.glyph()
+    builder.setupGlyf({name: glyph for name in glyph_order})
+    builder.setupHorizontalMetrics({name: (1000, 100) for name in glyph_order})
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({"familyName": full_name, "styleName": "Regular"})
+    builder.font["name"].setName(full_name, 4, 3, 1, 0x409)
+    builder.setupOS2()
+    builder.setupPost()
+    return builder.font
+
+
+@pytest.fixture
+def font_path(tmp_path: Path) -> Path:
+    """A single font with 100 CJK Unified Ideographs."""
+    path = tmp_path / "single.ttf"
+    build_font(list(range(0x4E00, 0x4E64)), "Single").save(path)
+    return path
+
+
+@pytest.fixture
+def collection_path(tmp_path: Path) -> Path:
+    """A two-face collection, the second face maps 50 fewer ideographs."""
+    path = tmp_path / "collection.ttc"
+    collection = TTCollection()
+    collection.fonts.append(build_font(list(range(0x4E00, 0x4E64)), "Face A"))
+    collection.fonts.append(build_font(list(range(0x4E00, 0x4E32)), "Face B"))
+    collection.save(path)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def default_counting():
+    """Every test starts counting all tables in the default mode."""
+    DisplayCJKTablesList.restrict_tables(None)
+    CountingOptions.real_glyphs_only = False
+    yield
+    DisplayCJKTablesList.restrict_tables(None)
+    CountingOptions.real_glyphs_only = False
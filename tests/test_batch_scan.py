@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import pytest
+
+from cjkcount import batch_scan
+from cjkcount.FontInfoCollector import FontInfoCollector
+from cjkcount.global_var import get_counts_version
+from cjkcount.result_cache import ResultCache, hash_file
+
+
+def test_scan_font_file(collection_path: Path):
+    rows = batch_scan.scan_font_file(collection_path)
+    assert [(row["font_id"], row["font_name"], row["error"]) for row in rows] == [
+        (0, "Face A", ""),
+        (1, "Face B", ""),
+    ]
+    assert [row["CJK_UNIFIED_IDEOGRAPHS"] for row in rows] == [100, 50]
+
+
+def test_damaged_font_gives_one_error_row(tmp_path: Path):
+    font_path = tmp_path / "damaged.ttf"
+    font_path.write_bytes(b"\x00\x01\x00\x00" + bytes(8))
+    (row,) = batch_scan.scan_font_file(font_path)
+    assert row["font_id"] == -1
+    assert row["error"]
+
+
+def test_unexpected_errors_are_not_hidden(font_path: Path, monkeypatch: pytest.MonkeyPatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(FontInfoCollector, "load_all_faces", broken)
+    with pytest.raises(RuntimeError):
+        batch_scan.scan_font_file(font_path)
+
+
+def test_collection_retry_uses_cache(
+    tmp_path: Path, collection_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    def damaged(*args, **kwargs):
+        raise ValueError("damaged")
+
+    monkeypatch.setattr(FontInfoCollector, "load_all_faces", damaged)
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    rows = batch_scan.scan_font_file(collection_path, cache)
+    assert [row["CJK_UNIFIED_IDEOGRAPHS"] for row in rows] == [100, 50]
+    content_hash = hash_file(collection_path)
+    for font_id in (0, 1):
+        assert cache.get(content_hash, font_id, get_counts_version()) is not None
+    cache.close()
+
+
+def test_damaged_collection_header(tmp_path: Path):
+    font_path = tmp_path / "damaged.ttc"
+    font_path.write_bytes(b"ttcf\x00\x01\x00\x00\xff\xff\xff\xff")
+    (row,) = batch_scan.scan_font_file(font_path)
+    assert row["error"]
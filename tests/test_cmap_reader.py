@@ -0,0 +1,138 @@
+from pathlib import Path
+
+import pytest
+from conftest import build_font
+from fontTools.ttLib import TTCollection, TTFont
+from fontTools.ttLib.tables._c_m_a_p import CmapSubtable
+
+from cjkcount.cmap_reader import (
+    FontCmap,
+    UnsupportedFont,
+    read_all_font_cmaps,
+    read_font_cmap,
+    read_font_ids,
+)
+
+
+def test_read_font_ids(font_path: Path, collection_path: Path):
+    assert read_font_ids(font_path.read_bytes()) == [-1]
+    assert read_font_ids(collection_path.read_bytes()) == [0, 1]
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        # more fonts than the file has offsets for
+        b"ttcf\x00\x01\x00\x00\xff\xff\xff\xff",
+        # a font offset past the end of the file
+        b"ttcf\x00\x01\x00\x00\x00\x00\x00\x01\x7f\xff\xff\xff",
+    ],
+)
+def test_damaged_collection_header(header: bytes):
+    with pytest.raises(UnsupportedFont):
+        read_font_ids(header)
+    with pytest.raises(UnsupportedFont):
+        read_all_font_cmaps(header)
+
+
+def _subtable(format: int, platform_id: int, encoding_id: int, cmap: dict) -> CmapSubtable:
+    subtable = CmapSubtable.newSubtable(format)
+    subtable.platformID = platform_id
+    subtable.platEncID = encoding_id
+    subtable.language = 0
+    subtable.cmap = cmap
+    return subtable
+
+
+def _uvs_subtable(uvs: dict[int, list[tuple[int, str | None]]]) -> CmapSubtable:
+    subtable = _subtable(14, 0, 5, {})
+    subtable.uvsDict = uvs
+    return subtable
+
+
+def _build_with_cmap(subtables: list[CmapSubtable], full_name: str) -> TTFont:
+    font = build_font([], full_name)
+    glyph_order = [".notdef", "square", *(f"g{i}" for i in range(8))]
+    font.setGlyphOrder(glyph_order)
+    font["glyf"].glyphOrder = glyph_order
+    for name in glyph_order[2:]:
+        font["glyf"][name] = font["glyf"]["square"]
+        font["hmtx"][name] = font["hmtx"]["square"]
+    font["maxp"].numGlyphs = len(glyph_order)
+    font["cmap"].tables = subtables
+    return font
+
+
+def _expected(font: TTFont) -> tuple[str, dict[int, int], set[tuple[int, int]]]:
+    """The full name, glyph ID cmap and UVS pairs fontTools reads from `font`."""
+    cmap = {code: font.getGlyphID(name) for code, name in font.getBestCmap().items()}
+    uvs_subtable = font["cmap"].getcmap(0, 5)
+    uvs = set()
+    if uvs_subtable is not None:
+        uvs = {
+            (base, selector)
+            for selector, mappings in uvs_subtable.uvsDict.items()
+            for base, _ in mappings
+        }
+    return (
+        font["name"].getBestFullName(),
+        {code: gid for code, gid in cmap.items() if gid},
+        uvs,
+    )
+
+
+def _assert_same_as_fonttools(font_cmap: FontCmap, font: TTFont):
+    font_name, cmap, uvs = _expected(font)
+    assert font_cmap.font_name == font_name
+    assert font_cmap.cmap == cmap
+    assert set(font_cmap.uvs) == uvs
+    assert len(font_cmap.uvs) == len(uvs)
+
+
+BMP_CMAP = {code: f"g{code % 8}" for code in [*range(0x4E00, 0x4E40), 0x9FA5, 0x3007]}
+FULL_CMAP = {**BMP_CMAP, **{code: f"g{code % 8}" for code in range(0x20000, 0x20020)}}
+# ranges of codepoints sharing one glyph, as in a last resort font
+MANY_TO_ONE_CMAP = {
+    **dict.fromkeys(range(0x4E00, 0x9FA6), "g1"),
+    **dict.fromkeys(range(0x20000, 0x2A6E0), "g2"),
+}
+
+
+@pytest.mark.parametrize(
+    "subtables",
+    [
+        pytest.param(lambda: [_subtable(4, 3, 1, BMP_CMAP)], id="format4"),
+        pytest.param(
+            lambda: [_subtable(4, 3, 1, BMP_CMAP), _subtable(12, 3, 10, FULL_CMAP)], id="format12"
+        ),
+        pytest.param(lambda: [_subtable(13, 3, 10, MANY_TO_ONE_CMAP)], id="format13"),
+        pytest.param(
+            lambda: [
+                _subtable(4, 3, 1, BMP_CMAP),
+                _uvs_subtable({0xFE00: [(0x4E00, None), (0x4E01, "g5")], 0xE0100: [(0x9FA5, None)]}),
+            ],
+            id="format14",
+        ),
+    ],
+)
+def test_same_as_fonttools(tmp_path: Path, subtables):
+    path = tmp_path / "font.ttf"
+    _build_with_cmap(subtables(), "Cmap Test").save(path)
+    font = TTFont(path)
+    _assert_same_as_fonttools(read_font_cmap(path.read_bytes()), font)
+
+
+def test_collection_same_as_fonttools(tmp_path: Path):
+    path = tmp_path / "collection.ttc"
+    collection = TTCollection()
+    collection.fonts.append(_build_with_cmap([_subtable(4, 3, 1, BMP_CMAP)], "Face A"))
+    collection.fonts.append(
+        _build_with_cmap(
+            [_subtable(12, 3, 10, FULL_CMAP), _uvs_subtable({0xFE00: [(0x4E00, None)]})], "Face B"
+        )
+    )
+    collection.save(path)
+    font_cmaps = read_all_font_cmaps(path.read_bytes())
+    assert sorted(font_cmaps) == [0, 1]
+    for font_id, font in enumerate(TTCollection(path).fonts):
+        _assert_same_as_fonttools(font_cmaps[font_id], font)
@@ -0,0 +1,70 @@
+import socket
+import threading
+from pathlib import Path
+
+import pytest
+
+from cjkcount import count_client
+from cjkcount.batch_scan import get_fieldnames, scan_font_file
+from cjkcount.count_server import CountService, serve
+
+pytestmark = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix domain sockets")
+
+
+def _serve_in_thread(socket_path: Path) -> tuple[threading.Thread, list]:
+    started = threading.Event()
+    servers = []
+
+    def on_ready(ready_servers):
+        servers.extend(ready_servers)
+        started.set()
+
+    thread = threading.Thread(
+        target=serve,
+        args=(CountService(jobs=1),),
+        kwargs={"host": None, "socket_path": socket_path, "quiet": True, "on_ready": on_ready},
+    )
+    thread.start()
+    assert started.wait(30)
+    return thread, servers
+
+
+def test_unix_socket_round_trip(tmp_path: Path, collection_path: Path, font_path: Path):
+    socket_path = tmp_path / "count.sock"
+    # left by a server that was killed, nobody listens on it
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(str(socket_path))
+    stale.close()
+
+    thread, servers = _serve_in_thread(socket_path)
+    try:
+        fieldnames, rows = count_client.count(
+            [str(collection_path), str(font_path)], socket_path=str(socket_path)
+        )
+        with pytest.raises(count_client.ServiceError):
+            count_client.count([], socket_path=str(tmp_path / "missing.sock"))
+    finally:
+        servers[0].shutdown()
+        thread.join()
+    assert fieldnames == get_fieldnames()
+    assert rows == [*scan_font_file(collection_path), *scan_font_file(font_path)]
+    # removed on shutdown
+    assert not socket_path.exists()
+
+
+def test_file_at_socket_path_left_alone(tmp_path: Path):
+    socket_path = tmp_path / "count.sock"
+    socket_path.write_text("not a socket")
+    with pytest.raises(OSError, match="not a socket"):
+        serve(CountService(jobs=1), host=None, socket_path=socket_path)
+    assert socket_path.read_text() == "not a socket"
+
+
+def test_live_socket_left_alone(tmp_path: Path):
+    socket_path = tmp_path / "count.sock"
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as live:
+        live.bind(str(socket_path))
+        live.listen()
+        with pytest.raises(OSError, match="in use"):
+            serve(CountService(jobs=1), host=None, socket_path=socket_path)
+        assert socket_path.exists()
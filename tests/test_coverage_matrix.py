@@ -0,0 +1,93 @@
+import ast
+import csv
+import io
+import sys
+from array import array
+from pathlib import Path
+
+import pytest
+
+from cjkcount.batch_scan import scan_font_file
+from cjkcount.coverage_matrix import CoverageMatrix, get_column_bitmaps, iter_coverages
+from cjkcount.global_var import DisplayCJKTablesList, DisplayUnicodeBlocksList
+
+
+@pytest.fixture
+def matrix(collection_path: Path, font_path: Path) -> CoverageMatrix:
+    faces = []
+    for _, file_faces, error in iter_coverages([collection_path.parent], jobs=1):
+        assert not error
+        faces.extend(file_faces)
+    return CoverageMatrix.compute(faces)
+
+
+def _read_npy(data: bytes) -> tuple[dict, array]:
+    assert data[:8] == b"\x93NUMPY\x01\x00"
+    header_length = int.from_bytes(data[8:10], "little")
+    data_offset = 10 + header_length
+    assert data_offset % 64 == 0
+    header = data[10:data_offset]
+    assert header.endswith(b"\n")
+    values = array("I")
+    values.frombytes(data[data_offset:])
+    if sys.byteorder != "little":
+        values.byteswap()
+    return ast.literal_eval(header.decode("latin1")), values
+
+
+def test_columns_and_rows(matrix: CoverageMatrix, collection_path: Path, font_path: Path):
+    table_ids = list(DisplayCJKTablesList.get_all_tables())
+    block_ids = list(DisplayUnicodeBlocksList.get_ordered_blocks())
+    assert matrix.column_ids == list(get_column_bitmaps()) == table_ids + block_ids
+    # faces in file order, the faces of a collection in font number order
+    assert [(face.font_path, face.font_id) for face in matrix.faces] == [
+        (collection_path, 0),
+        (collection_path, 1),
+        (font_path, -1),
+    ]
+    assert matrix.shape == (3, len(table_ids) + len(block_ids))
+    assert matrix.column("CJK_UNIFIED_IDEOGRAPHS") == [100, 50, 100]
+    # the same counts as a scan
+    scan_rows = [*scan_font_file(collection_path), *scan_font_file(font_path)]
+    for row, scan_row in zip(matrix.rows, scan_rows):
+        assert list(row) == [scan_row[column_id] for column_id in matrix.column_ids]
+
+
+def test_restricted_tables(font_path: Path):
+    DisplayCJKTablesList.restrict_tables(["gb2312"])
+    faces = [face for _, file_faces, _ in iter_coverages([font_path]) for face in file_faces]
+    matrix = CoverageMatrix.compute(faces)
+    assert matrix.column_ids[0] == "gb2312"
+    assert matrix.column_ids[1:] == list(DisplayUnicodeBlocksList.get_ordered_blocks())
+
+
+def test_write_csv(matrix: CoverageMatrix):
+    output = io.StringIO(newline="")
+    matrix.write_csv(output)
+    read_rows = list(csv.reader(io.StringIO(output.getvalue(), newline="")))
+    assert read_rows[0] == ["file", "font_id", "font_name", *matrix.column_ids]
+    assert [row[1:3] for row in read_rows[1:]] == [["0", "Face A"], ["1", "Face B"], ["-1", "Single"]]
+    assert [list(map(int, row[3:])) for row in read_rows[1:]] == [list(row) for row in matrix.rows]
+
+
+def test_write_npy(matrix: CoverageMatrix):
+    output = io.BytesIO()
+    matrix.write_npy(output)
+    header, values = _read_npy(output.getvalue())
+    assert header == {"descr": "<u4", "fortran_order": False, "shape": matrix.shape}
+    # row-major, one row per face
+    columns = matrix.shape[1]
+    assert [list(values[i : i + columns]) for i in range(0, len(values), columns)] == [
+        list(row) for row in matrix.rows
+    ]
+
+
+def test_npy_loads_in_numpy(matrix: CoverageMatrix):
+    numpy = pytest.importorskip("numpy")
+    output = io.BytesIO()
+    matrix.write_npy(output)
+    output.seek(0)
+    loaded = numpy.load(output)
+    assert loaded.dtype == numpy.dtype("<u4")
+    assert loaded.shape == matrix.shape
+    assert loaded.tolist() == [list(row) for row in matrix.rows]
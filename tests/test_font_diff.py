@@ -0,0 +1,68 @@
+from pathlib import Path
+
+import pytest
+
+from cjkcount.font_diff import diff_faces, format_diff, load_coverages, parse_face_spec
+
+# Face B of the collection maps U+4E00..U+4E31, Face A 50 more
+ONLY_FACE_A = "".join(map(chr, range(0x4E32, 0x4E64)))
+
+
+def test_parse_face_spec():
+    assert parse_face_spec("fonts/font.ttc#1") == (Path("fonts/font.ttc"), 1)
+    assert parse_face_spec("fonts/font.ttc") == (Path("fonts/font.ttc"), None)
+    # not a face number
+    assert parse_face_spec("fonts/#font.ttc") == (Path("fonts/#font.ttc"), None)
+
+
+def test_load_coverages(collection_path: Path, font_path: Path):
+    coverages = load_coverages([str(collection_path), f"{collection_path}#1", str(font_path)])
+    assert [(face.font_id, face.font_name) for face in coverages] == [
+        (0, "Face A"),
+        (1, "Face B"),
+        (1, "Face B"),
+        (-1, "Single"),
+    ]
+    assert [face.bitmap.bit_count() for face in coverages] == [100, 50, 50, 100]
+    assert [face.label for face in coverages[1:]] == ["collection.ttc#1", "collection.ttc#1", "single.ttf"]
+
+
+def test_face_number_of_single_font(font_path: Path):
+    with pytest.raises(ValueError, match="not a font collection"):
+        load_coverages([f"{font_path}#0"])
+
+
+def test_face_number_out_of_range(collection_path: Path):
+    with pytest.raises(ValueError, match="faces 0 to 1"):
+        load_coverages([f"{collection_path}#2"])
+
+
+def test_diff(collection_path: Path, font_path: Path):
+    diffs = diff_faces(load_coverages([str(collection_path), str(font_path)]))
+    # every pair, in order
+    assert [(diff.face_a.label, diff.face_b.label) for diff in diffs] == [
+        ("collection.ttc#0", "collection.ttc#1"),
+        ("collection.ttc#0", "single.ttf"),
+        ("collection.ttc#1", "single.ttf"),
+    ]
+    diff = diffs[0]
+    result = diff.to_dict(include_chars=True)
+    assert (result["only_a"], result["only_b"]) == (50, 0)
+    assert result["blocks"]["CJK_UNIFIED_IDEOGRAPHS"] == {"only_a": 50, "only_b": 0}
+    assert result["only_a_chars"] == ONLY_FACE_A
+    assert result["only_b_chars"] == ""
+    assert diffs[1].to_dict()["only_a"] == diffs[1].to_dict()["only_b"] == 0
+
+
+def test_format_diff(collection_path: Path):
+    diff = diff_faces(load_coverages([f"{collection_path}#1", f"{collection_path}#0"]))[0]
+    lines = format_diff(diff, include_chars=True).splitlines()
+    assert lines[0] == (
+        "collection.ttc#1 vs collection.ttc#0: 0 only in collection.ttc#1, 50 only in collection.ttc#0"
+    )
+    assert lines[1].split() == ["only", "A", "only", "B"]
+    rows = {line.split()[0]: line.split()[1:] for line in lines[2:-2]}
+    assert rows["CJK_UNIFIED_IDEOGRAPHS"] == ["0", "50"]
+    # tables and blocks without differences are left out
+    assert all(counts != ["0", "0"] for counts in rows.values())
+    assert lines[-2:] == ["  only in collection.ttc#1: ", f"  only in collection.ttc#0: {ONLY_FACE_A}"]
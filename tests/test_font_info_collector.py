@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from cjkcount import FontInfoCollector as font_info_collector
+from cjkcount.cmap_reader import UnsupportedFont
+from cjkcount.FontInfoCollector import FontInfoCollector
+
+
+def _unsupported(*args, **kwargs):
+    raise UnsupportedFont("forced")
+
+
+def test_load_all_faces(collection_path: Path):
+    fonts = FontInfoCollector.load_all_faces(collection_path)
+    assert [font.font_name for font in fonts] == ["Face A", "Face B"]
+    assert [font.unicode_char_count["CJK_UNIFIED_IDEOGRAPHS"] for font in fonts] == [100, 50]
+
+
+def test_load_all_faces_fontTools_fallback(collection_path: Path, monkeypatch: pytest.MonkeyPatch):
+    # every face goes through fontTools on the shared mapping, which must stay open
+    monkeypatch.setattr(font_info_collector, "read_all_font_cmaps", _unsupported)
+    monkeypatch.setattr(font_info_collector, "read_font_cmap", _unsupported)
+    fonts = FontInfoCollector.load_all_faces(collection_path)
+    assert [font.font_name for font in fonts] == ["Face A", "Face B"]
+    assert [font.unicode_char_count["CJK_UNIFIED_IDEOGRAPHS"] for font in fonts] == [100, 50]
@@ -0,0 +1,65 @@
+"""The cold import time of the package must stay within a fixed budget.
+
+Each module is imported in a fresh interpreter with `python -X importtime`, and
+the fastest of a few runs is compared with its budget. `import cjkcount` must
+not pull in fontTools or a GUI library.
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# module -> cumulative import time budget in milliseconds
+BUDGETS_MS = {
+    # only the API, everything heavy is imported by the first count
+    "cjkcount": 60,
+    # the counting core, with fontTools and the block data
+    "cjkcount.batch_scan": 400,
+}
+# never imported by `import cjkcount`
+FORBIDDEN_MODULES = ("fontTools", "tkinter", "pyglet", "pyperclip", "pydantic")
+REPEATS = 5
+
+
+def import_time_ms(module: str) -> tuple[float, set[str]]:
+    """Import `module` in a fresh interpreter.
+
+    Returns:
+        The cumulative import time of `module` and the names of every module imported.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative_us = None
+    imported = set()
+    # lines look like "import time:       413 |      23390 | cjkcount"
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+    if cumulative_us is None:
+        raise RuntimeError(f"{module} was not imported")
+    return cumulative_us / 1000, imported
+
+
+@pytest.mark.parametrize("module", BUDGETS_MS)
+def test_import_time_budget(module: str):
+    best_ms = min(import_time_ms(module)[0] for _ in range(REPEATS))
+    assert best_ms <= BUDGETS_MS[module], f"{module} imports in {best_ms:.1f}ms"
+
+
+def test_import_is_gui_and_fonttools_free():
+    _, imported = import_time_ms("cjkcount")
+    forbidden = sorted(name for name in imported if name.split(".")[0] in FORBIDDEN_MODULES)
+    assert not forbidden, f"import cjkcount imports {', '.join(forbidden)}"
@@ -0,0 +1,44 @@
+import queue
+from pathlib import Path
+
+from cjkcount.membership_index import get_membership_index
+from load_worker import LoadJob
+
+
+class _CancelAt:
+    """A message queue cancelling the job once it posts stage `stage_name`."""
+
+    def __init__(self, stage_name: str | None = None):
+        self.stage_name = stage_name
+        self.messages = []
+
+    def put(self, message: tuple):
+        job, kind, payload = message
+        self.messages.append((kind, payload))
+        if kind == "stage" and payload == self.stage_name:
+            job.cancel()
+
+
+def _run_job(font_path: Path, cancel_at: str | None = None) -> list[tuple[str, object]]:
+    messages = _CancelAt(cancel_at)
+    job = LoadJob(font_path, -1, messages)
+    # run in this thread, the messages are then complete on return
+    job._run()
+    return messages.messages
+
+
+def test_membership_index_stage(font_path: Path):
+    # a font with few codepoints is counted through the index once it is built
+    assert get_membership_index() is not None
+    messages = _run_job(font_path)
+    stages = [payload for kind, payload in messages if kind == "stage"]
+    assert "membership_index" in stages
+    assert not any(stage_name.startswith("table:") for stage_name in stages)
+    assert messages[-1][0] == "done"
+
+
+def test_cancel_before_membership_index(font_path: Path):
+    assert get_membership_index() is not None
+    messages = _run_job(font_path, cancel_at="extract_chars")
+    assert messages[-1] == ("cancelled", None)
+    assert ("stage", "membership_index") not in messages
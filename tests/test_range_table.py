@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from cjkcount import codepoint_bitmap
+from cjkcount.global_var import CJKTable, RangeTable
+
+FRONT_MATTER = """---
+cjk_group: jian
+name:
+    en: Test
+    zhs: Test
+    zht: Test
+{ranges}---
+{characters}"""
+
+RANGES = ["U+3007", "U+4E00..U+4E0F", "4E08-4E20", "U+9FA0..U+9FA5"]
+CODEPOINTS = sorted({0x3007, *range(0x4E00, 0x4E21), *range(0x9FA0, 0x9FA6)})
+
+
+def _write_table(directory: Path, name: str, ranges: list | None = None, characters: str = "") -> Path:
+    table_path = directory / f"{name}-han.txt"
+    ranges_yaml = "ranges:\n" + "".join(f"    - {value}\n" for value in ranges) if ranges else ""
+    table_path.write_text(FRONT_MATTER.format(ranges=ranges_yaml, characters=characters), encoding="utf-8")
+    return table_path
+
+
+def test_range_table_counts_like_character_table(tmp_path: Path):
+    range_table = CJKTable.load(_write_table(tmp_path, "ranges", RANGES))
+    char_table = CJKTable.load(
+        _write_table(tmp_path, "chars", characters="\n".join(map(chr, CODEPOINTS)))
+    )
+    assert isinstance(range_table, RangeTable)
+    assert not isinstance(char_table, RangeTable)
+    assert range_table.count == char_table.count == len(CODEPOINTS)
+    assert list(range_table.codepoints) == list(char_table.codepoints)
+    assert range_table.bitmap == char_table.bitmap
+
+    font_codepoints = [0x3006, 0x3007, 0x4E10, 0x4E21, 0x9FA5, 0x9FA6]
+    font_bitmap = codepoint_bitmap.from_codepoints(font_codepoints)
+    assert range_table.count_codepoints(font_codepoints) == 3
+    assert range_table.count_overlap(font_bitmap) == char_table.count_overlap(font_bitmap) == 3
+    assert range_table.get_missing_chars(font_bitmap) == char_table.get_missing_chars(font_bitmap)
+
+
+@pytest.mark.parametrize("value", ["3007", "0x3007", "[0x4E00, 0x9FA5]"])
+def test_bare_numbers_rejected(tmp_path: Path, value: str):
+    # YAML reads these as numbers, `- 3007` would silently be U+0BBF
+    table_path = _write_table(tmp_path, "numbers", [value])
+    with pytest.raises(ValueError, match="numbers-han.txt"):
+        CJKTable.load(table_path)
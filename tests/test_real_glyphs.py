@@ -0,0 +1,96 @@
+from pathlib import Path
+
+import pytest
+from fontTools.fontBuilder import FontBuilder
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+from cjkcount import FontInfoCollector as font_info_collector
+from cjkcount.cmap_reader import UnsupportedFont
+from cjkcount.FontInfoCollector import FontInfoCollector
+from cjkcount.global_var import CountingOptions
+
+GLYPH_ORDER = [".notdef", "square", "empty"]
+# 100 ideographs, the last 40 mapped to a glyph with no outline
+CMAP = {
+    **{code: "square" for code in range(0x4E00, 0x4E3C)},
+    **{code: "empty" for code in range(0x4E3C, 0x4E64)},
+}
+
+
+def _draw(pen, name: str):
+    # .notdef differs from the drawn glyph, a copy of it would count as a placeholder
+    if name == ".notdef":
+        pen.moveTo((100, 100))
+        pen.lineTo((100, 900))
+        pen.lineTo((500, 900))
+        pen.lineTo((500, 100))
+        pen.closePath()
+    elif name == "square":
+        pen.moveTo((100, 100))
+        pen.lineTo((100, 900))
+        pen.lineTo((900, 900))
+        pen.closePath()
+
+
+def _build(outlines: str) -> TTFont:
+    builder = FontBuilder(1000, isTTF=outlines == "glyf")
+    builder.setupGlyphOrder(GLYPH_ORDER)
+    builder.setupCharacterMap(CMAP)
+    if outlines == "glyf":
+        glyphs = {}
+        for name in GLYPH_ORDER:
+            pen = TTGlyphPen(None)
+            _draw(pen, name)
+            glyphs[name] = pen.glyph()
+        builder.setupGlyf(glyphs)
+    else:
+        charstrings = {}
+        for name in GLYPH_ORDER:
+            pen = T2CharStringPen(1000, None)
+            _draw(pen, name)
+            charstrings[name] = pen.getCharString()
+        builder.setupCFF("RealGlyphs", {"FullName": "Real Glyphs"}, charstrings, {})
+    builder.setupHorizontalMetrics({name: (1000, 100) for name in GLYPH_ORDER})
+    builder.setupHorizontalHeader(ascent=880, descent=-120)
+    builder.setupNameTable({"familyName": "Real Glyphs", "styleName": "Regular"})
+    builder.setupOS2()
+    builder.setupPost()
+    return builder.font
+
+
+@pytest.fixture(
+    params=[("glyf", None), ("cff", None), ("glyf", "woff2"), ("cff", "woff2")],
+    ids=["glyf", "cff", "glyf-woff2", "cff-woff2"],
+)
+def blank_glyph_font_path(request, tmp_path: Path) -> Path:
+    outlines, flavor = request.param
+    font = _build(outlines)
+    font.flavor = flavor
+    path = tmp_path / f"font.{flavor or ('ttf' if outlines == 'glyf' else 'otf')}"
+    font.save(path)
+    return path
+
+
+def _count(font_path: Path) -> tuple[int, int]:
+    cjk_char_count, unicode_char_count = FontInfoCollector(font_path, -1).count_cjk_chars()
+    return cjk_char_count["gb2312"], unicode_char_count["CJK_UNIFIED_IDEOGRAPHS"]
+
+
+def test_blank_glyphs_dropped(blank_glyph_font_path: Path):
+    all_counts = _count(blank_glyph_font_path)
+    CountingOptions.real_glyphs_only = True
+    real_counts = _count(blank_glyph_font_path)
+    assert all_counts[1] == 100
+    assert real_counts[1] == 60
+    assert real_counts[0] < all_counts[0]
+
+
+def test_blank_glyphs_dropped_by_fontTools(blank_glyph_font_path: Path, monkeypatch: pytest.MonkeyPatch):
+    def unsupported(*args, **kwargs):
+        raise UnsupportedFont("forced")
+
+    monkeypatch.setattr(font_info_collector, "read_font_cmap", unsupported)
+    CountingOptions.real_glyphs_only = True
+    assert _count(blank_glyph_font_path)[1] == 60
@@ -0,0 +1,78 @@
+import csv
+import gzip
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from cjkcount.batch_scan import get_fieldnames, scan_font_file
+from cjkcount.report_writers import (
+    ReportSummary,
+    guess_format,
+    make_writer,
+    open_report,
+    write_rows,
+)
+
+
+@pytest.fixture
+def rows(collection_path: Path, font_path: Path, tmp_path: Path) -> list[dict]:
+    """The rows of a two-face collection, a single font and a damaged font."""
+    damaged_path = tmp_path / "damaged.ttf"
+    damaged_path.write_bytes(b"\x00\x01\x00\x00damaged")
+    return [
+        row
+        for path in (collection_path, font_path, damaged_path)
+        for row in scan_font_file(path)
+    ]
+
+
+def _write(rows: list[dict], output_path: Path) -> int:
+    output, flush_interval = open_report(output_path)
+    with output:
+        writer = make_writer(guess_format(output_path), output, flush_interval)
+        return write_rows(rows, writer)
+
+
+def _read_text(output_path: Path) -> str:
+    if output_path.suffix == ".gz":
+        with gzip.open(output_path, "rt", encoding="utf-8", newline="") as f:
+            return f.read()
+    return output_path.read_text(encoding="utf-8")
+
+
+@pytest.mark.parametrize("name", ["report.csv", "report.csv.gz"])
+def test_csv_round_trip(rows: list[dict], tmp_path: Path, name: str):
+    output_path = tmp_path / name
+    assert _write(rows, output_path) == 1
+    read_rows = list(csv.DictReader(io.StringIO(_read_text(output_path), newline="")))
+    assert list(read_rows[0]) == get_fieldnames()
+    assert read_rows == [
+        {column: "" if row.get(column) is None else str(row[column]) for column in get_fieldnames()}
+        for row in rows
+    ]
+
+
+@pytest.mark.parametrize("name", ["report.jsonl", "report.jsonl.gz"])
+def test_jsonl_round_trip(rows: list[dict], tmp_path: Path, name: str):
+    output_path = tmp_path / name
+    assert _write(rows, output_path) == 1
+    assert [json.loads(line) for line in _read_text(output_path).splitlines()] == rows
+
+
+def test_guess_format():
+    assert guess_format(None) == "csv"
+    assert guess_format(Path("report.CSV.gz")) == "csv"
+    assert guess_format(Path("report.ndjson")) == "jsonl"
+    assert guess_format(Path("report.html.gz")) == "html"
+
+
+def test_summary_totals(rows: list[dict]):
+    summary = ReportSummary()
+    writer = make_writer("jsonl", io.StringIO())
+    assert write_rows(rows, writer, summary) == 1
+    totals = summary.to_dict()
+    assert (totals["files"], totals["faces"], totals["errors"]) == (3, 4, 1)
+    # Face A and the single font map 100 ideographs, Face B 50
+    assert totals["columns"]["CJK_UNIFIED_IDEOGRAPHS"] == {"max": 100, "mean": 250 / 3}
@@ -0,0 +1,109 @@
+import pickle
+import sys
+from pathlib import Path
+
+from cjkcount import result_cache
+from cjkcount.cmap_reader import FontCmap
+from cjkcount.global_var import package_directory
+from cjkcount.result_cache import ResultCache
+
+FONT_CMAP = FontCmap("Font", {code: 1 for code in range(0x4E00, 0x4E64)}, [])
+
+
+def _sizes(cache: ResultCache) -> tuple[int, int]:
+    connection = cache._connect()
+    (total,) = connection.execute("SELECT total FROM cache_size").fetchone()
+    (summed,) = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()
+    return total, summed
+
+
+def test_get_put(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    assert cache.get("hash", -1, "v1") is None
+    cache.put("hash", -1, "v1", FONT_CMAP, {"gb2312": 100}, {"total": 100})
+    cached = cache.get("hash", -1, "v1")
+    assert cached.font_cmap.cmap == FONT_CMAP.cmap
+    assert cached.cjk_char_count == {"gb2312": 100}
+    assert cache.get("hash", -1, "v2") is None
+    cache.close()
+
+
+def test_total_size_follows_replaced_rows(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    cache.put("hash", -1, "v1", FONT_CMAP, {}, {})
+    cache.put("hash", -1, "v1", FONT_CMAP, {"gb2312": 100}, {})
+    cache.put("other", 0, "v1", FONT_CMAP, {}, {})
+    total, summed = _sizes(cache)
+    assert total == summed > 0
+    cache.close()
+
+
+def test_evicts_least_recently_used(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    cache.put("probe", -1, "v1", FONT_CMAP, {}, {})
+    row_size, _ = _sizes(cache)
+    cache.close()
+
+    cache = ResultCache(tmp_path / "cache.sqlite", max_bytes=row_size * 10)
+    for i in range(30):
+        cache.put(f"hash{i}", -1, "v1", FONT_CMAP, {}, {})
+    total, summed = _sizes(cache)
+    assert total == summed <= row_size * 10
+    assert cache.get("hash29", -1, "v1") is not None
+    assert cache.get("hash0", -1, "v1") is None
+    cache.close()
+
+
+def test_total_size_of_older_cache(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    cache.put("hash", -1, "v1", FONT_CMAP, {}, {})
+    # a cache written before the size table existed
+    cache._connect().executescript(
+        "DROP TRIGGER results_size_insert; DROP TRIGGER results_size_delete;"
+        " DROP TRIGGER results_size_update; DROP TABLE cache_size; PRAGMA user_version = 0;"
+    )
+    cache.close()
+
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    total, summed = _sizes(cache)
+    assert total == summed > 0
+    cache.close()
+
+
+def test_user_cache_directory(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(sys, "platform", "linux")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert result_cache.get_user_cache_directory() == tmp_path / "cjkcount"
+    monkeypatch.setenv("XDG_CACHE_HOME", "relative")
+    assert result_cache.get_user_cache_directory() == Path.home() / ".cache" / "cjkcount"
+    monkeypatch.setattr(sys, "platform", "win32")
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path))
+    assert result_cache.get_user_cache_directory() == tmp_path / "cjkcount" / "Cache"
+
+
+def test_default_cache_not_next_to_the_package():
+    # an installed package would write into site-packages
+    assert result_cache.DEFAULT_CACHE_PATH.parent != package_directory.parent / "cache"
+
+
+def test_hits_written_in_batches(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    cache.put("old", -1, "v1", FONT_CMAP, {}, {})
+    cache.put("new", -1, "v1", FONT_CMAP, {}, {})
+    assert cache.get("old", -1, "v1") is not None
+    # a hit is written with the next insert or on close, not at once
+    assert len(cache._touched) == 1
+    cache.close()
+
+    connection = ResultCache(tmp_path / "cache.sqlite")._connect()
+    last_used = dict(connection.execute("SELECT content_hash, last_used FROM results"))
+    assert last_used["old"] > last_used["new"]
+    connection.close()
+
+
+def test_unpickled_once_per_process(tmp_path: Path):
+    cache = ResultCache(tmp_path / "cache.sqlite")
+    first = pickle.loads(pickle.dumps(cache))
+    assert first is not cache
+    assert pickle.loads(pickle.dumps(cache)) is first
+    assert first.cache_path == cache.cache_path
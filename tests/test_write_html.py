@@ -0,0 +1,75 @@
+import io
+from html.parser import HTMLParser
+from pathlib import Path
+
+from cjkcount import cli
+from cjkcount.batch_scan import scan_font_file
+from cjkcount.global_var import DisplayLanguage
+from cjkcount.write_html import HtmlReportWriter
+
+
+class _TagChecker(HTMLParser):
+    """Record the text of every element and check that the elements are closed in order."""
+
+    VOID_TAGS = {"meta"}
+
+    def __init__(self):
+        super().__init__()
+        self.open_tags = []
+        self.counts = {}
+        self.text = []
+        self.lang = None
+
+    def handle_starttag(self, tag, attrs):
+        self.counts[tag] = self.counts.get(tag, 0) + 1
+        if tag == "html":
+            self.lang = dict(attrs).get("lang")
+        if tag not in self.VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_endtag(self, tag):
+        assert self.open_tags.pop() == tag
+
+    def handle_data(self, data):
+        self.text.append(data)
+
+
+def _check(document: str) -> _TagChecker:
+    assert document.startswith("<!DOCTYPE html>\n")
+    checker = _TagChecker()
+    checker.feed(document)
+    checker.close()
+    assert checker.open_tags == []
+    return checker
+
+
+def test_html_report(collection_path: Path, tmp_path: Path):
+    damaged_path = tmp_path / "<damaged>.ttf"
+    damaged_path.write_bytes(b"\x00\x01\x00\x00damaged")
+    rows = [
+        *scan_font_file(collection_path, include_missing=True),
+        *scan_font_file(damaged_path),
+    ]
+    output = io.StringIO()
+    writer = HtmlReportWriter(output, lang=DisplayLanguage.ZHS)
+    for row in rows:
+        writer.write_row(row)
+    writer.close()
+
+    checker = _check(output.getvalue())
+    text = "".join(checker.text)
+    assert checker.lang == "zh-Hans"
+    assert checker.counts["article"] == 3
+    assert "字体计数报告" in text
+    assert "Face A" in text and "Face B" in text
+    # the file name is escaped
+    assert str(damaged_path) in text
+    assert checker.counts["details"] > 0
+
+
+def test_scan_html_lang(font_path: Path, tmp_path: Path):
+    output_path = tmp_path / "report.html"
+    assert cli.main(["scan", str(font_path), "--no-cache", "--lang", "zht", "-o", str(output_path)]) == 0
+    checker = _check(output_path.read_text(encoding="utf-8"))
+    assert checker.lang == "zh-Hant"
+    assert "字型計數報告" in "".join(checker.text)